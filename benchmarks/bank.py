@@ -0,0 +1,40 @@
+"""generates synthetic markdown databases for the benchmarks"""
+
+import random
+from pathlib import Path
+from uuid import UUID
+
+
+def make_bank(folder: Path, n_files: int, n_per_file: int,
+              bilingual: bool = False, seed: int = 1) -> Path:
+    """writes a database with `n_files` topic files of `n_per_file`
+    questions (80% MC, 20% open questions) to folder and returns folder"""
+    rng = random.Random(seed)
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    langs = ["EN", "NL"] if bilingual else ["EN"]
+    for f in range(n_files):
+        lines = [f"# topic {f}\n\n"]
+        for i in range(n_per_file):
+            uuid = UUID(int=rng.getrandbits(128), version=4)
+            sel = " XX" if rng.random() < 0.05 else ""
+            lines.append(f"## Q {f}-{i}{sel}\n\n"
+                         f"[taxonomy]: {rng.randint(1, 4)}\n"
+                         f"[points]: {rng.choice([1, 2])}\n"
+                         f"[uuid]: {uuid}\n")
+            if rng.random() < 0.3:
+                lines.append(f"[collection]: {rng.choice(['T1', 'R2023', 'T1, R2023'])}\n")
+            lines.append("[source]: book\n\n")
+            mc = rng.random() < 0.8
+            correct = rng.randint(0, 3)
+            for lang in langs:
+                lines.append(f"**{lang}**\n\nWhat is {f} {i} in {lang}?\n"
+                             "Second line of the question.\n\n")
+                if mc:
+                    for a in range(4):
+                        tag = "- *X* " if a == correct else "- "
+                        lines.append(f"{tag}answer {a} {lang}\n")
+                lines.append("\n")
+        folder.joinpath(f"topic_{f}.md").write_text("".join(lines),
+                                                    encoding="utf-8")
+    return folder
@@ -0,0 +1,52 @@
+"""load time of markdown databases of increasing size
+
+Loading should scale linearly with the number of questions: the time per
+question remains (roughly) constant.
+
+    python benchmarks/load_scaling.py [max_questions]
+"""
+
+import gc
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bank import make_bank
+
+from mexam.markdown import VERIFY_OFF, load_database
+from mexam.question_db import QuestionDB
+
+N_FILES = 10
+
+
+def best_time(fnc, repeat=3) -> float:
+    rtn = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        t = time.perf_counter()
+        fnc()
+        rtn = min(rtn, time.perf_counter() - t)
+    return rtn
+
+
+def run(max_questions: int = 20000):
+    n = 1250
+    print(f"{'questions':>10} {'load [s]':>10} {'us/quest':>10} "
+          f"{'insert [s]':>11} {'us/quest':>10}")
+    while n <= max_questions:
+        with tempfile.TemporaryDirectory() as tmp:
+            folder = make_bank(Path(tmp), n_files=N_FILES,
+                               n_per_file=n // N_FILES)
+            t_load = best_time(lambda: load_database(folder, journal=False,
+                                                     verify_hashes=VERIFY_OFF))
+            quests = load_database(folder, journal=False,
+                                   verify_hashes=VERIFY_OFF).questions
+            t_insert = best_time(lambda: QuestionDB().add_questions(quests))
+        print(f"{n:10d} {t_load:10.3f} {t_load / n * 1e6:10.1f} "
+              f"{t_insert:11.4f} {t_insert / n * 1e6:10.2f}")
+        n *= 2
+
+
+if __name__ == "__main__":
+    run(*map(int, sys.argv[1:2]))
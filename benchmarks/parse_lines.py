@@ -0,0 +1,99 @@
+"""per-line cost of the markdown parser
+
+Compares the line classification with up to five regular expressions per
+line (as before the single-pass classifier) with the classification by the
+first character (as in `_MDParser.iter_parse`) and reports the per-line
+cost of the complete parser.
+
+    python benchmarks/parse_lines.py [n_questions]
+"""
+
+import gc
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bank import make_bank
+
+from mexam.markdown.load import _MDParser
+from mexam.markdown.md_lib import MDQuestion, MDQuestionHeader, MDTopic
+from mexam.misc import all_files
+
+REGEXES = (MDTopic.HEAD, MDQuestionHeader.HEAD, MDQuestionHeader.INFO,
+           MDQuestion.RE_QUEST_LANG, MDQuestion.RE_ANSWER)
+
+
+def classify_regex(lines):
+    """line type: index of the first matching regex (5: text)"""
+    rtn = 0
+    for ln in lines:
+        ln = ln.rstrip()
+        for i, regex in enumerate(REGEXES):
+            if regex.match(ln) is not None:
+                break
+        else:
+            i = len(REGEXES)
+        rtn += i
+    return rtn
+
+
+def classify_first_char(lines):
+    """line type: regex only for lines starting with the character of the
+    line type"""
+    rtn = 0
+    for ln in lines:
+        ln = ln.rstrip()
+        first = ln.lstrip()[:1]
+        i = 5
+        if first == "#":
+            if MDTopic.HEAD.match(ln) is not None:
+                i = 0
+            elif MDQuestionHeader.HEAD.match(ln) is not None:
+                i = 1
+        elif first == "[":
+            if MDQuestionHeader.INFO.match(ln) is not None:
+                i = 2
+        elif first == "*":
+            if MDQuestion.RE_QUEST_LANG.match(ln) is not None:
+                i = 3
+        elif first == "-":
+            if MDQuestion.RE_ANSWER.match(ln) is not None:
+                i = 4
+        rtn += i
+    return rtn
+
+
+def parse(lines):
+    return list(_MDParser(verify_hashes=False).iter_parse(lines))
+
+
+def best_time(fnc, lines, repeat=5) -> float:
+    rtn = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        t = time.perf_counter()
+        fnc(lines)
+        rtn = min(rtn, time.perf_counter() - t)
+    return rtn
+
+
+def run(n_questions: int = 10000):
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = make_bank(Path(tmp), n_files=10, n_per_file=n_questions // 10,
+                           bilingual=True)
+        lines = []
+        for fl in all_files(folder, ".md"):
+            lines.extend(fl.read_text(encoding="utf-8").splitlines(True))
+
+    assert classify_regex(lines) == classify_first_char(lines)
+    print(f"{len(lines)} lines, {n_questions} bilingual questions")
+    for name, fnc in (("classify, regex per line", classify_regex),
+                      ("classify, first character", classify_first_char),
+                      ("parse", parse)):
+        t = best_time(fnc, lines)
+        print(f"{name:>26}: {t:7.3f} s, {t / len(lines) * 1e6:6.2f} us/line")
+
+
+if __name__ == "__main__":
+    run(*map(int, sys.argv[1:2]))
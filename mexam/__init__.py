@@ -9,5 +9,7 @@ __version__ = "0.12.2"
 __author__ = 'Oliver Lindemann'
 
 from . import question
-from .exam import Exam, ExamSettings, make_exam
+from .blueprint import Blueprint, assemble_exam
+from .exam import Exam, ExamSettings, make_exam, make_exam_versions
 from .question_db import QuestionDB
+from .grading import AnswerKey, Grader
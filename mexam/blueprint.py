@@ -0,0 +1,303 @@
+"""blueprint-driven selection of exam questions"""
+
+import math
+import random
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+from .question import TQuestion
+from .question_db import QuestionDB
+
+EPSILON = 1e-9
+
+
+class Blueprint(object):
+
+    def __init__(self,
+                 n_questions: int,
+                 total_points: Optional[float] = None,
+                 max_per_topic: Optional[int] = None,
+                 taxonomy_shares: Optional[Dict[str, float]] = None,
+                 collection: Optional[str] = None):
+        """requirements of an exam
+
+        taxonomy_shares: minimum share of questions for taxonomy levels, e.g.
+            {"1,2": 0.6} requires at least 60% questions with taxonomy 1 or 2
+        collection: choose only questions of this collection
+        """
+        if n_questions < 1:
+            raise ValueError("Number of questions must be positive")
+        self.n_questions = n_questions
+        self.total_points = total_points
+        self.max_per_topic = max_per_topic
+        self.collection = collection
+        # (taxonomy levels, minimum number of questions)
+        self.taxonomy_quotas: List[Tuple[Set[str], int]] = []
+        if taxonomy_shares is not None:
+            for levels, share in taxonomy_shares.items():
+                if share < 0 or share > 1:
+                    raise ValueError(f"Incorrect taxonomy share: {share}")
+                lv = {x.strip() for x in levels.split(",")}
+                lv.discard("")
+                n = math.ceil(share * n_questions - EPSILON)
+                self.taxonomy_quotas.append((lv, n))
+
+    def __str__(self):
+        rtn = f"{self.n_questions} questions"
+        if self.total_points is not None:
+            rtn += f", {self.total_points} points"
+        if self.max_per_topic is not None:
+            rtn += f", max. {self.max_per_topic} per topic"
+        for lv, n in self.taxonomy_quotas:
+            rtn += f", min. {n} with taxonomy {','.join(sorted(lv))}"
+        if self.collection is not None:
+            rtn += f", collection {self.collection}"
+        return rtn
+
+    def violations(self, questions: List[TQuestion]) -> List[str]:
+        """returns a description of all unmet requirements"""
+        rtn = []
+        if len(questions) != self.n_questions:
+            rtn.append(f"{len(questions)} instead of {self.n_questions} questions")
+        if self.total_points is not None:
+            points = sum(q.points for q in questions)
+            if abs(points - self.total_points) > EPSILON:
+                rtn.append(f"{points} instead of {self.total_points} points")
+        if self.max_per_topic is not None:
+            topics: Dict[str, int] = {}
+            for q in questions:
+                topics[q.topic] = topics.get(q.topic, 0) + 1
+            for t, n in topics.items():
+                if n > self.max_per_topic:
+                    rtn.append(f"{n} questions of topic '{t}'")
+        for lv, n in self.taxonomy_quotas:
+            cnt = sum(1 for q in questions if q.taxonomy in lv)
+            if cnt < n:
+                rtn.append(f"{cnt} instead of {n} questions with taxonomy "
+                           f"{','.join(sorted(lv))}")
+        if self.collection is not None:
+            cnt = sum(1 for q in questions if self.collection not in q.collection)
+            if cnt > 0:
+                rtn.append(f"{cnt} questions not in collection {self.collection}")
+        return rtn
+
+
+class _Bucket(object):
+    """candidate questions in order of insertion, grouped by topic"""
+
+    def __init__(self):
+        # topic -> (insertion number, question)
+        self.topics: Dict[str, Deque[Tuple[int, TQuestion]]] = {}
+        self.size = 0
+        self._cnt = 0
+
+    def __len__(self):
+        return self.size
+
+    def append(self, quest: TQuestion):
+        self._cnt += 1
+        self.size += 1
+        try:
+            self.topics[quest.topic].append((self._cnt, quest))
+        except KeyError:
+            self.topics[quest.topic] = deque([(self._cnt, quest)])
+
+    def pop(self, topic_full: Callable[[str], bool]) -> Optional[TQuestion]:
+        """removes and returns the first question with an available topic.
+        Questions of full topics remain in the bucket."""
+        first = None
+        for topic, quests in self.topics.items():
+            if len(quests) > 0 and not topic_full(topic) and \
+                    (first is None or quests[0][0] < first[0][0]):
+                first = quests
+        if first is None:
+            return None
+        self.size -= 1
+        return first.popleft()[1]
+
+
+class _Pool(object):
+    """candidate questions in buckets of questions with identical taxonomy
+    quotas and points"""
+
+    def __init__(self, candidates: List[TQuestion], blueprint: Blueprint):
+        self.blueprint = blueprint
+        self.buckets: Dict[Tuple[Tuple[bool, ...], float], _Bucket] = {}
+        for q in candidates:
+            self.put(q)
+        self.topic_cnt: Dict[str, int] = {}
+
+    def put(self, quest: TQuestion):
+        """adds a candidate question"""
+        key = (self.signature(quest), float(quest.points))
+        try:
+            self.buckets[key].append(quest)
+        except KeyError:
+            self.buckets[key] = _Bucket()
+            self.buckets[key].append(quest)
+
+    def signature(self, quest: TQuestion) -> Tuple[bool, ...]:
+        return tuple(quest.taxonomy in lv for lv, _ in self.blueprint.taxonomy_quotas)
+
+    def topic_full(self, topic: str) -> bool:
+        return self.blueprint.max_per_topic is not None and \
+            self.topic_cnt.get(topic, 0) >= self.blueprint.max_per_topic
+
+    def add_topic(self, topic: str, n: int):
+        self.topic_cnt[topic] = self.topic_cnt.get(topic, 0) + n
+
+    def pop(self, key) -> Optional[TQuestion]:
+        """next candidate of the bucket with an available topic
+
+        Candidates of full topics are kept, since swapping questions makes
+        topics available again (see `_swap_for_points`)."""
+        return self.buckets[key].pop(self.topic_full)
+
+    def take(self, keys: List[Any], target_points: Optional[float],
+             rng: random.Random) -> Optional[TQuestion]:
+        """takes a question from the buckets. The points of the question are
+        as close as possible to target_points, if defined"""
+        keys = [k for k in keys if len(self.buckets[k]) > 0]
+        if target_points is None:
+            # random bucket, weighted by size
+            while len(keys) > 0:
+                k = rng.choices(keys, weights=[len(self.buckets[k]) for k in keys])[0]
+                q = self.pop(k)
+                if q is not None:
+                    return q
+                keys.remove(k)
+            return None
+
+        keys.sort(key=lambda k: (abs(k[1] - target_points), rng.random()))
+        for k in keys:
+            q = self.pop(k)
+            if q is not None:
+                return q
+        return None
+
+
+def assemble_exam(db: QuestionDB,
+                  blueprint: Blueprint,
+                  seed: Any = None,
+                  attempts: int = 10) -> List[TQuestion]:
+    """chooses questions of the database that meet the blueprint
+
+    Greedy search: Taxonomy quotas are filled first and points are kept close
+    to the required average. Remaining differences in the total points are
+    reduced by swapping questions without breaking the taxonomy quotas. If
+    requirements are still unmet, the search is repeated with another
+    random order of the candidates (at most `attempts` times) and the
+    selection with the fewest violations is returned. Use
+    `Blueprint.violations()` to check the result.
+
+    Raises RuntimeError, if the database has not enough questions.
+    """
+    rng = random.Random(seed)
+    if blueprint.collection is None:
+        candidates = list(db.questions)
+    else:
+        members = db.collection_members(blueprint.collection)
+        candidates = [q for q in db.questions if q.uuid in members]
+    if len(candidates) < blueprint.n_questions:
+        raise RuntimeError(f"Only {len(candidates)} questions available, "
+                           f"but {blueprint.n_questions} required")
+    order = {id(q): i for i, q in enumerate(candidates)}
+
+    rtn: List[TQuestion] = []
+    n_violations = None
+    for _ in range(max(attempts, 1)):
+        rng.shuffle(candidates)
+        selected = _assemble(candidates, blueprint, rng)
+        n = len(blueprint.violations(selected))
+        if n_violations is None or n < n_violations:
+            rtn, n_violations = selected, n
+        if n == 0:
+            break
+
+    rtn.sort(key=lambda q: order[id(q)])
+    return rtn
+
+
+def _assemble(candidates: List[TQuestion], blueprint: Blueprint,
+              rng: random.Random) -> List[TQuestion]:
+    """greedy search in the order of the candidates (see `assemble_exam`)"""
+    pool = _Pool(candidates, blueprint)
+    all_keys = list(pool.buckets.keys())
+
+    selected: List[TQuestion] = []
+    points = 0.0
+
+    def target() -> Optional[float]:
+        if blueprint.total_points is None:
+            return None
+        return (blueprint.total_points - points) / \
+            (blueprint.n_questions - len(selected))
+
+    def add(q: TQuestion):
+        nonlocal points
+        selected.append(q)
+        points += q.points
+        pool.add_topic(q.topic, 1)
+
+    # taxonomy quotas
+    for i, (_, n_required) in enumerate(blueprint.taxonomy_quotas):
+        keys = [k for k in all_keys if k[0][i]]
+        cnt = sum(1 for q in selected if pool.signature(q)[i])
+        while cnt < n_required and len(selected) < blueprint.n_questions:
+            q = pool.take(keys, target_points=target(), rng=rng)
+            if q is None:
+                break
+            add(q)
+            cnt += 1
+
+    # remaining questions
+    while len(selected) < blueprint.n_questions:
+        q = pool.take(all_keys, target_points=target(), rng=rng)
+        if q is None:
+            break
+        add(q)
+
+    if blueprint.total_points is not None:
+        _swap_for_points(selected, pool, blueprint.total_points, rng)
+    return selected
+
+
+def _swap_for_points(selected: List[TQuestion], pool: _Pool,
+                     total_points: float, rng: random.Random):
+    """replaces questions to reduce the difference to the total points. The
+    number of questions of a taxonomy quota decreases only if the quota
+    remains fulfilled."""
+    diff = total_points - sum(q.points for q in selected)
+    quotas = [n for _, n in pool.blueprint.taxonomy_quotas]
+    cnt = [sum(x) for x in zip(*map(pool.signature, selected))]
+    if len(cnt) == 0:
+        cnt = [0] * len(quotas)
+
+    def keeps_quotas(old_sig, new_sig) -> bool:
+        return all(b >= a or c > n for a, b, c, n in
+                   zip(old_sig, new_sig, cnt, quotas))
+
+    improved = True
+    while improved and abs(diff) > EPSILON:
+        improved = False
+        for i in rng.sample(range(len(selected)), len(selected)):
+            old = selected[i]
+            sig = pool.signature(old)
+            keys = [k for k in pool.buckets
+                    if len(pool.buckets[k]) > 0 and keeps_quotas(sig, k[0]) and
+                    abs(diff - (k[1] - old.points)) < abs(diff) - EPSILON]
+            if len(keys) == 0:
+                continue
+            pool.add_topic(old.topic, -1)
+            new = pool.take(keys, target_points=old.points + diff, rng=rng)
+            if new is None:
+                pool.add_topic(old.topic, 1)
+                continue
+            pool.add_topic(new.topic, 1)
+            pool.put(old)
+            selected[i] = new
+            cnt = [c - a + b for c, a, b in zip(cnt, sig, pool.signature(new))]
+            diff -= new.points - old.points
+            improved = True
+            if abs(diff) <= EPSILON:
+                break
@@ -11,8 +11,13 @@ import argparse
 import sys
 from pathlib import Path
 
-from . import Exam, __version__, markdown  # , ExamSettings
-from .misc import str_fix_len
+from . import Exam, __version__, make_exam_versions, markdown  # , ExamSettings
+from .blueprint import Blueprint, assemble_exam
+from .grading import (AnswerKey, Grader, cronbach_alpha, item_statistics,
+                      store_item_statistics)
+from .markdown.journal import (REMOVE_COLLECTION, SELECT, STORE_COLLECTION,
+                               UNSELECT_ALL, EditJournal)
+from .misc import FILE_ENCODING, str_fix_len
 
 #from .tex import LatexFiles, LatexSettings, run_latex
 
@@ -22,6 +27,18 @@ def command_line_interface():
         epilog="(c) O. Lindemann")
 
     parser.add_argument("DATABASE", help="path to database folder or file")
+    parser.add_argument("--cache", dest="cache",
+                        action="store_true",
+                        help="store parse results in the folder '.mexam_cache' of the database to load unchanged files faster",
+                        default=False)
+    parser.add_argument("-j", "--jobs", dest="jobs",
+                        action="store", type=int, metavar="N",
+                        help="parse database files in N parallel processes (0: number of CPUs)",
+                        default=1)
+    parser.add_argument("--index", dest="index",
+                        action="store_true",
+                        help="query the SQLite index of the database ('.mexam_cache') for 'show', 'export' and 'versions'",
+                        default=False)
 
     subparsers = parser.add_subparsers(dest='cmd')
     cmd_edit = subparsers.add_parser('edit', help ="edit database and its selections and collections") ## database
@@ -59,6 +76,16 @@ def command_line_interface():
                         action="store_true",
                         help="merely rewrite the database (e.g. to format questions or update hashes)",
                         default=False)
+    cmd_edit.add_argument("--journal", dest="journal",
+                        action="store_true",
+                        help="append the changes to the journal of the database instead of rewriting the database files",
+                        default=False)
+    cmd_edit.add_argument("--compact", dest="compact",
+                        action="store_true",
+                        help="write the changes of the journal into the database files",
+                        default=False)
+
+    subparsers.add_parser('verify', help="verify the hashes of all questions")
 
     cmd_show = subparsers.add_parser('show', help="show selected questions")
     #cmd_show.add_argument("DATABASE", help="path to database folder or file")
@@ -90,8 +117,12 @@ def command_line_interface():
                         default=False)
     cmd_show.add_argument("-x",  dest="matrix",
                         action="store_true",
-                        help="show text matrix",
+                        help="show test matrix (points and number of items per topic and taxonomy)",
                         default=False)
+    cmd_show.add_argument("--matrix-csv",  dest="matrix_csv",
+                        action="store", metavar="FILE",
+                        help="save test matrix (points per topic and taxonomy) as csv file",
+                        default=None)
     cmd_show.add_argument("-m",  dest="show_markdown",
                         action="store_true",
                         help="show markdown code",
@@ -125,6 +156,88 @@ def command_line_interface():
                         help="use question labels instead language indicators",
                         default=False)
 
+    cmd_versions = subparsers.add_parser('versions', help="export randomized versions of the exam")
+    cmd_versions.add_argument('-C', action='store',
+                    dest='TAG',
+                    help='use collection')
+    cmd_versions.add_argument('-U', action='store',
+                    dest="UUID_FILE", metavar="FILE",
+                    help='use selection from UUID file')
+    cmd_versions.add_argument('-n', action='store', type=int,
+                    dest='n_versions', metavar="N",
+                    help='number of versions (default: 4)',
+                    default=4)
+    cmd_versions.add_argument('--seed', action='store',
+                    dest='seed',
+                    help='random seed',
+                    default=None)
+    cmd_versions.add_argument('--name', action='store',
+                    dest='name',
+                    help='name of the exam (default: exam)',
+                    default="exam")
+    cmd_versions.add_argument('-o', action='store',
+                    dest='folder', metavar="FOLDER",
+                    help='output folder (default: versions)',
+                    default="versions")
+    cmd_versions.add_argument("--keep-question-order", dest="keep_question_order",
+                        action="store_true",
+                        help="don't shuffle questions",
+                        default=False)
+    cmd_versions.add_argument("--keep-answer-order", dest="keep_answer_order",
+                        action="store_true",
+                        help="don't shuffle answers",
+                        default=False)
+    cmd_versions.add_argument("--ignore-topic", dest="ignore_topic",
+                        action="store_true",
+                        help="shuffle questions across topics",
+                        default=False)
+
+    cmd_assemble = subparsers.add_parser('assemble', help="choose questions by blueprint and save them as UUID file")
+    cmd_assemble.add_argument('-n', action='store', type=int,
+                    dest='n_questions', metavar="N", required=True,
+                    help='number of questions')
+    cmd_assemble.add_argument('--points', action='store', type=float,
+                    dest='points',
+                    help='total points',
+                    default=None)
+    cmd_assemble.add_argument('--max-per-topic', action='store', type=int,
+                    dest='max_per_topic', metavar="N",
+                    help='maximum number of questions per topic',
+                    default=None)
+    cmd_assemble.add_argument('--taxonomy', action='append',
+                    dest='taxonomy', metavar="LEVELS:SHARE",
+                    help="minimum share of taxonomy levels, e.g. '1,2:0.6' (can be used multiple times)",
+                    default=[])
+    cmd_assemble.add_argument('-C', action='store',
+                    dest='TAG',
+                    help='use only questions of the collection')
+    cmd_assemble.add_argument('--seed', action='store',
+                    dest='seed',
+                    help='random seed',
+                    default=None)
+    cmd_assemble.add_argument('-o', action='store',
+                    dest='uuid_file', metavar="FILE",
+                    help='output UUID file (default: exam.uuid)',
+                    default="exam.uuid")
+
+    cmd_grade = subparsers.add_parser('grade', help="grade responses of exam versions")
+    cmd_grade.add_argument("RESPONSES", help="csv file with the columns student, version and the answers")
+    cmd_grade.add_argument('-k', action='store', nargs="+",
+                    dest='keys', metavar="KEY_FILE", required=True,
+                    help='answer key files of the versions (*.key.csv)')
+    cmd_grade.add_argument('-o', action='store',
+                    dest='results', metavar="FILE",
+                    help='output csv file (default: results.csv)',
+                    default="results.csv")
+    cmd_grade.add_argument("--partial-credit", dest="partial_credit",
+                        action="store_true",
+                        help="partial credit for questions with multiple correct answers",
+                        default=False)
+    cmd_grade.add_argument("--item-analysis", dest="item_analysis",
+                        action="store_true",
+                        help="store item statistics (p_value, point_biserial, choice_rates) in the database",
+                        default=False)
+
     args = parser.parse_args()
 
     try:
@@ -132,12 +245,32 @@ def command_line_interface():
     except TypeError:
         info_exit("Please specify a database file or folder")
 
-    db = markdown.load_database(db_path)
+    processes = args.jobs if args.jobs > 0 else None
+    if args.cmd == "verify":
+        db = markdown.load_database(db_path, cache=args.cache,
+                                    processes=processes,
+                                    verify_hashes=markdown.VERIFY_OFF)
+    elif args.cmd == "edit" and args.rewrite:
+        db = markdown.load_database(db_path, cache=args.cache,
+                                    processes=processes,
+                                    verify_hashes=markdown.VERIFY_BATCH)
+    elif args.index and args.cmd in ("show", "export", "versions"):
+        # only modified files are indexed again
+        db = markdown.SQLiteIndex(db_path)
+        db.sync()
+    else:
+        # question bodies are loaded when needed
+        db = markdown.load_database_lazy(db_path, cache=args.cache,
+                                         processes=processes,
+                                         verify_hashes=markdown.VERIFY_LAZY)
 
     ## EDIT
     if args.cmd == "edit":
 
+        if args.journal and args.rewrite:
+            info_exit("You can't rewrite the database and use the journal.")
         rewrite = args.rewrite
+        edits = [] # for the journal
         if args.TAG or args.UUID_FILE or args.ID:
             # add selection
             if args.unselect_all:
@@ -147,11 +280,15 @@ def command_line_interface():
             elif args.TAG and ask_yes_no(
                     f"Add selection mark ('XX') to all items of the collection '{args.TAG}'"):
                 db.select_collection(tag=args.TAG, keep_selected=True)
+                edits.extend((SELECT, str(u)) for u in sorted(
+                    db.collection_members(args.TAG), key=str))
                 rewrite = True
             elif args.UUID_FILE and ask_yes_no(
                     f"Add selection mark to all items listed in the uuid_file '{args.UUID_FILE}'"):
                 uuids, _ = Exam.load_uuid_file(args.UUID_FILE)
                 db.select_uuids(uuids=uuids, keep_selected=True)
+                edits.extend((SELECT, str(u)) for u in uuids
+                             if db.get_question(u) is not None)
                 rewrite = True
             elif args.ID:
                 try:
@@ -160,6 +297,7 @@ def command_line_interface():
                     print(f"ERROR: {er}")
                     exit()
                 if found:
+                    edits.append((SELECT, str(db.find_uuids(args.ID)[0])))
                     rewrite = True
                 else:
                     print(f"Can't find UUID '{args.ID}'")
@@ -170,12 +308,14 @@ def command_line_interface():
         if args.NEW_TAG:
             if ask_yes_no(f"Save current selection as collection '{args.NEW_TAG}'"):
                 db.store_collection(tag=args.NEW_TAG)
+                edits.append((STORE_COLLECTION, args.NEW_TAG))
                 rewrite = True
             else:
                 exit()
         elif args.REMOVE_TAG:
             if ask_yes_no(f"Remove collection '{args.REMOVE_TAG}' from all items"):
                 db.remove_collection(tag=args.REMOVE_TAG)
+                edits.append((REMOVE_COLLECTION, args.REMOVE_TAG))
                 rewrite = True
             else:
                 exit()
@@ -183,17 +323,39 @@ def command_line_interface():
         if args.unselect_all:
             if ask_yes_no("Unselect all selected questions"):
                 db.unselect_all()
+                edits.append((UNSELECT_ALL, ""))
                 rewrite = True
             else:
                 exit()
 
         print(f"- selected: {db.n_selected}")
-        if rewrite:
+        journal = EditJournal.for_database(db_path)
+        if args.journal and len(edits) > 0:
+            journal.append(edits)
+            print(f"- journal: {journal.path} ({journal.size} bytes)")
+            if args.compact or journal.needs_compaction:
+                print(f"** Compact journal and rewrite {db_path} **")
+                markdown.compact_journal(db, db_path)
+        elif args.rewrite:
             print(f"** Rewrite {db_path} **")
-            markdown.save_database_folder(db, db_path)
+            markdown.save_database_folder(db, db_path, incremental=False)
+        elif rewrite or (args.compact and journal.size > 0):
+            print(f"** Rewrite {db_path} **")
+            markdown.compact_journal(db, db_path)
+        elif args.compact:
+            info_exit("- journal: empty")
         else:
             info_exit(" ")
 
+    ## VERIFY
+    elif args.cmd == "verify":
+        mismatches = markdown.verify_database_hashes(db)
+        for x, h in mismatches:
+            print(f"* not fitting hash: {x.source_hash} -> {h}, {x.short_uuid} {x.title}")
+        print(f"- hash mismatches: {len(mismatches)}")
+        if len(mismatches) > 0:
+            print("Use 'edit --rewrite' to update the hashes.")
+
     ## SHOW
     elif args.cmd == "show":
         if args.show_all:
@@ -236,6 +398,18 @@ def command_line_interface():
                     txt += f" {t},"
                 print(txt[:-1])
 
+        if args.matrix:
+            matrix = exam.get_test_matrix()
+            print("\npoints")
+            print(matrix.topic_taxonomy_text())
+            print("items")
+            print(matrix.topic_taxonomy_text(count=True))
+
+        if args.matrix_csv:
+            with open(args.matrix_csv, "w", encoding=FILE_ENCODING) as fl:
+                fl.write(exam.get_test_matrix().topic_taxonomy_csv())
+            print(f"save {args.matrix_csv}")
+
         if args.show_markdown:
             print(markdown.database_to_markdown(exam))
 
@@ -266,6 +440,80 @@ def command_line_interface():
             print(f"save {args.uuid_export}")
             exam.save_uuid_file(file_path=args.uuid_export)
 
+    ## VERSIONS
+    elif args.cmd == "versions":
+
+        exam = Exam(db,
+                    name=args.name,
+                    select_collection=args.TAG,
+                    uuid_file=args.UUID_FILE,
+                    question_label=True)
+        if exam.n_questions == 0:
+            info_exit("No questions defined. Use selection marker, collection tag or uuid file.")
+
+        versions = make_exam_versions(exam, n_versions=args.n_versions,
+                                      seed=args.seed,
+                                      shuffle_questions=not args.keep_question_order,
+                                      shuffle_answers=not args.keep_answer_order,
+                                      sort_by_topics=not args.ignore_topic)
+        files = markdown.save_exam_versions(versions, args.folder,
+                                            processes=processes)
+        for fl in files:
+            print(f"save {fl}")
+
+    ## ASSEMBLE
+    elif args.cmd == "assemble":
+        shares = {}
+        for x in args.taxonomy:
+            try:
+                levels, share = x.rsplit(":", maxsplit=1)
+                shares[levels] = float(share)
+            except ValueError:
+                info_exit(f"Incorrect taxonomy share '{x}'. Use LEVELS:SHARE, e.g. '1,2:0.6'")
+        try:
+            bp = Blueprint(n_questions=args.n_questions,
+                           total_points=args.points,
+                           max_per_topic=args.max_per_topic,
+                           taxonomy_shares=shares,
+                           collection=args.TAG)
+            quests = assemble_exam(db, bp, seed=args.seed)
+        except (RuntimeError, ValueError) as er:
+            info_exit(f"ERROR: {er}")
+
+        print(f"Blueprint: {bp}")
+        db.unselect_all()
+        db.select_uuids([x.uuid for x in quests])
+        exam = Exam(db, name=args.uuid_file)
+        exam.print_summary()
+        for x in bp.violations(quests):
+            print(f"* not fulfilled: {x}")
+        exam.save_uuid_file(args.uuid_file)
+        print(f"save {args.uuid_file}")
+
+    ## GRADE
+    elif args.cmd == "grade":
+        try:
+            keys = [AnswerKey.load(x) for x in args.keys]
+            grader = Grader.from_database(keys, db,
+                                          partial_credit=args.partial_credit)
+            results = grader.grade(args.RESPONSES)
+        except (RuntimeError, ValueError) as er:
+            info_exit(f"ERROR: {er}")
+        results.save_csv(args.results, grader.max_scores())
+        print(f"- students: {results.n_students}, items: {len(results.items)}")
+        print(f"save {args.results}")
+
+        if args.item_analysis:
+            alpha = cronbach_alpha(results)
+            if alpha is not None:
+                print(f"- Cronbach's alpha: {alpha:.3f}")
+            n = store_item_statistics(db, item_statistics(results, grader))
+            print(f"** Rewrite {db_path}, item statistics of {n} questions **")
+            if db_path.is_file():
+                markdown.save_database_file(db, db_path)
+            else:
+                markdown.save_database_folder(db, db_path)
+
     else:
         db.print_summary()
         db.print_collections_selections()
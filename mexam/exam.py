@@ -4,15 +4,17 @@ Python 3
 """
 
 import random
-from copy import deepcopy
+from copy import copy
 from pathlib import Path
-from typing import List, Optional, Tuple, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 from uuid import UUID
 
 from . import abc_settings
-from .misc import FILE_ENCODING
-from .question import MCBilingualQuestion, MCQuestion, OpenQuestion, TBilingualQuestion
+from .misc import FILE_ENCODING, seeded_random, seeded_sort_key
+from .question import (MCBilingualQuestion, MCQuestion, TBilingualQuestion,
+                       TQuestion)
 from .question_db import QuestionDB
+from .matrix import TestMatrix
 
 
 class ExamSettings(abc_settings.ABCSettings):
@@ -56,46 +58,55 @@ class Exam(QuestionDB):
 
         if collection is defined all questions from the collection are used,
         otherwise selected ("XX") questions.
+
+        question_db: QuestionDB or `markdown.SQLiteIndex`
         """
         super().__init__()
         self.name = name
         self.question_label = question_label
         self.quest_info = quest_info
         self._counter_in_title = counter_in_title
+        self._test_matrix: Optional[Tuple[tuple, TestMatrix]] = None
 
-        cnt = 0
         if select_collection is not None and uuid_file is not None:
             raise ValueError("Selection by both collection and UUID file is not possible")
         if uuid_file is not None:
             selected_uuids, _ = Exam.load_uuid_file(uuid_file)
         else:
-            # find uuids
-            selected_uuids:List[UUID] = []
-            for q in question_db.questions:
-                if select_collection is None:
-                    sel = q.selected
-                else:
-                    sel = select_collection in q.collection
-                if sel:
-                    selected_uuids.append(q.uuid)
+            selected_uuids = question_db.selected_uuids(collection=select_collection)
 
-        # copy selected question
+        # views of the selected question (content is not copied)
+        quests = []
+        self._titles: Dict[int, str] = {} # titles without counter, key: id(view)
         for u in selected_uuids:
             q = question_db.get_question(u)
             if q is not None:
-                q = deepcopy(q)
-                if counter_in_title:
-                    cnt += 1
-                    q.title = f"{cnt}: {q.title}"
-                else:
-                    q.title = f"{q.title}"
-                self.add_question(q, sort_by_topics=False)
-
-        if sort_by_topics:
-            self.sort_by_topics()
+                q = q.materialize().view()
+                self._titles[id(q)] = q.title
+                quests.append(q)
+        self.add_questions(quests, sort_by_topics=sort_by_topics)
+        self._number_titles()
         # unselect_all
         self.unselect_all()
 
+    def _number_titles(self):
+        """sets the question counter (position in the exam) in the titles"""
+        for cnt, x in enumerate(self._questions):
+            title = self._titles.setdefault(id(x), x.title)
+            if self._counter_in_title:
+                x.title = f"{cnt + 1}: {title}"
+
+    def sort_by_topics(self) -> None:
+        super().sort_by_topics()
+        self._number_titles()
+
+    def remove_question(self, uuid:Union[str, UUID]) -> Union[None, TQuestion]:
+        rtn = super().remove_question(uuid)
+        if rtn is not None:
+            self._titles.pop(id(rtn), None)
+            self._number_titles()
+        return rtn
+
     def str_all_questions(self):
         """returns string of all questions """
 
@@ -119,52 +130,95 @@ class Exam(QuestionDB):
     def __str__(self):
         return self.str_title_uuid()
 
-    def shuffle_questions(self, sort_by_topics=True):
+    def shuffle_questions(self, sort_by_topics=True,
+                          rng: Optional[random.Random] = None,
+                          seed: Any = None):
         """randomize order of questions.
 
         You can keep are particular sort for instance of topics. Randomizing
-        will then find place only within categories."""
-
-        random.shuffle(self._questions)
+        will then find place only within categories.
+        If a seed is defined, questions are sorted by a key derived from seed
+        and uuid. The relative order of two questions thus does not depend
+        on the other questions of the exam. Otherwise the random generator
+        (rng) or, if not defined, the global random generator will be used."""
+
+        if seed is not None:
+            self._questions.sort(key=lambda x: seeded_sort_key(seed, x.uuid))
+        elif rng is None:
+            random.shuffle(self._questions)
+        else:
+            rng.shuffle(self._questions)
         if sort_by_topics:
             self.sort_by_topics()
+        else:
+            self._number_titles()
 
-    def shuffle_answers(self):
+    def shuffle_answers(self, rng: Optional[random.Random] = None,
+                        seed: Any = None):
+        """randomize order of answers of all MC questions
+
+        If a seed is defined, each question uses its own random generator
+        derived from seed and uuid. The answer order of a question thus does
+        not depend on the other questions of the exam."""
         for x in self._questions:
             if isinstance(x, (MCBilingualQuestion, MCQuestion)):
-                x.shuffle_answers()
+                if seed is not None:
+                    x.shuffle_answers(rng=seeded_random(seed, x.uuid))
+                else:
+                    x.shuffle_answers(rng=rng)
+
+    def version(self, name: str, seed: Any,
+                shuffle_questions: bool = True,
+                shuffle_answers: bool = True,
+                sort_by_topics: bool = True) -> "Exam":
+        """returns a randomized version of the exam
+
+        The version contains views of the questions of this exam. Questions
+        and answers are shuffled by keys derived from `seed` and the question
+        uuids (see `shuffle_questions`). If seed is None, a random seed is
+        used. The exam itself remains unchanged.
+        """
+        rtn = copy(self)
+        QuestionDB.__init__(rtn) # new question list and indices
+        rtn.name = name
+        rtn._titles = {}
+        rtn._test_matrix = None
+        views = []
+        for x in self._questions:
+            v = x.view()
+            rtn._titles[id(v)] = self._titles.get(id(x), x.title)
+            views.append(v)
+        rtn.add_questions(views, sort_by_topics=False)
+        rtn._number_titles()
+
+        if seed is None:
+            seed = random.getrandbits(64)
+        if shuffle_questions:
+            rtn.shuffle_questions(sort_by_topics=sort_by_topics, seed=seed)
+        if shuffle_answers:
+            rtn.shuffle_answers(seed=seed)
+        return rtn
 
     @property
     def test_matrix(self) -> dict:
         """returns dict with tuple of question id and points for each taxonomy level
             (changes after question order is changed)"""
+        return self.get_test_matrix().as_dict()
+
+    def get_test_matrix(self) -> TestMatrix:
+        """returns the test matrix
 
-        taxo = []
-        points = []
-        question = []
-        topic = []
-        for cnt, q in enumerate(self._questions):
-            cnt += 1
-
-            question.append(cnt)
-            taxo.append(q.taxonomy)
-            points.append(q.points)
-            topic.append(q.topic)
-
-            if isinstance(q, OpenQuestion):
-                letter = 0
-                for cat, pnt in zip(q.part_taxonomies, q.part_points):
-                    tmp = "{}{}".format(cnt, chr(ord('a') + letter))
-                    question.append(tmp)
-                    taxo.append(cat)
-                    points.append(pnt)
-                    topic.append(q.topic)
-                    letter += 1
-
-        return {"question": question,
-                             "taxonomy": taxo,
-                             "topic": topic,
-                             "points": points}
+        The matrix is cached and recreated after the questions or their order
+        have been changed. Call `invalidate_test_matrix()` after changing
+        topic, taxonomy or points of questions.
+        """
+        key = tuple(map(id, self._questions))
+        if self._test_matrix is None or self._test_matrix[0] != key:
+            self._test_matrix = (key, TestMatrix(self._questions))
+        return self._test_matrix[1]
+
+    def invalidate_test_matrix(self):
+        self._test_matrix = None
 
     @property
     def question_hash_list(self):
@@ -182,8 +236,15 @@ class Exam(QuestionDB):
     def get_solution_summary(self, line_suffix_str="",
                              as_numbers_starting_with_zero=True,
                              as_letters=True,
-                             with_hash=True):
-        """returns all solutions as text"""
+                             with_hash=True,
+                             with_uuid=False,
+                             with_order=False):
+        """returns all solutions as text
+
+        Use `with_uuid` to map the questions of different exam versions and
+        `with_order` to map their answers. The order lists the original
+        index of each answer, separated by spaces.
+        """
 
         txt = ""
         for x, question in enumerate(self._questions):
@@ -191,11 +252,13 @@ class Exam(QuestionDB):
                 if isinstance(question, MCBilingualQuestion):
                     question = question.L1
 
+                txt += line_suffix_str + "Q{0}, ".format(x+1)
+                if with_uuid:
+                    txt += "{0}, ".format(question.uuid)
                 if with_hash:
-                    txt += line_suffix_str + "Q{0}, {1}, ".format(x+1,
-                                                                  question.short_hash)
-                else:
-                    txt += line_suffix_str + "Q{0}, ".format(x+1)
+                    txt += "{0}, ".format(question.short_hash)
+                if with_order:
+                    txt += "{0}, ".format(" ".join(map(str, question.answer_order)))
 
                 txt += str(question.correct_answer_ids(
                     as_numbers_starting_with_zero, as_letters=as_letters))[
@@ -203,10 +266,14 @@ class Exam(QuestionDB):
                 txt += "\n"
 
         if len(txt) > 0:  # include varnames
+            varnames = "question, "
+            if with_uuid:
+                varnames += "uuid, "
             if with_hash:
-                txt = line_suffix_str + "question, hash, solution\n" + txt
-            else:
-                txt = line_suffix_str + "question, solution\n" + txt
+                varnames += "hash, "
+            if with_order:
+                varnames += "order, "
+            txt = line_suffix_str + varnames + "solution\n" + txt
 
         return txt
 
@@ -220,14 +287,8 @@ class Exam(QuestionDB):
         return [str(q.short_uuid) for q in self._questions]
 
     def titles(self) -> List[str]:
-        rtn = []
-        for x in self._questions:
-            if self._counter_in_title:
-                i = x.title.find(":") + 2 # remove number
-            else:
-                i = 0
-            rtn.append(x.title[i:])
-        return rtn
+        """titles without question counter"""
+        return [self._titles.get(id(x), x.title) for x in self._questions]
 
     def save_uuid_file(self, file_path:Union[str, Path]):
         with open(file_path, "w", encoding=FILE_ENCODING) as fl:
@@ -260,14 +321,45 @@ def make_exam(settings:ExamSettings, database:QuestionDB)->  Exam:
                 sort_by_topics=settings.ignore_topic)
     exam.print_summary()
 
-    if settings.seed is not None:
-        random.seed(settings.seed)
-
     if settings.shuffle_questions:
         print(" shuffling questions")
-        exam.shuffle_questions(sort_by_topics=not settings.ignore_topic)
+        exam.shuffle_questions(sort_by_topics=not settings.ignore_topic,
+                               seed=settings.seed)
 
     if settings.shuffle_answers:
         print(" shuffling answers")
-        exam.shuffle_answers()
+        exam.shuffle_answers(seed=settings.seed)
     return exam
+
+
+def version_label(version: int, n_versions: int) -> str:
+    """letter (A, B, C, ...) or, for more than 26 versions, number of the
+    version (starting with 1)"""
+    if n_versions <= 26:
+        return chr(ord("A") + version)
+    else:
+        return str(version + 1).zfill(len(str(n_versions)))
+
+
+def make_exam_versions(exam: Exam,
+                       n_versions: int,
+                       seed: Any = None,
+                       shuffle_questions: bool = True,
+                       shuffle_answers: bool = True,
+                       sort_by_topics: bool = True) -> List[Exam]:
+    """returns n randomized versions of the exam
+
+    Each version is shuffled with keys derived from seed, version label and
+    question uuid (random if seed is None). Changing the selection does
+    therefore not affect the answer order of the other questions. Versions
+    are named `<exam name>_<label>`.
+    """
+    rtn = []
+    for i in range(n_versions):
+        label = version_label(i, n_versions)
+        rtn.append(exam.version(name=f"{exam.name}_{label}",
+                                seed=None if seed is None else f"{seed}:{label}",
+                                shuffle_questions=shuffle_questions,
+                                shuffle_answers=shuffle_answers,
+                                sort_by_topics=sort_by_topics))
+    return rtn
@@ -0,0 +1,228 @@
+"""atomic writing of files
+
+Files are written to a temporary file, which then replaces the target file.
+An interrupted write therefore never leaves a half-written file. Temporary
+file and folder are synced to disk, so that the file survives a crash of
+the system after writing. Files with unchanged content are not written.
+"""
+
+import os
+import stat
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from hashlib import md5
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+
+from .misc import FILE_ENCODING
+
+CHUNK_SIZE = 1 << 20
+
+# modification time, size and digest of the files written by this process
+_digests: Dict[str, Tuple[int, int, str]] = {}
+_lock = threading.Lock()
+
+
+def _default_mode() -> int:
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+DEFAULT_MODE = _default_mode()
+
+
+def _encode(content: Union[str, bytes], encoding: str) -> bytes:
+    if isinstance(content, bytes):
+        return content
+    if os.linesep != "\n":
+        content = content.replace("\n", os.linesep) # like text mode
+    return content.encode(encoding)
+
+
+def _remember(path: Path, digest: str):
+    try:
+        st = path.stat()
+    except OSError:
+        return
+    with _lock:
+        _digests[str(path.absolute())] = (st.st_mtime_ns, st.st_size, digest)
+
+
+def _is_identical(path: Path, data: bytes, digest: str) -> bool:
+    """compares size, the stored digest (if the file has been written by
+    this process and not changed since) or the content in chunks"""
+    try:
+        st = path.stat()
+    except OSError:
+        return False
+    if st.st_size != len(data):
+        return False
+    with _lock:
+        known = _digests.get(str(path.absolute()))
+    if known is not None and known[:2] == (st.st_mtime_ns, st.st_size):
+        return known[2] == digest
+
+    view = memoryview(data)
+    pos = 0
+    with open(path, "rb") as fl:
+        while True:
+            chunk = fl.read(CHUNK_SIZE)
+            if len(chunk) == 0:
+                break
+            if view[pos:pos + len(chunk)] != chunk:
+                return False
+            pos += len(chunk)
+    if pos != len(data):
+        return False
+    _remember(path, digest)
+    return True
+
+
+def _fsync_folder(folder: Path):
+    """syncs the directory entries (e.g. a replaced file) to disk"""
+    try:
+        fd = os.open(folder, os.O_RDONLY | getattr(os, "O_DIRECTORY", 0))
+    except OSError:
+        return  # not supported (e.g. Windows)
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def write_file(path: Union[str, Path],
+               content: Union[str, bytes],
+               encoding: str = FILE_ENCODING,
+               if_different: bool = True) -> bool:
+    """writes the content atomically to the file
+
+    If `if_different`, the file will only be written if the content differs.
+
+    returns True, if the file has been written
+    """
+    path = Path(path)
+    data = _encode(content, encoding)
+    digest = md5(data).hexdigest()
+    if if_different and _is_identical(path, data, digest):
+        return False
+
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.",
+                               suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fl:
+            fl.write(data)
+            fl.flush()
+            os.fsync(fl.fileno())
+        try:
+            mode = stat.S_IMODE(path.stat().st_mode)
+        except OSError:
+            mode = DEFAULT_MODE
+        os.chmod(tmp, mode)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    _fsync_folder(path.absolute().parent)
+    _remember(path, digest)
+    return True
+
+
+class FileWriter(object):
+    """writes files concurrently on a pool of threads (see `write_file`)
+
+    Writes of the same path are done one after the other in the order of
+    the calls of `write`, so that the content of the last call remains.
+
+    Example:
+        with FileWriter() as writer:
+            writer.write(path, content)
+        print(writer.written)
+    """
+
+    def __init__(self, threads: Optional[int] = None,
+                 encoding: str = FILE_ENCODING,
+                 if_different: bool = True):
+        """threads: number of threads (None: default of ThreadPoolExecutor,
+        1: files are written directly)"""
+        self.encoding = encoding
+        self.if_different = if_different
+        if threads == 1:
+            self._pool = None
+        else:
+            self._pool = ThreadPoolExecutor(max_workers=threads)
+        self._jobs: List[Tuple[Path, Future]] = []
+        self._last: Dict[str, Future] = {}  # last job of each path
+        self.written: List[Path] = []
+        self._written = set()
+
+    def write(self, path: Union[str, Path], content: Union[str, bytes]) -> None:
+        path = Path(path)
+        if self._pool is None:
+            if write_file(path, content, encoding=self.encoding,
+                          if_different=self.if_different):
+                self._add_written(path)
+        else:
+            key = str(path.absolute())
+            job = self._pool.submit(self._write_after, self._last.get(key),
+                                    path, content)
+            self._last[key] = job
+            self._jobs.append((path, job))
+
+    def _write_after(self, previous: Optional[Future], path: Path,
+                     content: Union[str, bytes]) -> bool:
+        """waits for the previous write of the same path (started before,
+        since the pool starts jobs in the order of submission)"""
+        if previous is not None:
+            try:
+                previous.result()
+            except Exception:
+                pass # reported by wait
+        return write_file(path, content, encoding=self.encoding,
+                          if_different=self.if_different)
+
+    def _add_written(self, path: Path):
+        if path not in self._written:
+            self._written.add(path)
+            self.written.append(path)
+
+    def wait(self) -> List[Path]:
+        """waits until all files are written and returns the written files
+
+        Raises the first error of a write.
+        """
+        jobs, self._jobs = self._jobs, []
+        self._last = {}
+        error = None
+        for path, job in jobs:
+            try:
+                if job.result():
+                    self._add_written(path)
+            except Exception as err:
+                if error is None:
+                    error = err
+        if error is not None:
+            raise error
+        return self.written
+
+    def close(self):
+        try:
+            self.wait()
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        elif self._pool is not None:
+            self._pool.shutdown()
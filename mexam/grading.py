@@ -0,0 +1,388 @@
+"""grading of multiple choice responses of several exam versions
+
+Answers are represented as bit masks (bit i: answer i), responses are mapped
+to the question UUIDs and the original answer order of the database.
+"""
+
+import csv
+from math import sqrt
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Union
+from uuid import UUID
+
+from .exam import Exam
+from .misc import FILE_ENCODING, number_to_string
+from .question import MCBilingualQuestion, MCQuestion
+from .question_db import QuestionDB
+
+NO_ANSWER = ("", "-", ".", "NA")
+
+
+def letters_to_mask(txt: str) -> int:
+    """converts answer letters (e.g. "A", "AC", "A,C" or "a c") to a bit mask"""
+    rtn = 0
+    for c in txt.upper():
+        if "A" <= c <= "Z":
+            rtn |= 1 << (ord(c) - ord("A"))
+        elif c not in " ,;|-.":
+            raise ValueError(f"Incorrect answer '{txt}'")
+    return rtn
+
+
+def mask_to_letters(mask: int) -> str:
+    rtn = ""
+    i = 0
+    while mask:
+        if mask & 1:
+            rtn += chr(ord("A") + i)
+        mask >>= 1
+        i += 1
+    return rtn
+
+
+def _permute_mask(mask: int, order: List[int]) -> int:
+    """maps a mask of the presented answers to the original answer order"""
+    rtn = 0
+    for i, orig in enumerate(order):
+        if mask & (1 << i):
+            rtn |= 1 << orig
+    return rtn
+
+
+class AnswerKey(object):
+
+    def __init__(self, version: str,
+                 uuids: List[UUID],
+                 solutions: List[int],
+                 orders: Optional[List[Optional[List[int]]]] = None):
+        """answer key of an exam version
+
+        solutions: bit masks of the correct answers as presented in the version
+        orders: original index of each presented answer (None: unknown or
+            unchanged order)
+        """
+        if len(uuids) != len(solutions):
+            raise ValueError("Number of UUIDs and solutions differ")
+        self.version = version
+        self.uuids = uuids
+        self.solutions = solutions
+        if orders is None:
+            orders = [None] * len(uuids)
+        self.orders = orders
+
+    @staticmethod
+    def from_exam(exam: Exam) -> "AnswerKey":
+        uuids = []
+        solutions = []
+        orders: List[Optional[List[int]]] = []
+        for x in exam.questions:
+            if isinstance(x, MCBilingualQuestion):
+                x = x.L1
+            if isinstance(x, MCQuestion):
+                uuids.append(x.uuid)
+                solutions.append(sum(1 << i for i in x.correct_answer_ids()))
+                orders.append(list(x.answer_order))
+        return AnswerKey(exam.name, uuids, solutions, orders)
+
+    @staticmethod
+    def load(path: Union[str, Path], version: Optional[str] = None) -> "AnswerKey":
+        """loads an answer key file (see `Exam.get_solution_summary` and
+        `markdown.save_exam_versions`). The key needs the column 'uuid'.
+        The version name is, if not defined, the file name without
+        '.key.csv'."""
+        path = Path(path)
+        if version is None:
+            version = path.name.split(".")[0]
+        uuids = []
+        solutions = []
+        orders: List[Optional[List[int]]] = []
+        with open(path, "r", encoding=FILE_ENCODING) as fl:
+            header = [x.strip() for x in fl.readline().split(",")]
+            if "uuid" not in header or header[-1] != "solution":
+                raise RuntimeError(f"{path} is not an answer key with UUIDs")
+            i_uuid = header.index("uuid")
+            i_order = header.index("order") if "order" in header else None
+            n = len(header) - 1 # solution might have multiple columns
+            for ln in fl:
+                if len(ln.strip()) == 0:
+                    continue
+                x = [a.strip() for a in ln.split(",")]
+                uuids.append(UUID(x[i_uuid]))
+                if i_order is None:
+                    orders.append(None)
+                else:
+                    orders.append([int(a) for a in x[i_order].split()])
+                solutions.append(letters_to_mask("".join(x[n:])))
+        return AnswerKey(version, uuids, solutions, orders)
+
+
+class ItemResponses(object):
+    """responses and scores of all students for the items (UUIDs)
+
+    `responses[s][i]` is the bit mask of the answers of student s to item i
+    in the original answer order and `scores[s][i]` the points. Items that
+    were not part of the student's version are None.
+    """
+
+    def __init__(self, items: List[UUID]):
+        self.items = items
+        self.students: List[str] = []
+        self.versions: List[str] = []
+        self.responses: List[List[Optional[int]]] = []
+        self.scores: List[List[Optional[float]]] = []
+
+    @property
+    def n_students(self) -> int:
+        return len(self.students)
+
+    def total_scores(self) -> List[float]:
+        return [sum(x for x in s if x is not None) for s in self.scores]
+
+    def csv_rows(self, max_scores: Dict[str, float]) -> Iterator[List[str]]:
+        """rows of the result table (student, version, score, max_score and
+        points of each item)"""
+        yield ["student", "version", "score", "max_score"] + \
+            [str(u) for u in self.items]
+        for st, v, sc in zip(self.students, self.versions, self.scores):
+            yield [st, v,
+                   number_to_string(sum(x for x in sc if x is not None)),
+                   number_to_string(max_scores[v])] + \
+                ["" if x is None else number_to_string(x) for x in sc]
+
+    def save_csv(self, path: Union[str, Path], max_scores: Dict[str, float]):
+        with open(path, "w", encoding=FILE_ENCODING, newline="") as fl:
+            csv.writer(fl).writerows(self.csv_rows(max_scores))
+
+
+class Grader(object):
+
+    def __init__(self, keys: Iterable[AnswerKey],
+                 points: Optional[Dict[UUID, float]] = None,
+                 partial_credit: bool = False):
+        """grades responses of several exam versions
+
+        points: points of each item (UUID). Undefined items have 1 point.
+        partial_credit: questions with multiple correct answers get points
+            for each correct answer minus each incorrect answer. Otherwise,
+            points are given only if the response matches the solution.
+        """
+        self.keys: Dict[str, AnswerKey] = {}
+        labels: Dict[str, List[str]] = {}
+        items: Dict[UUID, None] = {}  # ordered set
+        for k in keys:
+            self.keys[k.version] = k
+            labels.setdefault(k.version.rsplit("_", maxsplit=1)[-1], []).append(k.version)
+            for u in k.uuids:
+                items[u] = None
+        # short version labels (exam_A -> A), if unique
+        self._labels = {lb: v[0] for lb, v in labels.items() if len(v) == 1}
+        self.items = list(items)
+        self._item_index = {u: i for i, u in enumerate(self.items)}
+        if points is None:
+            points = {}
+        self.points = points
+        self.partial_credit = partial_credit
+
+        # solutions in the original answer order
+        self.solutions: Dict[UUID, int] = {}
+        self.n_answers: Dict[UUID, int] = {}
+        for k in self.keys.values():
+            for u, sol, order in zip(k.uuids, k.solutions, k.orders):
+                if order is None:
+                    self.solutions[u] = sol
+                else:
+                    self.solutions[u] = _permute_mask(sol, order)
+                    self.n_answers[u] = len(order)
+
+        # per version: item index, solution, points, order
+        self._tables = {}
+        for v, k in self.keys.items():
+            self._tables[v] = [(self._item_index[u], sol,
+                                float(self.points.get(u, 1)), order)
+                               for u, sol, order in zip(k.uuids, k.solutions, k.orders)]
+
+    @staticmethod
+    def from_database(keys: Iterable[AnswerKey], db: QuestionDB,
+                      partial_credit: bool = False) -> "Grader":
+        """grader with the points of the questions in the database"""
+        keys = list(keys)
+        points = {}
+        for k in keys:
+            for u in k.uuids:
+                q = db.get_question(u)
+                if q is None:
+                    print(f"* UUID {u} of version {k.version} not in database")
+                else:
+                    points[u] = q.points
+        return Grader(keys, points=points, partial_credit=partial_credit)
+
+    def version(self, name: str) -> str:
+        if name in self.keys:
+            return name
+        try:
+            return self._labels[name]
+        except KeyError as err:
+            raise RuntimeError(f"Unknown exam version '{name}'") from err
+
+    def max_scores(self) -> Dict[str, float]:
+        rtn = {}
+        for v, table in self._tables.items():
+            rtn[v] = sum(p for _, _, p, _ in table)
+        return rtn
+
+    def score(self, response: int, solution: int, points: float) -> float:
+        if response == solution:
+            return points
+        elif not self.partial_credit or solution & (solution - 1) == 0:
+            return 0  # single correct answer
+        n_correct = bin(solution).count("1")
+        hits = bin(response & solution).count("1")
+        false = bin(response & ~solution).count("1")
+        return max(0, points * (hits - false) / n_correct)
+
+    def grade_student(self, rtn: ItemResponses, student: str, version: str,
+                      answers: List[str]):
+        version = self.version(version)
+        table = self._tables[version]
+        if len(answers) > len(table):
+            raise RuntimeError(f"Student {student}: {len(answers)} answers, "
+                               f"but version {version} has {len(table)} questions")
+        resp: List[Optional[int]] = [None] * len(self.items)
+        scores: List[Optional[float]] = [None] * len(self.items)
+        for i, (item, sol, pnt, order) in enumerate(table):
+            if i < len(answers) and answers[i] not in NO_ANSWER:
+                mask = letters_to_mask(answers[i])
+            else:
+                mask = 0
+            scores[item] = self.score(mask, sol, pnt)
+            if order is not None:
+                mask = _permute_mask(mask, order)
+            resp[item] = mask
+        rtn.students.append(student)
+        rtn.versions.append(version)
+        rtn.responses.append(resp)
+        rtn.scores.append(scores)
+
+    def grade(self, responses: Union[str, Path, TextIO]) -> ItemResponses:
+        """grades a responses csv file with the columns student, version and
+        an answer column for each question (e.g. "A" or "AC")
+
+        The file is read line by line.
+        """
+        if isinstance(responses, (str, Path)):
+            with open(responses, "r", encoding=FILE_ENCODING, newline="") as fl:
+                return self.grade(fl)
+
+        rtn = ItemResponses(self.items)
+        reader = csv.reader(responses, skipinitialspace=True)
+        header = next(reader)
+        if [x.strip().lower() for x in header[:2]] != ["student", "version"]:
+            raise RuntimeError("First columns of responses must be 'student' and 'version'")
+        for row in reader:
+            if len(row) == 0:
+                continue
+            row = [x.strip() for x in row]
+            self.grade_student(rtn, student=row[0], version=row[1],
+                               answers=row[2:])
+        return rtn
+
+
+def _correlation(x: List[float], y: List[float]) -> Optional[float]:
+    n = len(x)
+    if n < 2:
+        return None
+    mx = sum(x) / n
+    my = sum(y) / n
+    sxy = sum((a - mx) * (b - my) for a, b in zip(x, y))
+    sxx = sum((a - mx) ** 2 for a in x)
+    syy = sum((b - my) ** 2 for b in y)
+    if sxx == 0 or syy == 0:
+        return None
+    return sxy / sqrt(sxx * syy)
+
+
+def _variance(x: List[float]) -> float:
+    m = sum(x) / len(x)
+    return sum((a - m) ** 2 for a in x) / len(x)
+
+
+def item_statistics(results: ItemResponses,
+                    grader: Grader) -> Dict[UUID, Dict[str, Any]]:
+    """returns statistics of each item (UUID) across all versions
+
+    n_responses: number of students with this item
+    p_value: mean points divided by the points of the item (difficulty)
+    point_biserial: correlation of item points and the total points of the
+        other items (discrimination)
+    choice_rates: share of students choosing each answer (original answer
+        order)
+    """
+    totals = results.total_scores()
+    rtn = {}
+    for i, u in enumerate(results.items):
+        scores = []
+        rest = []
+        masks = []
+        for resp, sc, tot in zip(results.responses, results.scores, totals):
+            if sc[i] is not None:
+                scores.append(sc[i])
+                rest.append(tot - sc[i])
+                masks.append(resp[i])
+        n = len(scores)
+        if n == 0:
+            continue
+        n_answers = grader.n_answers.get(u, 0)
+        n_answers = max([n_answers, grader.solutions[u].bit_length()] +
+                        [m.bit_length() for m in masks])
+        stats: Dict[str, Any] = {"n_responses": n}
+        points = float(grader.points.get(u, 1))
+        if points > 0:
+            stats["p_value"] = sum(scores) / n / points
+        stats["point_biserial"] = _correlation(scores, rest)
+        stats["choice_rates"] = [sum(1 for m in masks if m & (1 << j)) / n
+                                 for j in range(n_answers)]
+        rtn[u] = stats
+    return rtn
+
+
+def cronbach_alpha(results: ItemResponses) -> Optional[float]:
+    """Cronbach's alpha of the items answered by all students"""
+    items = [i for i in range(len(results.items))
+             if all(sc[i] is not None for sc in results.scores)]
+    k = len(items)
+    if k < 2 or results.n_students < 2:
+        return None
+    item_var = sum(_variance([sc[i] for sc in results.scores]) for i in items)
+    total_var = _variance([sum(sc[i] for i in items) for sc in results.scores])
+    if total_var == 0:
+        return None
+    return k / (k - 1) * (1 - item_var / total_var)
+
+
+def store_item_statistics(db: QuestionDB,
+                          stats: Dict[UUID, Dict[str, Any]],
+                          decimals: int = 3) -> int:
+    """writes the item statistics into the additional info of the questions
+    (e.g. `[p_value]: 0.71`). Save the database afterwards.
+
+    returns the number of updated questions
+    """
+    cnt = 0
+    for u, st in stats.items():
+        q = db.get_question(u)
+        if q is None:
+            continue
+        info = dict(q.additional_info)
+        for key, val in st.items():
+            if val is None:
+                info.pop(key, None)
+            elif isinstance(val, list):
+                info[key] = " ".join(number_to_string(round(x, decimals))
+                                     for x in val)
+            elif isinstance(val, float):
+                info[key] = round(val, decimals)
+            else:
+                info[key] = val
+        q.additional_info = info
+        cnt += 1
+    return cnt
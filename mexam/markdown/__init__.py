@@ -1,5 +1,11 @@
 
 from .settings import MarkdownSettings
 from .convert import question_to_markdown, database_to_markdown
-from .load import load_database, parse
-from .save import save_database_file, save_database_folder, save_markdown_file
+from .load import (VERIFY_BATCH, VERIFY_LAZY, VERIFY_OFF, iter_questions,
+                   load_database, parse, verify_database_hashes)
+from .journal import EditJournal
+from .lazy import LazyQuestion, load_database_lazy
+from .patch import patch_database
+from .sqlite_index import SQLiteIndex
+from .save import (compact_journal, save_database_file, save_database_folder,
+                   save_exam_versions, save_markdown_file)
@@ -0,0 +1,182 @@
+"""on-disk cache of parsed markdown files"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .. import __version__
+from ..misc import FILE_ENCODING
+from ..question import TBilingualQuestion, TQuestion
+from .md_lib import MDQuestion, MDQuestionHeader, make_question
+
+CACHE_FOLDER = ".mexam_cache"
+CACHE_SUFFIX = ".json"
+CACHE_FORMAT = 7  # increase, if the cached data changes
+
+# kinds of cached data
+PARSED = "parsed"  # questions, see ParsedFile
+HEADERS = "headers"  # question headers, see `lazy.index_file`
+
+# placeholder for the topic at the beginning of a file, which is defined by
+# the previous files (see `ParsedFile.resolve`)
+START_TOPIC = "\x00start topic\x00"
+
+
+def make_cache_folder(folder: Path) -> None:
+    """creates the cache folder with a `.gitignore` file that excludes the
+    folder from version control"""
+    folder.mkdir(exist_ok=True)
+    ignore = folder.joinpath(".gitignore")
+    if not ignore.exists():
+        ignore.write_text("# created by mexam\n*\n", encoding=FILE_ENCODING)
+
+
+class ParsedFile(object):
+    """parse results of a single markdown file
+
+    The results do not depend on the previous files: Questions at the
+    beginning of the file without topic have the topic START_TOPIC and
+    untitled questions are numbered from 1. Use `resolve()` to apply the
+    topic and the number of untitled questions of the previous files.
+    """
+
+    def __init__(self,
+                 questions: List[TQuestion],
+                 ignored_content: str,
+                 end_topic: str,
+                 untitled: Optional[List[Tuple[int, int]]] = None,
+                 n_untitled: int = 0):
+        """untitled: index and number of all untitled questions
+        n_untitled: number of untitled question headers"""
+        self.questions = questions
+        self.ignored_content = ignored_content
+        self.end_topic = end_topic
+        self.untitled = [] if untitled is None else untitled
+        self.n_untitled = n_untitled
+
+    def to_data(self, records: List[list]) -> Dict[str, Any]:
+        """plain data for the cache
+
+        records: plain data of the questions (see `_MDParser`)
+        """
+        return {"questions": records,
+                "ignored_content": self.ignored_content,
+                "end_topic": self.end_topic,
+                "untitled": self.untitled,
+                "n_untitled": self.n_untitled}
+
+    @staticmethod
+    def from_data(data: Dict[str, Any]) -> "ParsedFile":
+        quests = []
+        for header, alt_topic, langs in data["questions"]:
+            quest, _ = make_question(MDQuestionHeader.from_data(header),
+                                     [MDQuestion.from_data(x) for x in langs],
+                                     alt_topic=alt_topic, verify_hash=False)
+            quests.append(quest)
+        return ParsedFile(questions=quests,
+                          ignored_content=data["ignored_content"],
+                          end_topic=data["end_topic"],
+                          untitled=[tuple(x) for x in data["untitled"]],
+                          n_untitled=data["n_untitled"])
+
+    def resolve(self, start_topic: str, untitled_offset: int = 0) -> None:
+        """sets the topic at the beginning of the file and numbers the
+        untitled questions after those of the previous files"""
+        for x in self.questions:
+            if x.topic == START_TOPIC:
+                for y in _with_languages(x):
+                    y.topic = start_topic
+        self.ignored_content = self.ignored_content.replace(START_TOPIC,
+                                                            start_topic)
+        if self.end_topic == START_TOPIC:
+            self.end_topic = start_topic
+        if untitled_offset != 0:
+            for i, n in self.untitled:
+                for y in _with_languages(self.questions[i]):
+                    y.title = MDQuestionHeader.untitled_title(untitled_offset + n)
+
+
+def _with_languages(quest: TQuestion) -> List[TQuestion]:
+    if isinstance(quest, TBilingualQuestion):
+        return [quest, quest.L1, quest.L2]
+    return [quest]
+
+
+class ParseCache(object):
+    """Cache of parsed markdown files in the folder `.mexam_cache`
+
+    Each markdown file has its own JSON cache file per kind of data (e.g.
+    parsed questions or only question headers). A cache entry is valid, if
+    path, modification time and size of the markdown file are unchanged. If
+    only the modification time differs, the content hash decides.
+
+    The cache contains only plain data (no pickles), since cache files in
+    shared database folders can't be trusted.
+    """
+
+    def __init__(self, folder: Path, kind: str = PARSED):
+        self.folder = Path(folder)
+        self.kind = kind
+
+    @staticmethod
+    def for_database(path: Path, kind: str = PARSED) -> "ParseCache":
+        """cache for a database folder or a database file"""
+        path = Path(path)
+        if path.is_file():
+            path = path.parent
+        return ParseCache(path.joinpath(CACHE_FOLDER), kind=kind)
+
+    def _cache_file(self, md_file: Path) -> Path:
+        return self.folder.joinpath(f"{md_file.name}.{self.kind}{CACHE_SUFFIX}")
+
+    def _load_entry(self, md_file: Path) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._cache_file(md_file), "r", encoding=FILE_ENCODING) as fl:
+                entry = json.load(fl)
+        except (OSError, ValueError):  # missing or incomplete cache file
+            return None
+        if not isinstance(entry, dict) or \
+                entry.get("version") != __version__ or \
+                entry.get("format") != CACHE_FORMAT or \
+                entry.get("path") != str(md_file.absolute()):
+            return None
+        return entry
+
+    def _save_entry(self, md_file: Path, entry: Dict[str, Any]) -> None:
+        try:
+            make_cache_folder(self.folder)
+            with open(self._cache_file(md_file), "w", encoding=FILE_ENCODING) as fl:
+                json.dump(entry, fl, separators=(",", ":"))
+        except OSError:
+            pass  # read-only database, work without cache
+
+    def get(self, md_file: Path,
+            content_hash: Optional[str] = None) -> Optional[Any]:
+        """returns the cached data or None, if the file has changed
+
+        Without content hash, only modification time and size are compared.
+        """
+        entry = self._load_entry(md_file)
+        if entry is None:
+            return None
+        stat = md_file.stat()
+        if entry["size"] != stat.st_size:
+            return None
+        if entry["mtime_ns"] != stat.st_mtime_ns:
+            if content_hash is None or entry["hash"] != content_hash:
+                return None
+            # unchanged content, avoid hashing the file again next time
+            entry["mtime_ns"] = stat.st_mtime_ns
+            self._save_entry(md_file, entry)
+        return entry["data"]
+
+    def put(self, md_file: Path, content_hash: str, data: Any) -> None:
+        """stores plain data (e.g. lists, dicts and strings)"""
+        stat = md_file.stat()
+        self._save_entry(md_file, {"version": __version__,
+                                   "format": CACHE_FORMAT,
+                                   "path": str(md_file.absolute()),
+                                   "mtime_ns": stat.st_mtime_ns,
+                                   "size": stat.st_size,
+                                   "hash": content_hash,
+                                   "data": data})
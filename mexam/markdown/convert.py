@@ -1,9 +1,9 @@
-from copy import deepcopy
-from typing import OrderedDict
+from typing import Optional, OrderedDict, Set
 
 from .. import question as q
 from ..exam import Exam
 from ..question_db import QuestionDB
+from .lazy import LazyQuestion
 from .md_lib import MDQuestionHeader, MDTopic
 
 
@@ -23,16 +23,25 @@ def _to_markdown(quest: q.TOneLangQuestion, question_label: bool, short_hash: bo
 def question_to_markdown(quest: q.TQuestion,
                      question_label: bool = False,
                      short_hash: bool = True,
-                     quest_info: bool = True) -> str:
+                     quest_info: bool = True,
+                     add_topic: bool = True) -> str:
     """Convert question to markdown"""
     if quest_info:
         info = quest.get_info_dict(add_title=False, add_selected=False,
                                    add_uuid=True, add_collection=True)
+        if not add_topic:
+            info.pop("topic")
     else:
         info = {}
     rtn = MDQuestionHeader(title=quest.title,
                            selected=quest.selected,
                            info=info).markdown()
+    if isinstance(quest, LazyQuestion):
+        if short_hash and not question_label and not quest.body_modified:
+            # unchanged body
+            return rtn + quest.body_markdown()
+        quest = quest.materialize()
+
     if isinstance(quest, q.TBilingualQuestion):
         return rtn + _to_markdown(quest.L1, question_label=question_label, short_hash=short_hash) + \
             "\n" + _to_markdown(quest.L2, question_label=question_label, short_hash=short_hash)
@@ -46,14 +55,19 @@ def database_to_md_dict(db: QuestionDB,
                          question_label: bool,
                          short_hash: bool,
                          quest_info: bool,
-                         selected_only: bool) -> OrderedDict:
+                         selected_only: bool,
+                         topics: Optional[Set[str]] = None) -> OrderedDict:
     """separate mds pre topic
+
+    If `topics` is defined, only these topics are converted.
     """
     curr = None
     topic_mds = OrderedDict()
     for q in db.questions:
         if selected_only and not q.selected:
             continue
+        if topics is not None and q.topic not in topics:
+            continue
         if curr != q.topic:
             # new topic
             curr = q.topic
@@ -61,13 +75,10 @@ def database_to_md_dict(db: QuestionDB,
             if topic_headings:
                 topic_mds[curr] += MDTopic(curr).markdown()
 
-        if topic_headings:
-            q = deepcopy(q)
-            q.topic = ""
-
         topic_mds[curr] += question_to_markdown(q, question_label=question_label,
                                                 short_hash=short_hash,
-                                                quest_info=quest_info) + "\n\n"
+                                                quest_info=quest_info,
+                                                add_topic=not topic_headings) + "\n\n"
 
     return topic_mds
 
@@ -0,0 +1,140 @@
+"""append-only journal of selection and collection edits
+
+Instead of rewriting the markdown files after each edit, the edits can be
+appended to a journal file beside the database. The journal is replayed
+after loading the database and compacted into the markdown files on demand
+or if it becomes too large (see `compact_journal`).
+"""
+
+import os
+from pathlib import Path
+from typing import Iterable, List, Tuple, Union
+from uuid import UUID
+
+from ..misc import FILE_ENCODING
+from ..question_db import QuestionDB
+
+JOURNAL_FILE = ".mexam_journal"  # in database folders
+JOURNAL_SUFFIX = ".journal"  # for database files
+COMPACT_SIZE = 64 * 1024  # bytes
+
+# operations
+SELECT = "select"  # argument: UUID
+STORE_COLLECTION = "store"  # argument: collection
+REMOVE_COLLECTION = "remove"  # argument: collection
+UNSELECT_ALL = "unselect"
+
+TEntry = Tuple[str, str]  # operation, argument
+
+
+class EditJournal(object):
+    """Journal file with one edit per line: operation and argument
+    separated by a tab
+
+    Lines are only appended. An incomplete last line (e.g. interrupted
+    write) is ignored.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+
+    @staticmethod
+    def for_database(path: Union[str, Path]) -> "EditJournal":
+        """journal of a database folder or a database file"""
+        path = Path(path)
+        if path.is_file():
+            return EditJournal(path.with_suffix(path.suffix + JOURNAL_SUFFIX))
+        return EditJournal(path.joinpath(JOURNAL_FILE))
+
+    @property
+    def size(self) -> int:
+        """size of the journal file in bytes (0, if no journal exists)"""
+        try:
+            return self.path.stat().st_size
+        except OSError:
+            return 0
+
+    @property
+    def needs_compaction(self) -> bool:
+        return self.size > COMPACT_SIZE
+
+    def append(self, entries: Iterable[TEntry]) -> None:
+        lines = []
+        for op, arg in entries:
+            if op not in (SELECT, STORE_COLLECTION, REMOVE_COLLECTION,
+                          UNSELECT_ALL):
+                raise ValueError(f"Unknown journal operation: {op}")
+            if "\t" in arg or "\n" in arg:
+                raise ValueError(f"Incorrect journal argument: {arg!r}")
+            lines.append(f"{op}\t{arg}\n")
+        if len(lines) == 0:
+            return
+        self._remove_incomplete_line()
+        with open(self.path, "a", encoding=FILE_ENCODING) as fl:
+            fl.write("".join(lines))
+            fl.flush()
+            os.fsync(fl.fileno())
+
+    def _remove_incomplete_line(self):
+        try:
+            with open(self.path, "rb+") as fl:
+                content = fl.read()
+                if len(content) > 0 and not content.endswith(b"\n"):
+                    fl.truncate(content.rfind(b"\n") + 1)
+        except FileNotFoundError:
+            pass
+
+    def entries(self) -> List[TEntry]:
+        try:
+            with open(self.path, "r", encoding=FILE_ENCODING, newline="\n") as fl:
+                content = fl.read()
+        except FileNotFoundError:
+            return []
+        return parse_entries(content)
+
+    def replay(self, db: QuestionDB) -> int:
+        """applies all edits of the journal to the database
+
+        returns the number of edits
+        """
+        entries = self.entries()
+        for op, arg in entries:
+            apply_edit(db, op, arg)
+        return len(entries)
+
+    def remove(self) -> None:
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def parse_entries(content: str) -> List[TEntry]:
+    """returns the entries of the journal content. An incomplete last line
+    is ignored."""
+    rtn = []
+    for line in content.split("\n")[:-1]:  # last line is empty or incomplete
+        op, _, arg = line.rstrip("\r").partition("\t")
+        rtn.append((op, arg))
+    return rtn
+
+
+def apply_edit(db: QuestionDB, op: str, arg: str) -> None:
+    if op == SELECT:
+        # all questions with the UUID, like QuestionDB.add_selection_uuid
+        try:
+            quests = db.get_questions(UUID(arg))
+        except ValueError:
+            quests = []
+        if len(quests) == 0:
+            print(f"* journal: can't find UUID '{arg}'")
+        for x in quests:
+            x.selected = True
+    elif op == STORE_COLLECTION:
+        db.store_collection(arg)
+    elif op == REMOVE_COLLECTION:
+        db.remove_collection(arg)
+    elif op == UNSELECT_ALL:
+        db.unselect_all()
+    else:
+        print(f"* journal: unknown operation '{op}'")
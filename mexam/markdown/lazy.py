@@ -0,0 +1,351 @@
+"""lazy loading of markdown databases
+
+Only the question headers (title, selection mark and info) are parsed. The
+question body is read and parsed on first access.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from hashlib import md5
+from itertools import repeat
+from pathlib import Path
+from typing import Dict, Hashable, List, Optional, Tuple, Union
+
+from .. import question as q
+from ..exam import ExamSettings
+from ..misc import FILE_ENCODING
+from ..question_db import QuestionDB
+from .cache import HEADERS, START_TOPIC, ParseCache, ParsedFile
+from .journal import EditJournal
+from .load import (VERIFY_BATCH, VERIFY_LAZY, VERIFY_OFF, _database_files,
+                   _ignored_content, _language_versions, _mark_saved,
+                   _MDParser, _verify)
+from .md_lib import MDQuestion, MDQuestionHeader, MDTopic, is_question
+
+TSpan = Tuple[int, int]  # byte offsets (start, end)
+
+
+class SourceFile(object):
+    """markdown file of lazy loaded questions"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        stat = self.path.stat()
+        self._stat = (stat.st_mtime_ns, stat.st_size)
+        self._content: Optional[bytes] = None
+
+    def __deepcopy__(self, memo):
+        return self # copies of questions share the source file
+
+    def content(self) -> bytes:
+        """returns the content of the file
+
+        Raises an RuntimeError if the file has been modified after loading.
+        """
+        if self._content is None:
+            stat = self.path.stat()
+            if (stat.st_mtime_ns, stat.st_size) != self._stat:
+                raise RuntimeError(f"{self.path} has been modified after loading")
+            self._content = self.path.read_bytes()
+        return self._content
+
+    def read(self, span: TSpan) -> str:
+        """returns the text between the byte offsets"""
+        return self.content()[span[0]:span[1]].decode(FILE_ENCODING)
+
+
+class LazyQuestion(q.TQuestion):
+    """Question with loaded header. The body is loaded on first access.
+
+    Use `materialize()` to get the complete question (MCQuestion,
+    OpenQuestion or a bilingual question).
+    """
+
+    def __init__(self,
+                 header: MDQuestionHeader,
+                 alt_topic: str,
+                 source: SourceFile,
+                 span: TSpan,
+                 header_line: TSpan,
+                 info_lines: List[Tuple[str, TSpan]]):
+        props, info = header.split_info()
+        if props["topic"] is None:
+            props["topic"] = alt_topic
+        super().__init__(title=header.title,
+                         selected=header.selected,
+                         additional_info=info,
+                         **props)
+        self.alt_topic = alt_topic
+        self.untitled = header.untitled
+        self.source = source
+        self.span = span
+        self.header_line = header_line
+        self.info_lines = info_lines
+        self._question: Optional[q.TQuestion] = None
+        self._loaded_version: Hashable = None
+
+    @property
+    def content_version(self) -> Hashable:
+        if self.body_modified:
+            return (self._content_version, self._question.content_version) # type: ignore
+        return self._content_version
+
+    @property
+    def body_modified(self) -> bool:
+        """True, if the content of the loaded question has been changed"""
+        return self._question is not None and \
+            self._question.content_version != self._loaded_version
+
+    def materialize(self) -> q.TQuestion:
+        """returns the complete question with the current header properties"""
+        if self._question is None:
+            parser = _MDParser(topic=self.alt_topic, verify_hashes=False)
+            quests = list(parser.iter_parse(self.source.read(self.span).splitlines()))
+            if len(quests) != 1:
+                raise RuntimeError(f"Can't load question '{self.title}' "
+                                   f"from {self.source.path}")
+            self._question = quests[0]
+            self._loaded_version = self._question.content_version
+            if self.check_source_hash:
+                for x in _language_versions([self._question]):
+                    x.check_source_hash = x.source_hash is not None
+
+        rtn = self._question
+        if isinstance(rtn, q.TBilingualQuestion):
+            quests = [rtn, rtn.L1, rtn.L2]
+        else:
+            quests = [rtn]
+        for x in quests:
+            x.title = self.title
+            x.topic = self.topic
+            x.taxonomy = self.taxonomy
+            x.points = self.points
+            x.selected = self.selected
+            x.uuid = self.uuid
+            x.collection = set(self.collection)
+            x.additional_info = dict(self.additional_info)
+        return rtn
+
+    def body_markdown(self) -> str:
+        """returns the unparsed markdown of the question body, that is, the
+        question without header line and info lines"""
+        skip = [self.header_line] + [span for _, span in self.info_lines]
+        skip.sort()
+        txt = ""
+        p = self.span[0]
+        for a, b in skip:
+            txt += self.source.read((p, a))
+            p = b
+        txt += self.source.read((p, self.span[1]))
+        return txt.strip() + "\n"
+
+    @property
+    def short_hash(self) -> str:
+        return self.materialize().short_hash
+
+    def to_text(self) -> str:
+        return self.materialize().to_text()
+
+
+def index_file(path: Path,
+               start_topic: str = "",
+               untitled_offset: int = 0) -> Tuple[List[LazyQuestion], str, str, int]:
+    """reads the headers of all questions in a markdown file
+
+    Untitled questions are numbered from `untitled_offset` + 1.
+
+    returns lazy questions, ignored content, the last topic and the number of
+    untitled questions
+    """
+    rtn = _index_file(Path(path), parse_cache=None)
+    _resolve(rtn, start_topic=start_topic, untitled_offset=untitled_offset)
+    return rtn.questions, rtn.ignored_content, rtn.end_topic, rtn.n_untitled # type: ignore
+
+
+def _resolve(indexed: ParsedFile, start_topic: str, untitled_offset: int):
+    indexed.resolve(start_topic=start_topic, untitled_offset=untitled_offset)
+    for x in indexed.questions:
+        if x.alt_topic == START_TOPIC: # type: ignore
+            x.alt_topic = start_topic # type: ignore
+
+
+def _index_file(path: Path, parse_cache: Optional[ParseCache]) -> ParsedFile:
+    """reads the headers of all questions independently of the previous
+    files (see `ParsedFile.resolve`)"""
+
+    if parse_cache is not None:
+        data = parse_cache.get(path)
+        if data is None:
+            data = parse_cache.get(path, content_hash=md5(path.read_bytes()).hexdigest())
+        if data is not None:
+            return _from_data(data, SourceFile(path))
+
+    data, content_hash = _index_data(path)
+    if parse_cache is not None:
+        parse_cache.put(path, content_hash=content_hash, data=data)
+    return _from_data(data, SourceFile(path))
+
+
+def _index_data(path: Path) -> Tuple[Dict, str]:
+    """returns the plain data of the question headers (see
+    `ParsedFile.to_data`) and the md5 hash of the file content
+
+    Each question is stored as list of header data, topic, span, header
+    line, info lines and the short hashes stated in its language lines.
+    """
+    records: List[list] = []
+    untitled: List[Tuple[int, int]] = []
+    ignored: Dict[str, str] = {}
+    topic = START_TOPIC
+    n_untitled = 0
+
+    header: Optional[MDQuestionHeader] = None
+    header_line: TSpan = (0, 0)
+    info_lines: List[Tuple[str, TSpan]] = []
+    hashes: List[str] = []
+    # languages and types (MC or open question) of the language versions
+    languages: List[str] = []
+    is_mc: List[bool] = []
+
+    def add_question(end: int):
+        if header is not None and is_question(languages, is_mc):
+            if header.untitled:
+                untitled.append((len(records), n_untitled))
+            records.append([header.to_data(), topic, (header_line[0], end),
+                            header_line, info_lines, hashes])
+
+    content_hash = md5()
+    pos = 0
+    with open(path, "rb") as fl:
+        for raw in fl:
+            content_hash.update(raw)
+            start, pos = pos, pos + len(raw)
+            first = raw.lstrip()[:2]
+            if first[:1] == b"#":
+                ln = raw.decode(FILE_ENCODING).rstrip()
+                x = MDTopic.create(ln)
+                if x is not None:
+                    # new topic
+                    add_question(end=start)
+                    header = None
+                    topic = x.topic
+                    continue
+                x = MDQuestionHeader.create(ln, untitled_number=n_untitled + 1)
+                if x is not None:
+                    # new question
+                    add_question(end=start)
+                    if x.untitled:
+                        n_untitled += 1
+                    header = x
+                    header_line = (start, pos)
+                    info_lines = []
+                    hashes = []
+                    languages = []
+                    is_mc = []
+                    continue
+
+            if header is None:
+                ln = raw.decode(FILE_ENCODING).rstrip()
+                if topic in ignored:
+                    ignored[topic] += ln + "\n"
+                else:
+                    ignored[topic] = ln + "\n"
+            elif first[:1] == b"[":
+                key = header.parse_info(raw.decode(FILE_ENCODING).rstrip())
+                if key is not None:
+                    info_lines.append((key, (start, pos)))
+            elif first == b"**":
+                m = MDQuestion.RE_QUEST_LANG.match(raw.decode(FILE_ENCODING).rstrip())
+                if m is not None:
+                    languages.append(m.group(1))
+                    is_mc.append(False)
+                    if len(m.group(2)) > 0:
+                        hashes.append(m.group(2))
+            elif first[:1] == b"-" and len(is_mc) > 0 and not is_mc[-1]:
+                is_mc[-1] = MDQuestion.RE_ANSWER.match(
+                    raw.decode(FILE_ENCODING).rstrip()) is not None
+
+        add_question(end=pos)
+
+    data = {"questions": records,
+            "ignored_content": _ignored_content(ignored),
+            "end_topic": topic,
+            "untitled": untitled,
+            "n_untitled": n_untitled}
+    return data, content_hash.hexdigest()
+
+
+def _lazy_question(record: list, source: SourceFile) -> LazyQuestion:
+    """lazy question of the plain data of the question header (see
+    `_index_file`)"""
+    header, alt_topic, span, header_line, info_lines = record[:5]
+    return LazyQuestion(header=MDQuestionHeader.from_data(header),
+                        alt_topic=alt_topic,
+                        source=source,
+                        span=tuple(span),
+                        header_line=tuple(header_line),
+                        info_lines=[(k, tuple(x)) for k, x in info_lines])
+
+
+def _from_data(data: Dict, source: SourceFile) -> ParsedFile:
+    return ParsedFile(questions=[_lazy_question(x, source) for x in data["questions"]],
+                      ignored_content=data["ignored_content"],
+                      end_topic=data["end_topic"],
+                      untitled=[tuple(x) for x in data["untitled"]],
+                      n_untitled=data["n_untitled"])
+
+
+def load_database_lazy(path_or_setings: Union[str, Path, ExamSettings],
+                       suffix: Optional[str] = None,
+                       journal: bool = True,
+                       cache: bool = False,
+                       processes: Optional[int] = 1,
+                       verify_hashes: str = VERIFY_LAZY) -> QuestionDB:
+    """loads only the headers of all questions (title, selection mark and
+    info) of a markdown database
+
+    The database contains `LazyQuestion`s, which are sufficient to select
+    questions, edit collections and save the database. The question body is
+    loaded when needed. The source files must not be changed before that.
+    With `journal`, the edits of the journal of the database are replayed.
+
+    With `cache`, the headers are stored in the folder `.mexam_cache`. If
+    `processes` > 1, files are indexed in parallel (`None`: number of CPUs).
+    The hashes are verified as with `load_database`, VERIFY_BATCH loads all
+    questions completely.
+    """
+    if verify_hashes not in (VERIFY_OFF, VERIFY_LAZY, VERIFY_BATCH):
+        raise ValueError(f"Unknown hash verification mode: {verify_hashes}")
+
+    path, files = _database_files(path_or_setings, suffix=suffix)
+    if cache:
+        parse_cache = ParseCache.for_database(path, kind=HEADERS)
+    else:
+        parse_cache = None
+    if processes == 1 or len(files) < 2:
+        indexed = [_index_file(fl, parse_cache=parse_cache) for fl in files]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            indexed = list(pool.map(_index_file, files, repeat(parse_cache)))
+
+    db = QuestionDB()
+    quests: List[q.TQuestion] = []
+    topic = ""
+    n_untitled = 0
+    for x in indexed:
+        _resolve(x, start_topic=topic, untitled_offset=n_untitled)
+        topic = x.end_topic
+        n_untitled += x.n_untitled
+        quests.extend(x.questions)
+        db.ignored_content += x.ignored_content
+    db.add_questions(quests)
+    _mark_saved(db, path, suffix,
+                [(fl, x.questions) for fl, x in zip(files, indexed)])
+    if journal:
+        EditJournal.for_database(path).replay(db)
+
+    if verify_hashes == VERIFY_LAZY:
+        for x in db.questions:
+            x.check_source_hash = True
+    else:
+        _verify(db, verify_hashes)
+    return db
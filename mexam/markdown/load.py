@@ -1,19 +1,146 @@
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from itertools import repeat
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 from .. import question as q
 from ..exam import ExamSettings
-from ..misc import FILE_ENCODING, all_files
+from ..misc import FILE_ENCODING, all_files, long_hash
 from ..question_db import QuestionDB
-from .md_lib import MDQuestion, MDQuestionHeader, MDTopic
+from .cache import START_TOPIC, ParseCache, ParsedFile
+from .journal import EditJournal
+from .md_lib import MDQuestion, MDQuestionHeader, MDTopic, make_question
 from .settings import MarkdownSettings
 
 SUFFIX = ".md"
 
+# verification of hashes in markdown files
+VERIFY_OFF = "off"
+VERIFY_LAZY = "lazy"  # on first access of the question hash
+VERIFY_BATCH = "batch"  # all hashes after loading
+
 
 def load_database(path_or_setings: Union[str, Path, ExamSettings],
-                  suffix: Optional[str] = None) -> QuestionDB:
+                  suffix: Optional[str] = None,
+                  cache: bool = False,
+                  processes: Optional[int] = 1,
+                  verify_hashes: str = VERIFY_BATCH,
+                  journal: bool = True) -> QuestionDB:
+    """loads a markdown database from a folder or a single file
+
+    Each file is parsed separately, the topic carries over to the next file
+    and untitled questions are numbered across all files.
+    With `cache`, parse results are stored in the folder `.mexam_cache` and
+    only modified files are parsed again.
+
+    If `processes` > 1, files are parsed in parallel by a pool of worker
+    processes (`None`: number of CPUs). The result is identical to serial
+    parsing.
+
+    The hashes of the questions are compared with the hashes in the markdown
+    files directly after loading (VERIFY_BATCH), when the hash of a question
+    is needed (VERIFY_LAZY) or never (VERIFY_OFF).
+
+    With `journal`, the edits of the journal of the database are replayed
+    (see `EditJournal`).
+    """
+    if verify_hashes not in (VERIFY_OFF, VERIFY_LAZY, VERIFY_BATCH):
+        raise ValueError(f"Unknown hash verification mode: {verify_hashes}")
+
+    path, files = _database_files(path_or_setings, suffix=suffix)
+    if cache:
+        parse_cache = ParseCache.for_database(path)
+    else:
+        parse_cache = None
+
+    if processes == 1 or len(files) < 2:
+        parsed_files = [_parse_file(fl, parse_cache=parse_cache) for fl in files]
+    else:
+        parsed_files = _parse_files_parallel(files, parse_cache=parse_cache,
+                                             processes=processes)
+    _resolve(parsed_files)
+
+    db = QuestionDB()
+    quests: List[q.TQuestion] = []
+    for parsed in parsed_files:
+        quests.extend(parsed.questions)
+        db.ignored_content += parsed.ignored_content
+    db.add_questions(quests)
+    _mark_saved(db, path, suffix,
+                [(fl, x.questions) for fl, x in zip(files, parsed_files)])
+    if journal:
+        EditJournal.for_database(path).replay(db)
+
+    _verify(db, verify_hashes)
+    return db
+
+
+def _language_versions(questions: Iterable[q.TQuestion]) -> Iterator[q.TQuestion]:
+    for x in questions:
+        if isinstance(x, q.TBilingualQuestion):
+            yield x.L1
+            yield x.L2
+        else:
+            yield x
+
+
+def verify_database_hashes(db: QuestionDB) -> List[Tuple[q.TQuestion, str]]:
+    """compares the hashes of all questions with the hashes stated in the
+    markdown files (`source_hash`)
+
+    Returns a list with all questions (language versions) with inconsistent
+    hash and their actual hash. Lazy loaded questions are loaded completely.
+    """
+    # Hashing is cheap compared to parsing (about 5 ms per 1000 questions),
+    # sending the questions to worker processes costs more than it saves.
+    rtn = []
+    for x in _language_versions(y.materialize() for y in db.questions):
+        if x.source_hash is not None:
+            h = x.short_hash
+            if x.source_hash != h:
+                rtn.append((x, h))
+    return rtn
+
+
+def _verify(db: QuestionDB, verify_hashes: str) -> None:
+    """verifies the hashes of the loaded database (see `load_database`)"""
+    if verify_hashes == VERIFY_LAZY:
+        for x in _language_versions(db.questions):
+            x.check_source_hash = x.source_hash is not None
+    elif verify_hashes == VERIFY_BATCH:
+        mismatches = verify_database_hashes(db)
+        for x, h in mismatches:
+            print(f"* not fitting hash: {x.source_hash} -> {h} ({x.title})")
+        if len(mismatches) > 0:
+            print("*** Hash issues detected. Please rewrite the database. ***\n")
+
+
+def topic_file_name(topic: str) -> str:
+    """name of the markdown file of a topic in a database folder"""
+    return topic.lower().replace(" ", "_") + SUFFIX
+
+
+def _mark_saved(db: QuestionDB, path: Path, suffix: Optional[str],
+                file_questions: List[Tuple[Path, List[q.TQuestion]]]) -> None:
+    """marks all questions as saved. The folder is remembered for
+    incremental saving, if each file contains exactly the questions of one
+    topic and is named like the files of `save_database_folder`."""
+    folder = None
+    if path.is_dir() and suffix in (None, SUFFIX) and \
+            len(db.ignored_content) == 0:
+        folder = path.absolute()
+        for fl, quests in file_questions:
+            topics = {x.topic for x in quests}
+            if len(topics) != 1 or fl.name != topic_file_name(topics.pop()):
+                folder = None
+                break
+    db.mark_saved(folder)
+
+
+def _database_files(path_or_setings: Union[str, Path, ExamSettings],
+                    suffix: Optional[str] = None) -> Tuple[Path, List[Path]]:
+    """returns database path and all markdown files"""
     if suffix is None:
         suffix = SUFFIX
 
@@ -34,28 +161,34 @@ def load_database(path_or_setings: Union[str, Path, ExamSettings],
         print(f"Can't find file or folder: {path} (suffix={suffix})")
         exit(1)
 
-    lines = []
-    for fl in files:
-        with open(fl, "r", encoding=FILE_ENCODING) as f:
-            lines.extend(f.readlines())
-
-    db, hash_issue_detected = parse(lines)
-
-    if hash_issue_detected:
-        print("*** Hash issues detected. Please rewrite the database. ***\n")
-
-    return db
+    return path, files
 
 
 class _MDParser(object):
 
-    def __init__(self) -> None:
-        self._topic = ""
+    def __init__(self, topic: str = "", verify_hashes: bool = True,
+                 untitled_offset: int = 0, record: bool = False) -> None:
+        """Untitled questions are numbered from untitled_offset + 1.
+        If record, the plain data of all questions is kept in `records`
+        (see `ParsedFile.from_data`)."""
+        self._topic = topic
+        self._verify_hashes = verify_hashes
         self._quest_header = None
         # question in different languages
         self._quest_langs: List[MDQuestion] = []
         self.hash_issue_detected = False
+        self._untitled_offset = untitled_offset
+        self.n_untitled = 0  # untitled question headers
+        self.n_questions = 0  # yielded questions
+        # index and number (without offset) of the untitled questions
+        self.untitled: List[Tuple[int, int]] = []
+        self.records: Optional[List[list]] = [] if record else None
+        self._ignored: Dict[str, str] = {}
 
+    @property
+    def topic(self) -> str:
+        """current topic"""
+        return self._topic
 
     def _set_quest_header(self, x: Optional[MDQuestionHeader]):
         self._quest_header = x
@@ -70,86 +203,217 @@ class _MDParser(object):
     def _make_mexam_question(self) -> Union[None, q.TQuestion]:
 
         if self.question_in_cache:
-            langs = []
-            for x in self._quest_langs:
-                quest, inconsistent_hash = x.to_mexam_question(question_header=self._quest_header,  # type: ignore
-                                       alt_topic=self._topic)
-                langs.append(quest)
-                if inconsistent_hash is not None:
-                    print(f"* not fitting hash: {inconsistent_hash} -> {quest.short_hash}")
-                    self.hash_issue_detected = True
-
-            if len(langs) == 1:
-                return langs[0]
-
-            elif len(langs) > 1:
-                if isinstance(langs[0], q.MCQuestion) and isinstance(langs[1], q.MCQuestion):
-                    return q.MCBilingualQuestion(langs[0], langs[1], uuid=langs[1].uuid)
-                elif isinstance(langs[0], q.OpenQuestion) and isinstance(langs[1], q.OpenQuestion):
-                    return q.BilingualOpenQuestion(langs[0], langs[1], uuid=langs[1].uuid)
-
-
-    def parse(self, lines: Union[str, List[str]]) -> Tuple[QuestionDB, bool]:
-        rtn = QuestionDB()
-        ignored: Dict[str, str] = {}
-        self.hash_issue_detected = False
-
-        if isinstance(lines, str):
-            lines = lines.splitlines()
-
+            rtn, inconsistent = make_question(self._quest_header, # type: ignore
+                                              self._quest_langs,
+                                              alt_topic=self._topic,
+                                              verify_hash=self._verify_hashes)
+            for quest, inconsistent_hash in inconsistent:
+                print(f"* not fitting hash: {inconsistent_hash} -> {quest.short_hash} ({quest.title})")
+                self.hash_issue_detected = True
+
+            if rtn is not None:
+                if self._quest_header.untitled: # type: ignore
+                    self.untitled.append((self.n_questions, self.n_untitled))
+                self.n_questions += 1
+                if self.records is not None:
+                    self.records.append([self._quest_header.to_data(), # type: ignore
+                                         self._topic,
+                                         [x.to_data() for x in self._quest_langs]])
+            return rtn
+
+    def iter_parse(self, lines: Iterable[str]) -> Iterator[q.TQuestion]:
+        """parses lines and yields each question as soon as it is complete
+
+        Text that does not belong to any question is collected and available
+        via `ignored_content` after all lines have been parsed.
+        """
+        self._ignored = {}
         for ln in lines:
+            # classify lines by the first character, to avoid needless regex
             ln = ln.rstrip()
-            x = MDTopic.create(ln)
-            if x is not None:
-                # new topic
-                if self.question_in_cache:
-                    rtn.add_question(self._make_mexam_question())
-                self._set_quest_header(None)
-                self._topic = x.topic
-                continue
-
-            x = MDQuestionHeader.create(ln)
-            if isinstance(x, MDQuestionHeader):
-                # new question
-                if self.question_in_cache:
-                    rtn.add_question(self._make_mexam_question())
-                self._set_quest_header(x)
+            first = ln.lstrip()[:1]
+            if first == "#":
+                x = MDTopic.create(ln)
+                if x is not None:
+                    # new topic
+                    if self.question_in_cache:
+                        quest = self._make_mexam_question()
+                        if quest is not None:
+                            yield quest
+                    self._set_quest_header(None)
+                    self._topic = x.topic
+                    continue
 
-            elif isinstance(self._quest_header, MDQuestionHeader):
-                if self._quest_header.parse_info(ln):
+                x = MDQuestionHeader.create(ln, untitled_number=self._untitled_offset
+                                                 + self.n_untitled + 1)
+                if x is not None:
+                    # new question
+                    if self.question_in_cache:
+                        quest = self._make_mexam_question()
+                        if quest is not None:
+                            yield quest
+                    if x.untitled:
+                        self.n_untitled += 1
+                    self._set_quest_header(x)
                     continue
 
+            if self._quest_header is None:
+                if self._topic in self._ignored:
+                    self._ignored[self._topic] += ln + "\n"
+                else:
+                    self._ignored[self._topic] = ln + "\n"
+                continue
+
+            if first == "[" and self._quest_header.parse_info(ln):
+                continue
+
+            if first == "*":
                 x = MDQuestion.create(ln)
-                if isinstance(x, MDQuestion):
+                if x is not None:
                     # new question lang
                     self._quest_langs.append(x)
                     continue
 
-                if len(self._quest_langs) > 0:
-                    self._quest_langs[-1].parse(ln)
-            else:
-                if self._topic in ignored:
-                    ignored[self._topic] += ln + "\n"
-                else:
-                    ignored[self._topic] = ln + "\n"
-
+            if len(self._quest_langs) > 0:
+                self._quest_langs[-1].parse(ln)
 
         if self.question_in_cache:
-            rtn.add_question(self._make_mexam_question())
+            quest = self._make_mexam_question()
+            if quest is not None:
+                yield quest
+        self._set_quest_header(None)
 
-        # ignored content
-        for topic, txt in ignored.items():
-            txt = txt.strip()
-            if len(txt)>0:
-                rtn.ignored_content += f"[TOPIC {datetime.now()}] {topic}\n"
-                rtn.ignored_content += f"{txt}\n\n"
+    @property
+    def ignored_content(self) -> str:
+        return _ignored_content(self._ignored)
 
+    def parse(self, lines: Union[str, List[str]]) -> Tuple[QuestionDB, bool]:
+        rtn = QuestionDB()
+        self.hash_issue_detected = False
+
+        if isinstance(lines, str):
+            lines = lines.splitlines()
+
+        rtn.add_questions(self.iter_parse(lines))
+        rtn.ignored_content = self.ignored_content
         return rtn, self.hash_issue_detected
 
 
+def _ignored_content(ignored: Dict[str, str]) -> str:
+    """ignored text of all topics with time stamp"""
+    rtn = ""
+    for topic, txt in ignored.items():
+        txt = txt.strip()
+        if len(txt)>0:
+            rtn += f"[TOPIC {datetime.now()}] {topic}\n"
+            rtn += f"{txt}\n\n"
+    return rtn
 
 
 def parse(lines: Union[str, List[str]]) -> Tuple[QuestionDB, bool]:
     # return questionBD and ignored content
     parser = _MDParser()
     return parser.parse(lines)
+
+
+def iter_questions(file_handles: Iterable[Iterable[str]]) -> Iterator[q.TQuestion]:
+    """reads the files line by line and yields each question as soon as it is
+    complete
+
+    Questions are returned in file order and are not sorted by topic. Use this
+    function to process databases in constant memory.
+
+    Example:
+        with open("db.md", encoding=FILE_ENCODING) as fl:
+            n = sum(1 for _ in iter_questions([fl]))
+    """
+    topic = ""
+    n_untitled = 0
+    for fl in file_handles:
+        parser = _MDParser(topic=topic, untitled_offset=n_untitled)
+        yield from parser.iter_parse(fl)
+        topic = parser.topic
+        n_untitled += parser.n_untitled
+
+
+def _parse_files_parallel(files: List[Path],
+                          parse_cache: Optional[ParseCache],
+                          processes: Optional[int]) -> List[ParsedFile]:
+    # use cache if possible
+    rtn: List[Optional[ParsedFile]] = []
+    for fl in files:
+        data = None if parse_cache is None else parse_cache.get(fl)
+        rtn.append(None if data is None else ParsedFile.from_data(data))
+
+    # parse remaining files
+    todo = [i for i, x in enumerate(rtn) if x is None]
+    if len(todo) > 0:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            results = pool.map(_parse_file,
+                               [files[i] for i in todo],
+                               repeat(parse_cache))
+            for i, parsed in zip(todo, results):
+                rtn[i] = parsed
+
+    return rtn # type: ignore
+
+
+def _resolve(parsed_files: List[ParsedFile]) -> None:
+    """applies start topics and untitled numbers of the previous files"""
+    topic = ""
+    n_untitled = 0
+    for parsed in parsed_files:
+        parsed.resolve(start_topic=topic, untitled_offset=n_untitled)
+        topic = parsed.end_topic
+        n_untitled += parsed.n_untitled
+
+
+def parse_file(path: Path,
+               start_topic: str = "",
+               parse_cache: Optional[ParseCache] = None,
+               untitled_offset: int = 0) -> ParsedFile:
+    """parses a single markdown file
+
+    Questions without topic get the `start_topic` and untitled questions
+    are numbered from `untitled_offset` + 1. The hashes are not verified
+    (see `verify_database_hashes`).
+    """
+    rtn = _parse_file(Path(path), parse_cache=parse_cache)
+    rtn.resolve(start_topic=start_topic, untitled_offset=untitled_offset)
+    return rtn
+
+
+def _parse_file(path: Path,
+                parse_cache: Optional[ParseCache]) -> ParsedFile:
+    """parses a single markdown file independently of the previous files
+    (see `ParsedFile.resolve`)
+
+    Hashes are verified after loading, the cached data does therefore not
+    depend on the hash verification mode."""
+    if parse_cache is not None:
+        data = parse_cache.get(path)
+        if data is not None:
+            return ParsedFile.from_data(data)
+
+    with open(path, "r", encoding=FILE_ENCODING) as f:
+        lines = f.readlines()
+
+    if parse_cache is not None:
+        content_hash = long_hash("".join(lines))
+        data = parse_cache.get(path, content_hash=content_hash)
+        if data is not None:
+            return ParsedFile.from_data(data)
+
+    parser = _MDParser(topic=START_TOPIC, verify_hashes=False,
+                       record=parse_cache is not None)
+    # in file order, since untitled questions are identified by their index
+    quests = list(parser.iter_parse(lines))
+    parsed = ParsedFile(questions=quests,
+                        ignored_content=parser.ignored_content,
+                        end_topic=parser.topic,
+                        untitled=parser.untitled,
+                        n_untitled=parser.n_untitled)
+    if parse_cache is not None:
+        parse_cache.put(path, content_hash=content_hash,
+                        data=parsed.to_data(parser.records)) # type: ignore
+    return parsed
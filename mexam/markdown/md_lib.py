@@ -1,8 +1,7 @@
 """database markdown definitions"""
 
 import re
-from copy import deepcopy
-from typing import List, Optional, Tuple, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 from typing_extensions import Self
 
@@ -46,11 +45,18 @@ class MDQuestionHeader(object):
     def __init__(self,
                  title: str,
                  selected: bool,
-                 info: Optional[dict] = None):
-
-        if len(title) == 0:
-            MDQuestionHeader.cnt += 1
-            self.title = f"Question {MDQuestionHeader.cnt}"
+                 info: Optional[dict] = None,
+                 untitled_number: Optional[int] = None):
+        """Questions without title are named "Question <untitled_number>".
+        If untitled_number is not defined, a global counter will be used.
+        """
+
+        self.untitled = len(title) == 0
+        if self.untitled:
+            if untitled_number is None:
+                MDQuestionHeader.cnt += 1
+                untitled_number = MDQuestionHeader.cnt
+            self.title = MDQuestionHeader.untitled_title(untitled_number)
         else:
             self.title = title
         self.selected = selected
@@ -59,6 +65,22 @@ class MDQuestionHeader(object):
         else:
             self.info = info
 
+    @staticmethod
+    def untitled_title(number: int) -> str:
+        return f"Question {number}"
+
+    def to_data(self) -> list:
+        """plain data (e.g. for JSON), see `from_data`"""
+        return [self.title, self.untitled, self.selected,
+                list(self.info.items())]
+
+    @classmethod
+    def from_data(cls, data: list) -> Self:
+        title, untitled, selected, info = data
+        rtn = cls(title=title, selected=selected, info=dict(info))
+        rtn.untitled = untitled
+        return rtn
+
     def __str__(self):
         return self.markdown()
 
@@ -83,7 +105,8 @@ class MDQuestionHeader(object):
         return rtn + "\n"
 
     @classmethod
-    def create(cls, txt: str) -> Optional[Self]:
+    def create(cls, txt: str,
+               untitled_number: Optional[int] = None) -> Optional[Self]:
         m = cls.HEAD.match(txt)
         if m is not None:
             txt = m.groups()[0].strip()
@@ -93,21 +116,40 @@ class MDQuestionHeader(object):
                 x.pop()  # delete SELECT_TAG
             return cls(title=" ".join(x).strip(),
                        selected=selected,
-                       info={})
-
-    def parse_info(self, txt):
+                       info={},
+                       untitled_number=untitled_number)
+
+    def split_info(self) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """returns the question properties (topic, taxonomy, points, uuid,
+        collection) and the remaining additional info
+
+        Undefined properties are None. The header remains unchanged.
+        """
+        info = dict(self.info)
+        props = {k: info.pop(k, None) for k in ("topic", "taxonomy", "points",
+                                                "uuid", "collection")}
+        try:
+            props["points"] = float(props["points"])
+        except (TypeError, ValueError):
+            props["points"] = None
+        return props, info
+
+    def parse_info(self, txt) -> Optional[str]:
+        """parses info line and returns the key or None, if txt is not an
+        info line"""
         m = self.INFO.match(txt)
         if m is not None:
             key, value = m.groups()
             if value is None:
                 value = ""
             self.info[key] = value
-            return True
-        return False
+            return key
+        return None
 
 
 class MDQuestion(object):
-    # TODO FIXED POSITION NOT IMPLEMENTED
+    # Answers have no fixed position, that is, they are shuffled in exam
+    # versions. TODO: markdown syntax for answers with fixed position
 
     RE_ANSWER = re.compile(r"^\s*-\s+(\*X\*)?\s*(.*)")  # "- (*X*) (...)"
     # **NL 56232**, or **EN**
@@ -119,13 +161,19 @@ class MDQuestion(object):
                  text: str = "",
                  answers: Optional[List[q.Answer]] = None):
 
-        self.text = text
+        self._text_lines: List[str] = [text] # joined on demand
         self.language = language
         self.short_hash = short_hash
         if answers is None:
             answers = []
         self.answers: List[q.Answer] = answers
 
+    @property
+    def text(self) -> str:
+        if len(self._text_lines) > 1:
+            self._text_lines = ["".join(self._text_lines)]
+        return self._text_lines[0]
+
     @classmethod
     def create(cls, quest_lang_tag: str) -> Optional[Self]:
         m = cls.RE_QUEST_LANG.match(quest_lang_tag)
@@ -133,13 +181,29 @@ class MDQuestion(object):
             a, b = m.groups()
             return cls(language=a, short_hash=b)
 
+    def to_data(self) -> list:
+        """plain data (e.g. for JSON), see `from_data`"""
+        return [self.language, self.short_hash, self.text,
+                [[a.text, a.is_correct] for a in self.answers]]
+
+    @classmethod
+    def from_data(cls, data: list) -> Self:
+        language, short_hash, text, answers = data
+        return cls(language=language, short_hash=short_hash, text=text,
+                   answers=[q.Answer(text=a, is_correct=c, fixed_position=False)
+                            for a, c in answers])
+
     def parse(self, txt: str):
-        m = self.RE_ANSWER.match(txt)
+        if txt.lstrip()[:1] == "-":
+            m = self.RE_ANSWER.match(txt)
+        else:
+            m = None
         if m is not None:
             correct_tag, txt = m.groups()
             # add answer option
             self.answers.append(q.Answer(text=txt,
-                                         is_correct=isinstance(correct_tag, str)))
+                                         is_correct=isinstance(correct_tag, str),
+                                         fixed_position=False))
         elif len(self.answers) > 0:
             # append to last answer
             add_txt = txt.strip()
@@ -147,35 +211,37 @@ class MDQuestion(object):
                 self.answers[-1].text += " " + add_txt
         else:
             # add to text
-            self.text += f"{txt}\n"
+            self._text_lines.append(txt + "\n")
 
     def to_mexam_question(self,
                       question_header: MDQuestionHeader,
-                      alt_topic="") -> Tuple[Union[q.OpenQuestion,  q.MCQuestion], None | str]:
+                      alt_topic="",
+                      header_info: Optional[Tuple[Dict[str, Any], Dict[str, Any]]] = None,
+                      verify_hash: bool = True
+                      ) -> Tuple[Union[q.OpenQuestion,  q.MCQuestion], None | str]:
         """returns a Mexam Open or MC Question and a string with the
-        inconsistent hash if the hash in the MD file is incorrect"""
-
-        qh = deepcopy(question_header)
-        try:
-            topic = qh.info.pop("topic")
-        except KeyError:
+        inconsistent hash if the hash in the MD file is incorrect
+
+        The hash in the MD file is stored as `source_hash` of the question. If
+        not `verify_hash`, the hash will not be compared.
+
+        The header is not modified. Pass `header_info`, the result of
+        `question_header.split_info()`, to avoid splitting the info for each
+        language. Answers are handed over to the question without copying,
+        the additional info is copied for each language.
+        """
+
+        if header_info is None:
+            header_info = question_header.split_info()
+        props, info = header_info
+        topic = props["topic"]
+        if topic is None:
             topic = alt_topic
-        try:
-            taxonomy = qh.info.pop("taxonomy")
-        except KeyError:
-            taxonomy = None
-        try:
-            points = float(qh.info.pop("points"))
-        except (KeyError, ValueError):
-            points = None
-        try:
-            uuid = qh.info.pop("uuid")
-        except KeyError:
-            uuid = None
-        try:
-            collection = qh.info.pop("collection")
-        except KeyError:
-            collection = None
+        qh = question_header
+        taxonomy = props["taxonomy"]
+        points = props["points"]
+        uuid = props["uuid"]
+        collection = props["collection"]
 
         if len(self.answers) > 0:
             # MC Question
@@ -188,7 +254,7 @@ class MDQuestion(object):
                                uuid=uuid,
                                collection=collection,
                                selected=qh.selected,
-                               additional_info=qh.info)
+                               additional_info=dict(info))
             rtn.answers = self.answers
         else:
             # OpenQuestion
@@ -201,9 +267,60 @@ class MDQuestion(object):
                                  selected=qh.selected,
                                  uuid=uuid,
                                  collection=collection,
-                                 info=qh.info)
+                                 info=dict(info))
 
-        if self.short_hash != rtn.short_hash:
+        rtn.source_hash = self.short_hash
+        if not verify_hash:
+            return rtn, None
+        elif self.short_hash != rtn.short_hash:
             return rtn, self.short_hash
         else:
-            return rtn, None
\ No newline at end of file
+            return rtn, None
+
+def is_question(languages: List[str], is_mc: List[bool]) -> bool:
+    """True, if language versions with these languages and types (MC or
+    open question) make a question (see `make_question`)
+
+    Raises a ValueError for two language versions with identical language.
+    """
+    if len(languages) < 2:
+        return len(languages) == 1
+    if languages[0] == languages[1]:
+        raise ValueError("Two languages of a bilingual question are identical")
+    return is_mc[0] == is_mc[1]
+
+
+def make_question(question_header: MDQuestionHeader,
+                  languages: List[MDQuestion],
+                  alt_topic: str = "",
+                  verify_hash: bool = True
+                  ) -> Tuple[Optional[q.TQuestion], List[Tuple[q.TQuestion, str]]]:
+    """returns the Mexam question of all language versions (bilingual
+    question, if the question has two languages) and the language versions
+    with inconsistent hash in the MD file and that hash
+
+    Returns None, if the language versions don't fit together.
+    """
+    langs = []
+    inconsistent = []
+    header_info = question_header.split_info()
+    for x in languages:
+        quest, inconsistent_hash = x.to_mexam_question(question_header=question_header,
+                                                       alt_topic=alt_topic,
+                                                       header_info=header_info,
+                                                       verify_hash=verify_hash)
+        langs.append(quest)
+        if inconsistent_hash is not None:
+            inconsistent.append((quest, inconsistent_hash))
+
+    rtn = None
+    if not is_question([x.language for x in langs],
+                       [isinstance(x, q.MCQuestion) for x in langs]):
+        pass
+    elif len(langs) == 1:
+        rtn = langs[0]
+    elif isinstance(langs[0], q.MCQuestion):
+        rtn = q.MCBilingualQuestion(langs[0], langs[1], uuid=langs[1].uuid)
+    else:
+        rtn = q.BilingualOpenQuestion(langs[0], langs[1], uuid=langs[1].uuid)
+    return rtn, inconsistent
@@ -0,0 +1,127 @@
+"""in-place changes of selection marks and collections in markdown files"""
+
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from ..file_writer import write_file
+from ..misc import FILE_ENCODING
+from ..question_db import QuestionDB
+from .lazy import LazyQuestion, TSpan, index_file
+from .md_lib import MDQuestionHeader
+
+# properties that can be changed by patching
+PATCHABLE = ("selected", "collection")
+
+TPatch = Tuple[TSpan, bytes]  # replace bytes between offsets
+
+
+def _line_end(line: bytes) -> bytes:
+    if line.endswith(b"\r\n"):
+        return b"\r\n"
+    elif line.endswith(b"\n"):
+        return b"\n"
+    return b""
+
+
+def _question_patches(quest: LazyQuestion, content: bytes) -> List[TPatch]:
+    rtn: List[TPatch] = []
+    changed = quest.changed_properties()
+    if "selected" in changed:
+        a, b = quest.header_line
+        txt = "## " + quest.title
+        if quest.selected:
+            txt += " " + MDQuestionHeader.SELECT_TAG
+        rtn.append(((a, b), txt.encode(FILE_ENCODING) + _line_end(content[a:b])))
+
+    if "collection" in changed:
+        coll = quest.collection_string
+        spans = [span for key, span in quest.info_lines if key == "collection"]
+        prefix = b""
+        for span in spans[:-1]:
+            rtn.append((span, b"")) # remove duplicates
+        if len(spans) > 0:
+            a, b = spans[-1]
+            end = _line_end(content[a:b])
+        else:
+            # insert after uuid (order of saved files) or the last info line
+            after = [span for key, span in quest.info_lines if key == "uuid"]
+            if len(after) == 0:
+                after = [span for _, span in quest.info_lines]
+            if len(after) == 0:
+                after = [quest.header_line]
+            a = b = after[-1][1]
+            end = _line_end(content[after[-1][0]:after[-1][1]])
+            if end == b"":
+                # last line of the file
+                prefix, end = b"\n", b""
+        if len(coll) > 0:
+            rtn.append(((a, b), prefix + f"[collection]: {coll}".encode(FILE_ENCODING) + end))
+        elif len(spans) > 0:
+            rtn.append(((a, b), b""))
+    return rtn
+
+
+def _apply(content: bytes, patches: List[TPatch]) -> bytes:
+    patches = sorted(patches, key=lambda x: x[0])
+    parts = []
+    p = 0
+    for (a, b), txt in patches:
+        parts.append(content[p:a])
+        parts.append(txt)
+        p = b
+    parts.append(content[p:])
+    return b"".join(parts)
+
+
+def patch_database(db: QuestionDB) -> Optional[List[Path]]:
+    """writes changed selection marks and collections directly into the
+    markdown files of a lazily loaded database (see `load_database_lazy`)
+
+    Only the header lines and collection lines of the changed questions are
+    replaced, each file is replaced atomically. Returns the changed files or
+    None, if other changes have been made (e.g. content, topics or removed
+    questions). In this case, save the database with
+    `save_database_folder`.
+    """
+    if db.has_removed_questions:
+        return None
+
+    files: Dict[Path, List[LazyQuestion]] = {}
+    for x in db.questions:
+        if not x.dirty:
+            continue
+        if not isinstance(x, LazyQuestion) or x.body_modified or x.untitled or \
+                any(p not in PATCHABLE for p in x.changed_properties()):
+            return None
+        files.setdefault(x.source.path, []).append(x)
+
+    # file contents before any file is changed
+    contents = {p: quests[0].source.content() for p, quests in files.items()}
+    file_quests: Dict[Path, List[LazyQuestion]] = {p: [] for p in files}
+    for x in db.questions:
+        if isinstance(x, LazyQuestion) and x.source.path in file_quests:
+            file_quests[x.source.path].append(x)
+    for path, quests in files.items():
+        patches = []
+        for x in quests:
+            patches.extend(_question_patches(x, contents[path]))
+        write_file(path, _apply(contents[path], patches), if_different=False)
+        _update_offsets(path, file_quests[path])
+
+    for quests in files.values():
+        for x in quests:
+            x.mark_saved()
+    return list(files)
+
+
+def _update_offsets(path: Path, quests: List[LazyQuestion]):
+    """updates the byte offsets of the lazy questions of the patched file"""
+    quests = sorted(quests, key=lambda x: x.span[0])
+    indexed, _, _, _ = index_file(path)
+    if len(indexed) != len(quests):
+        raise RuntimeError(f"Patching {path} failed")
+    for x, new in zip(quests, indexed):
+        x.source = new.source
+        x.span = new.span
+        x.header_line = new.header_line
+        x.info_lines = new.info_lines
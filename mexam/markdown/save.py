@@ -1,22 +1,46 @@
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Union
+from typing import List, Optional, Union
 
-from ..misc import FILE_ENCODING, all_files, write_if_different
+from ..exam import Exam
+from ..file_writer import FileWriter, write_file
+from ..misc import FILE_ENCODING, all_files
 from ..question_db import QuestionDB
 from .convert import database_to_markdown, database_to_md_dict
-from .load import SUFFIX
+from .journal import EditJournal
+from .load import SUFFIX, topic_file_name
+from .patch import patch_database
 
 
 def save_database_folder(db: QuestionDB,
                          path: Union[str, Path],
-                         remove_empty_files: bool = True) -> List[Path]:
-    """returns list with saved files"""
+                         remove_empty_files: bool = True,
+                         incremental: bool = True,
+                         threads: Optional[int] = None) -> List[Path]:
+    """returns list with saved files
+
+    The folder contains one file per topic (see `topic_file_name`), files
+    with other names are removed or cleared (`remove_empty_files`).
+
+    If `incremental` and the database has been loaded from or saved to this
+    folder, only the files of topics with changed questions are written
+    (see `QuestionDB.dirty_topics`). This requires that each file of the
+    loaded database contains the questions of one topic and is named like
+    the files written by this function. Other databases (e.g. with several
+    topics in one file) are rewritten completely in this layout. Files with
+    unchanged content are not touched. The files are written
+    by a pool of threads (`threads`, see `FileWriter`). The journal of the
+    folder is removed, since the files contain all edits.
+    """
 
     # prepare folder (optionally clear uncollection files)
     path = Path(path)
     if path.is_file():
         raise RuntimeError(
             f"can't created a folder. {path} is a existing files.")
+    elif incremental and db.saved_folder is not None and \
+            db.saved_folder == path.absolute():
+        return _save_dirty_topics(db, path, remove_empty_files, threads)
     elif path.is_dir():
         # get all files with suffix
         old_files = [x.absolute() for x in all_files(path, suffix=SUFFIX)]
@@ -28,30 +52,69 @@ def save_database_folder(db: QuestionDB,
                                    question_label=False, short_hash=True,
                                    quest_info=True, selected_only=False)
     saved_files: List[Path] = []
-    for topic, txt in md_dict.items():
-        topic = topic.lower().replace(" ", "_")
-        saved_files.append(path.joinpath(topic).with_suffix(SUFFIX).absolute())
-        write_if_different(file_path=saved_files[-1], content=txt)
-        try:
-            old_files.remove(saved_files[-1])
-        except ValueError:
-            pass
+    with FileWriter(threads=threads) as writer:
+        for topic, txt in md_dict.items():
+            saved_files.append(path.joinpath(topic_file_name(topic)).absolute())
+            writer.write(saved_files[-1], txt)
+            try:
+                old_files.remove(saved_files[-1])
+            except ValueError:
+                pass
 
     # remove or clear not collection files
     for fl in old_files:
-        if remove_empty_files:
-            fl.unlink()
-        else:
-            # clear
-            with open(fl, 'w', encoding=FILE_ENCODING) as f:
-                f.truncate(0)
+        _remove_file(fl, remove_empty_files)
+
+    _write_ignored(db, path)
+    db.mark_saved(path.absolute())
+    EditJournal.for_database(path).remove()
+    return saved_files
+
+
+def _save_dirty_topics(db: QuestionDB, path: Path,
+                       remove_empty_files: bool,
+                       threads: Optional[int]) -> List[Path]:
+    dirty = db.dirty_topics()
+    for topic in {x.topic for x in db.questions} - dirty:
+        if not path.joinpath(topic_file_name(topic)).is_file():
+            dirty.add(topic) # e.g. deleted by the user
+
+    md_dict = database_to_md_dict(db, topic_headings=True,
+                                   question_label=False, short_hash=True,
+                                   quest_info=True, selected_only=False,
+                                   topics=dirty)
+    saved_files: List[Path] = []
+    with FileWriter(threads=threads) as writer:
+        for topic, txt in md_dict.items():
+            saved_files.append(path.joinpath(topic_file_name(topic)).absolute())
+            writer.write(saved_files[-1], txt)
+
+    # topics without questions
+    for topic in dirty.difference(md_dict.keys()):
+        fl = path.joinpath(topic_file_name(topic))
+        if fl.is_file():
+            _remove_file(fl, remove_empty_files)
+
+    _write_ignored(db, path)
+    db.mark_saved(path.absolute())
+    EditJournal.for_database(path).remove()
+    return saved_files
+
+
+def _remove_file(fl: Path, remove: bool):
+    if remove:
+        fl.unlink()
+    else:
+        # clear
+        with open(fl, 'w', encoding=FILE_ENCODING) as f:
+            f.truncate(0)
+
 
-    # write ignored
+def _write_ignored(db: QuestionDB, path: Path):
     if len(db.ignored_content) > 0:
         with open(path.joinpath("markdown_content.ignored"),
                 "a", encoding=FILE_ENCODING) as fl:
             fl.write(db.ignored_content)
-    return saved_files
 
 
 def save_database_file(db: QuestionDB, path: Union[str, Path]):
@@ -59,8 +122,26 @@ def save_database_file(db: QuestionDB, path: Union[str, Path]):
 
     wrapper of `save_markdown_file` that  ensures that all data are correctly saved
     """
-    return save_markdown_file(db, path, topic_headings=False,
-                              short_hash=True,  selected_only=False)
+    save_markdown_file(db, path, topic_headings=False,
+                       short_hash=True,  selected_only=False)
+    EditJournal.for_database(path).remove()
+
+
+def compact_journal(db: QuestionDB, path: Union[str, Path]) -> None:
+    """writes the edits of the journal into the database files and removes
+    the journal
+
+    `db` must be loaded from `path` with replayed journal (default of
+    `load_database` and `load_database_lazy`). Selection marks and
+    collections are patched in place, if possible (see `patch_database`).
+    """
+    path = Path(path)
+    if patch_database(db) is None:
+        if path.is_file():
+            save_database_file(db, path)
+        else:
+            save_database_folder(db, path)
+    EditJournal.for_database(path).remove()
 
 def save_markdown_file(db: QuestionDB,
                        path: Union[str, Path],
@@ -74,8 +155,41 @@ def save_markdown_file(db: QuestionDB,
 
     # ẃrite
     path = Path(path)
-    write_if_different(path, content)
+    write_file(path, content)
     if len(db.ignored_content) > 0:
         with open(path.with_suffix(path.suffix+".ignored"),
                   "a", encoding=FILE_ENCODING) as fl:
             fl.write(db.ignored_content)
+
+
+def save_exam_versions(versions: List[Exam],
+                       path: Union[str, Path],
+                       processes: Optional[int] = 1) -> List[Path]:
+    """saves markdown file, uuid file and answer key (csv) of each exam
+    version in the folder
+
+    If `processes` > 1, the markdown of the versions is rendered by a pool
+    of worker processes (`None`: number of CPUs).
+
+    returns list with saved files
+    """
+    path = Path(path)
+    path.mkdir(exist_ok=True)
+    if processes == 1 or len(versions) < 2:
+        contents = [database_to_markdown(x) for x in versions]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            contents = list(pool.map(database_to_markdown, versions))
+
+    saved_files: List[Path] = []
+    with FileWriter() as writer:
+        for exam, content in zip(versions, contents):
+            saved_files.append(path.joinpath(exam.name + SUFFIX))
+            writer.write(saved_files[-1], content)
+            saved_files.append(path.joinpath(exam.name + ".uuid"))
+            exam.save_uuid_file(saved_files[-1])
+            saved_files.append(path.joinpath(exam.name + ".key.csv"))
+            writer.write(saved_files[-1],
+                         exam.get_solution_summary(with_uuid=True,
+                                                   with_order=True))
+    return saved_files
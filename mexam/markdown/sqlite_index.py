@@ -0,0 +1,425 @@
+"""SQLite index of a markdown database
+
+The question headers (title, topic, taxonomy, points, selection mark,
+collections) and the hashes of all questions are mirrored in a local SQLite
+file. Only modified markdown files are indexed again. The edits of the
+journal of the database are applied to the index (see `EditJournal`).
+"""
+
+import json
+import os
+import sqlite3
+from hashlib import md5
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Union
+from uuid import UUID
+
+from .. import __version__
+from ..misc import FILE_ENCODING
+from .cache import CACHE_FOLDER, CACHE_FORMAT, make_cache_folder
+from .journal import (REMOVE_COLLECTION, SELECT, STORE_COLLECTION,
+                      UNSELECT_ALL, EditJournal, parse_entries)
+from .lazy import (LazyQuestion, SourceFile, _from_data, _index_data,
+                   _lazy_question, _resolve)
+from .load import _database_files
+
+INDEX_FILE = "index.sqlite"
+INDEX_FORMAT = 2  # increase, if the tables change
+
+_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE files (id INTEGER PRIMARY KEY, path TEXT UNIQUE,
+    mtime_ns INTEGER, size INTEGER, rank INTEGER,
+    start_topic TEXT, end_topic TEXT, untitled_offset INTEGER,
+    n_untitled INTEGER);
+CREATE TABLE questions (id INTEGER PRIMARY KEY, file_id INTEGER,
+    pos INTEGER, uuid TEXT, title TEXT, untitled INTEGER, topic TEXT,
+    alt_topic TEXT, taxonomy TEXT, points REAL, file_selected INTEGER,
+    selected INTEGER, info TEXT, span_start INTEGER, span_end INTEGER,
+    header_start INTEGER, header_end INTEGER, info_lines TEXT);
+CREATE INDEX questions_uuid ON questions(uuid);
+CREATE INDEX questions_topic ON questions(topic);
+CREATE INDEX questions_taxonomy ON questions(taxonomy);
+CREATE INDEX questions_file ON questions(file_id);
+CREATE INDEX questions_selected ON questions(selected) WHERE selected = 1;
+CREATE TABLE file_collections (question_id INTEGER, tag TEXT);
+CREATE INDEX file_collections_question ON file_collections(question_id);
+CREATE TABLE collections (tag TEXT, question_id INTEGER,
+    PRIMARY KEY (tag, question_id)) WITHOUT ROWID;
+CREATE INDEX collections_question ON collections(question_id);
+CREATE TABLE hashes (question_id INTEGER, hash TEXT);
+CREATE INDEX hashes_hash ON hashes(hash);
+CREATE INDEX hashes_question ON hashes(question_id);
+"""
+
+# database order (see QuestionDB.sort_by_topics)
+_ORDER = "ORDER BY q.topic, f.rank, q.pos"
+_FROM = "FROM questions q JOIN files f ON q.file_id = f.id"
+
+
+class SQLiteIndex(object):
+    """Index of a markdown database in the file `.mexam_cache/index.sqlite`
+
+    The index provides the selection queries of `QuestionDB` and can be
+    used instead of a loaded database to create an `Exam`. Questions are
+    returned as `LazyQuestion`s. Call `sync()` after opening and after
+    changes of the markdown files. Edits are made in the markdown files or
+    the journal, not in the index.
+
+    If the index file can't be written (e.g. read-only database), the
+    index is kept in memory.
+
+    Example:
+        with SQLiteIndex("bank") as index:
+            index.sync()
+            exam = Exam(index, select_collection="T1")
+    """
+
+    def __init__(self,
+                 path: Union[str, Path],
+                 index_file: Union[None, str, Path] = None,
+                 suffix: Optional[str] = None):
+        """path: markdown database (folder or file)
+        index_file: SQLite file (default: `.mexam_cache/index.sqlite` in the
+            database folder or `.mexam_cache/<file name>.sqlite` beside the
+            database file)
+        """
+        self.path = Path(path)
+        self.suffix = suffix
+        if index_file is None:
+            if self.path.is_file():
+                folder = self.path.parent.joinpath(CACHE_FOLDER)
+                index_file = folder.joinpath(self.path.name + ".sqlite")
+            else:
+                folder = self.path.joinpath(CACHE_FOLDER)
+                index_file = folder.joinpath(INDEX_FILE)
+            try:
+                make_cache_folder(folder)
+            except OSError:
+                pass
+        self.index_file = Path(index_file)
+        if self.index_file.exists():
+            self.in_memory = not os.access(self.index_file, os.W_OK)
+        else:
+            self.in_memory = not os.access(self.index_file.parent, os.W_OK)
+        if self.in_memory:
+            self._con = sqlite3.connect(":memory:")
+        else:
+            self._con = sqlite3.connect(self.index_file)
+        self._sources: Dict[str, SourceFile] = {}
+        self._questions: Dict[UUID, LazyQuestion] = {}
+        self._prepare()
+
+    def close(self) -> None:
+        self._con.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _prepare(self):
+        fmt = f"{__version__}/{INDEX_FORMAT}/{CACHE_FORMAT}"
+        try:
+            row = self._con.execute(
+                "SELECT value FROM meta WHERE key = 'format'").fetchone()
+        except sqlite3.OperationalError:  # new file
+            row = None
+        except sqlite3.DatabaseError:  # not a SQLite file
+            self._con.close()
+            self.index_file.unlink()
+            self._con = sqlite3.connect(self.index_file)
+            row = None
+        if row is not None and row[0] == fmt:
+            return
+        # new index
+        tables = [x for x, in self._con.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'")]
+        with self._con:
+            for name in tables:
+                self._con.execute(f"DROP TABLE {name}")
+        self._con.executescript(_SCHEMA)
+        with self._con:
+            self._con.execute("INSERT INTO meta VALUES ('format', ?)", (fmt,))
+
+    def _meta(self, key: str, default: str = "") -> str:
+        row = self._con.execute("SELECT value FROM meta WHERE key = ?",
+                                (key,)).fetchone()
+        return default if row is None else row[0]
+
+    def _set_meta(self, key: str, value: str):
+        self._con.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                          (key, value))
+
+    ## synchronisation
+
+    def sync(self) -> int:
+        """indexes modified markdown files and applies the journal of the
+        database
+
+        returns the number of indexed files
+        """
+        path, files = _database_files(self.path, suffix=self.suffix)
+        known = {p: (i, m, s, r, st, u) for i, p, m, s, r, st, u in self._con.execute(
+            "SELECT id, path, mtime_ns, size, rank, start_topic, "
+            "untitled_offset FROM files")}
+        ends = {p: (t, n) for p, t, n in self._con.execute(
+            "SELECT path, end_topic, n_untitled FROM files")}
+
+        cnt = 0
+        with self._con:
+            topic = ""
+            untitled = 0  # untitled questions of the previous files
+            for rank, fl in enumerate(files):
+                key = str(fl.absolute())
+                stat = fl.stat()
+                old = known.pop(key, None)
+                if old is not None and old[1:] == (stat.st_mtime_ns, stat.st_size,
+                                                   rank, topic, untitled):
+                    topic, n = ends[key]
+                    untitled += n
+                    continue
+                if old is not None:
+                    self._remove_file(old[0])
+                topic, n = self._add_file(fl, rank, topic, untitled)
+                untitled += n
+                cnt += 1
+            for file_id, *_ in known.values():
+                self._remove_file(file_id)
+                cnt += 1
+            self._sync_journal(EditJournal.for_database(path),
+                               files_changed=cnt > 0)
+        self._sources = {}
+        self._questions = {}
+        return cnt
+
+    def _remove_file(self, file_id: int):
+        ids = "SELECT id FROM questions WHERE file_id = ?"
+        for table in ("file_collections", "collections", "hashes"):
+            self._con.execute(f"DELETE FROM {table} WHERE question_id IN ({ids})",
+                              (file_id,))
+        self._con.execute("DELETE FROM questions WHERE file_id = ?", (file_id,))
+        self._con.execute("DELETE FROM files WHERE id = ?", (file_id,))
+
+    def _add_file(self, fl: Path, rank: int, start_topic: str,
+                  untitled_offset: int) -> Tuple[str, int]:
+        """indexes the headers of the file and returns the last topic and the
+        number of untitled questions"""
+        source = SourceFile(fl)
+        data, _ = _index_data(fl)
+        indexed = _from_data(data, source)
+        _resolve(indexed, start_topic=start_topic, untitled_offset=untitled_offset)
+        file_id = self._con.execute(
+            "INSERT INTO files (path, mtime_ns, size, rank, start_topic, "
+            "end_topic, untitled_offset, n_untitled) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (str(fl.absolute()), *source._stat, rank, start_topic,
+             indexed.end_topic, untitled_offset, indexed.n_untitled)).lastrowid
+        for pos, (x, record) in enumerate(zip(indexed.questions, data["questions"])):
+            _, _, _, info = record[0]
+            _, _, span, header_line, info_lines, hashes = record
+            qid = self._con.execute(
+                "INSERT INTO questions (file_id, pos, uuid, title, untitled, "
+                "topic, alt_topic, taxonomy, points, file_selected, selected, "
+                "info, span_start, span_end, header_start, header_end, info_lines) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (file_id, pos, str(x.uuid), x.title, x.untitled, x.topic,
+                 x.alt_topic, None if x.taxonomy is None else str(x.taxonomy),
+                 x.points, x.selected, x.selected, json.dumps(info), *span,
+                 *header_line, json.dumps(info_lines))).lastrowid
+            self._con.executemany(
+                "INSERT INTO file_collections VALUES (?, ?)",
+                [(qid, tag) for tag in x.collection])
+            self._con.executemany(
+                "INSERT OR IGNORE INTO collections VALUES (?, ?)",
+                [(tag, qid) for tag in x.collection])
+            self._con.executemany("INSERT INTO hashes VALUES (?, ?)",
+                                  [(qid, h) for h in hashes])
+        return indexed.end_topic, indexed.n_untitled
+
+    def _sync_journal(self, journal: EditJournal, files_changed: bool):
+        """applies new journal entries. All entries are applied again to the
+        state of the markdown files, if files have changed or the journal
+        has been compacted or modified."""
+        try:
+            data = journal.path.read_bytes()
+        except FileNotFoundError:
+            data = b""
+        data = data[:data.rfind(b"\n") + 1]  # complete lines
+        n_applied = int(self._meta("journal_size", "0"))
+        if files_changed or n_applied > len(data) or \
+                md5(data[:n_applied]).hexdigest() != self._meta("journal_digest"):
+            if n_applied > 0:
+                # state of the markdown files
+                self._con.execute("UPDATE questions SET selected = file_selected "
+                                  "WHERE selected != file_selected")
+                self._con.execute("DELETE FROM collections")
+                self._con.execute("INSERT INTO collections SELECT tag, "
+                                  "question_id FROM file_collections")
+            n_applied = 0
+
+        for op, arg in parse_entries(data[n_applied:].decode(FILE_ENCODING)):
+            self._apply_edit(op, arg)
+        self._set_meta("journal_size", str(len(data)))
+        self._set_meta("journal_digest", md5(data).hexdigest())
+
+    def _apply_edit(self, op: str, arg: str):
+        if op == SELECT:
+            # all questions with the UUID (see journal.apply_edit)
+            cur = self._con.execute(
+                "UPDATE questions SET selected = 1 WHERE uuid = ?",
+                (_uuid_str(arg),))
+            if cur.rowcount == 0:
+                print(f"* journal: can't find UUID '{arg}'")
+        elif op == STORE_COLLECTION:
+            self._con.execute("INSERT OR IGNORE INTO collections SELECT ?, id "
+                              "FROM questions WHERE selected = 1", (arg,))
+            self._con.execute("UPDATE questions SET selected = 0 WHERE selected = 1")
+        elif op == REMOVE_COLLECTION:
+            self._con.execute("DELETE FROM collections WHERE tag = ?", (arg,))
+        elif op == UNSELECT_ALL:
+            self._con.execute("UPDATE questions SET selected = 0 WHERE selected = 1")
+        else:
+            print(f"* journal: unknown operation '{op}'")
+
+    ## queries
+
+    @property
+    def n_questions(self) -> int:
+        return self._con.execute("SELECT COUNT(*) FROM questions").fetchone()[0]
+
+    @property
+    def n_selected(self) -> int:
+        return self._con.execute(
+            "SELECT COUNT(*) FROM questions WHERE selected = 1").fetchone()[0]
+
+    def get_topics(self) -> List[str]:
+        """returns a sorted list of all topics"""
+        return [x for x, in self._con.execute(
+            "SELECT DISTINCT topic FROM questions ORDER BY topic")]
+
+    def get_collections(self) -> List[str]:
+        """returns a list of all collections"""
+        return [x for x, in self._con.execute(
+            "SELECT DISTINCT tag FROM collections ORDER BY tag")]
+
+    def collection_members(self, tag: str) -> Set[UUID]:
+        """returns the UUIDs of all items of the collection"""
+        return {UUID(x) for x, in self._con.execute(
+            "SELECT q.uuid FROM collections c JOIN questions q "
+            "ON c.question_id = q.id WHERE c.tag = ?", (tag,))}
+
+    def query_collections(self,
+                          all_of: Iterable[str] = (),
+                          any_of: Iterable[str] = (),
+                          none_of: Iterable[str] = ()) -> Set[UUID]:
+        """returns the UUIDs of all items that are in all collections `all_of`,
+        in at least one of the collections `any_of` and in none of the
+        collections `none_of` (see `QuestionDB.query_collections`)"""
+        members = "id IN (SELECT question_id FROM collections WHERE tag IN ({}))"
+        where: List[str] = []
+        args: List[str] = []
+        for tag in all_of:
+            where.append(members.format("?"))
+            args.append(tag)
+        for tags, prefix in ((list(any_of), ""), (list(none_of), "NOT ")):
+            if len(tags) > 0:
+                where.append(prefix + members.format(", ".join("?" * len(tags))))
+                args.extend(tags)
+        sql = "SELECT uuid FROM questions"
+        if len(where) > 0:
+            sql += " WHERE " + " AND ".join(where)
+        return {UUID(x) for x, in self._con.execute(sql, args)}
+
+    def query(self,
+              topic: Optional[str] = None,
+              taxonomy: Optional[str] = None,
+              collection: Optional[str] = None,
+              selected: Optional[bool] = None) -> List[UUID]:
+        """returns the UUIDs of all items with the topic, taxonomy,
+        collection and selection state (in database order). Undefined
+        criteria are ignored."""
+        where: List[str] = []
+        args: List[Any] = []
+        if topic is not None:
+            where.append("q.topic = ?")
+            args.append(topic)
+        if taxonomy is not None:
+            where.append("q.taxonomy = ?")
+            args.append(str(taxonomy))
+        if collection is not None:
+            where.append("q.id IN (SELECT question_id FROM collections "
+                         "WHERE tag = ?)")
+            args.append(collection)
+        if selected is not None:
+            where.append("q.selected = ?")
+            args.append(int(selected))
+        sql = f"SELECT q.uuid {_FROM}"
+        if len(where) > 0:
+            sql += " WHERE " + " AND ".join(where)
+        return [UUID(x) for x, in self._con.execute(f"{sql} {_ORDER}", args)]
+
+    def selected_uuids(self, collection: Optional[str] = None) -> List[UUID]:
+        """returns the UUIDs of all selected items or, if collection is
+        defined, of all items of the collection (in database order)"""
+        if collection is None:
+            return self.query(selected=True)
+        return self.query(collection=collection)
+
+    def find_uuids(self, id_str: str,
+                   max_matches: Optional[int] = None) -> List[UUID]:
+        """returns the sorted list of all UUIDs starting with id_str"""
+        sql = "SELECT DISTINCT uuid FROM questions WHERE uuid >= ? AND uuid < ? " \
+              "ORDER BY uuid"
+        args: List[Any] = [id_str, id_str + "\uffff"]
+        if max_matches is not None:
+            sql += " LIMIT ?"
+            args.append(max_matches)
+        return [UUID(x) for x, in self._con.execute(sql, args)]
+
+    def find_hash(self, short_hash: str) -> List[UUID]:
+        """returns the UUIDs of all items with the short hash (hash of one of
+        the language versions)"""
+        return [UUID(x) for x, in self._con.execute(
+            f"SELECT DISTINCT q.uuid {_FROM} JOIN hashes h "
+            f"ON h.question_id = q.id WHERE h.hash = ? {_ORDER}", (short_hash,))]
+
+    def get_question(self, uuid: Union[str, UUID]) -> Optional[LazyQuestion]:
+        """returns the question with the UUID (as in the loaded database)"""
+        if isinstance(uuid, str):
+            uuid = UUID(uuid)
+        try:
+            return self._questions[uuid]
+        except KeyError:
+            pass
+        row = self._con.execute(
+            "SELECT q.id, q.title, q.untitled, q.file_selected, q.info, "
+            "q.alt_topic, q.span_start, q.span_end, q.header_start, "
+            f"q.header_end, q.info_lines, q.selected, f.path {_FROM} "
+            "WHERE q.uuid = ? ORDER BY f.rank, q.pos LIMIT 1",
+            (str(uuid),)).fetchone()
+        if row is None:
+            return None
+        (qid, title, untitled, file_selected, info, alt_topic, span_start,
+         span_end, header_start, header_end, info_lines, selected, path) = row
+        if path not in self._sources:
+            self._sources[path] = SourceFile(Path(path))
+        x = _lazy_question([[title, bool(untitled), bool(file_selected),
+                             json.loads(info)], alt_topic, (span_start, span_end),
+                            (header_start, header_end), json.loads(info_lines)],
+                           self._sources[path])
+        x.uuid = uuid  # random UUID of questions without UUID in the file
+        x.mark_saved()
+        # state with journal
+        x.selected = bool(selected)
+        x.collection = {tag for tag, in self._con.execute(
+            "SELECT tag FROM collections WHERE question_id = ?", (qid,))}
+        self._questions[uuid] = x
+        return x
+
+
+def _uuid_str(txt: str) -> str:
+    try:
+        return str(UUID(txt))
+    except ValueError:
+        return txt
@@ -0,0 +1,148 @@
+"""test matrix: points, topic and taxonomy of all questions and parts"""
+
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from .misc import number_to_string
+from .question import OpenQuestion, TQuestion
+
+
+class TestMatrix(object):
+    """Column-wise table of the questions of an exam
+
+    Each question has a row. Open questions with parts have an additional
+    row for each part (e.g., "3a", "3b"). Topics and taxonomies are stored as
+    codes, that is, indices of the lists `topics` and `taxonomies`. Points
+    are stored as floats, undefined points as 0. The original values are
+    kept for `as_dict`.
+    """
+
+    __test__ = False  # not a test class (pytest)
+
+    def __init__(self, questions: Iterable[TQuestion]):
+        self.question: List[Union[int, str]] = []
+        self.topics: List[str] = []
+        self.taxonomies: List[str] = []
+        self.topic_code = array("i")
+        self.taxonomy_code = array("i")
+        self.points = array("d")
+        # rows used for aggregation: parts and questions without parts
+        self.leaf = array("b")
+        # original values of each row
+        self._taxonomy_values: List = []
+        self._point_values: List = []
+
+        topic_ids: Dict[str, int] = {}
+        taxo_ids: Dict[str, int] = {}
+
+        def add_row(label, topic, taxonomy, points, leaf):
+            self.question.append(label)
+            self._taxonomy_values.append(taxonomy)
+            self._point_values.append(points)
+            if taxonomy is None:
+                taxonomy = ""
+            else:
+                taxonomy = str(taxonomy)
+            try:
+                self.topic_code.append(topic_ids[topic])
+            except KeyError:
+                topic_ids[topic] = len(self.topics)
+                self.topic_code.append(len(self.topics))
+                self.topics.append(topic)
+            try:
+                self.taxonomy_code.append(taxo_ids[taxonomy])
+            except KeyError:
+                taxo_ids[taxonomy] = len(self.taxonomies)
+                self.taxonomy_code.append(len(self.taxonomies))
+                self.taxonomies.append(taxonomy)
+            self.points.append(0 if points is None else points)
+            self.leaf.append(leaf)
+
+        for cnt, q in enumerate(questions):
+            cnt += 1
+            parts = []
+            if isinstance(q, OpenQuestion):
+                parts = list(zip(q.part_taxonomies, q.part_points))
+            add_row(cnt, q.topic, q.taxonomy, q.points, len(parts) == 0)
+            for letter, (cat, pnt) in enumerate(parts):
+                add_row(f"{cnt}{chr(ord('a') + letter)}", q.topic, cat, pnt,
+                        True)
+
+    def __len__(self):
+        return len(self.question)
+
+    def as_dict(self) -> dict:
+        """returns dict with lists of question id, taxonomy, topic and points
+        for each row (original values, e.g. None for undefined points of
+        parts)"""
+        return {"question": list(self.question),
+                "taxonomy": list(self._taxonomy_values),
+                "topic": [self.topics[i] for i in self.topic_code],
+                "points": list(self._point_values)}
+
+    def topic_taxonomy_table(self, count: bool = False
+                             ) -> Tuple[List[str], List[str], List[List[float]]]:
+        """returns topics, taxonomies and the table of summed points (or the
+        number of items, if count) for each topic (row) and taxonomy (column)
+
+        Open questions with parts are counted by their parts.
+        """
+        taxonomies = sorted(self.taxonomies)
+        col = [taxonomies.index(x) for x in self.taxonomies]
+        table = [[0.0] * len(taxonomies) for _ in self.topics]
+        for top, tax, pnt, leaf in zip(self.topic_code, self.taxonomy_code,
+                                       self.points, self.leaf):
+            if leaf:
+                table[top][col[tax]] += 1 if count else pnt
+        return list(self.topics), taxonomies, table
+
+    def topic_taxonomy_text(self, count: bool = False) -> str:
+        """topic x taxonomy table as text with totals"""
+        topics, taxonomies, table = self.topic_taxonomy_table(count=count)
+        width = max([len(x) for x in topics] + [5])
+        rtn = "".ljust(width)
+        for x in taxonomies:
+            rtn += " " + (x if len(x) > 0 else "-").rjust(6)
+        rtn += " " + "total".rjust(6) + "\n"
+        col_sum = [0.0] * len(taxonomies)
+        for t, row in zip(topics, table):
+            rtn += t.ljust(width)
+            for i, x in enumerate(row):
+                rtn += " " + number_to_string(x).rjust(6)
+                col_sum[i] += x
+            rtn += " " + number_to_string(sum(row)).rjust(6) + "\n"
+        rtn += "total".ljust(width)
+        for x in col_sum:
+            rtn += " " + number_to_string(x).rjust(6)
+        rtn += " " + number_to_string(sum(col_sum)).rjust(6) + "\n"
+        return rtn
+
+    def topic_taxonomy_csv(self, count: bool = False,
+                           label: Optional[str] = None) -> str:
+        """topic x taxonomy table in long format: [label,] topic, taxonomy,
+        value. Use label to combine the tables of several exams."""
+        topics, taxonomies, table = self.topic_taxonomy_table(count=count)
+        value = "n" if count else "points"
+        if label is None:
+            rtn = f"topic, taxonomy, {value}\n"
+            prefix = ""
+        else:
+            rtn = f"exam, topic, taxonomy, {value}\n"
+            prefix = f"{label}, "
+        for t, row in zip(topics, table):
+            for tax, x in zip(taxonomies, row):
+                if x != 0:
+                    rtn += f"{prefix}{t}, {tax}, {number_to_string(x)}\n"
+        return rtn
+
+
+def topic_taxonomy_csv(exams: Iterable, count: bool = False) -> str:
+    """topic x taxonomy tables of several exams in long format (exam,
+    topic, taxonomy, value)"""
+    rtn = ""
+    for x in exams:
+        txt = x.get_test_matrix().topic_taxonomy_csv(count=count, label=x.name)
+        if len(rtn) > 0:
+            txt = txt.split("\n", maxsplit=1)[1]  # remove header
+        rtn += txt
+    return rtn
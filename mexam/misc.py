@@ -1,36 +1,58 @@
 """Text converter functions and Latex Code"""
+import warnings
 from hashlib import md5
 from pathlib import Path
-from random import shuffle
+from random import Random, shuffle
 from time import ctime
-from typing import Any, List, Optional
+from typing import Any, List, Optional, Tuple
 
 FILE_ENCODING = "utf-8"
 
-def shuffle_fixed_positions(element_list, fixed_elements=()):
-    """shuffel list with some elements at a fixed position
+def shuffled_permutation(n: int, fixed_ids=(),
+                         rng: Optional[Random] = None) -> Tuple[int, ...]:
+    """random permutation of the indices 0..n-1 that keeps the fixed ids at
+    their position (linear time)
 
-    all elements must be unique
+    If no random generator (rng) is defined, the global random generator
+    will be used.
     """
+    fixed = set(fixed_ids)
+    variable_ids = [i for i in range(n) if i not in fixed]
+    if rng is None:
+        shuffle(variable_ids)
+    else:
+        rng.shuffle(variable_ids)
 
-    variable_ids = []
-    fixed_ids = []
-    for i, elm in enumerate(element_list):
-        if elm in fixed_elements:
-            fixed_ids.append(i)
+    rtn = []
+    for i in range(n):
+        if i in fixed:
+            rtn.append(i)
         else:
-            variable_ids.append(i)
+            rtn.append(variable_ids.pop())
+    return tuple(rtn)
 
-    shuffle(variable_ids)
+def shuffle_fixed_positions(element_list, fixed_elements=(),
+                            rng: Optional[Random] = None):
+    """shuffel list with some elements at a fixed position
 
-    new_order = []
-    for i, elm in enumerate(element_list):
-        if i in fixed_ids:
-            new_order.append(elm)
-        else:
-            new_order.append(element_list[variable_ids.pop()])
+    all elements must be unique. Fixed elements are identified by identity.
+    If no random generator (rng) is defined, the global random generator
+    will be used.
+    """
 
-    return new_order
+    fixed = {id(elm) for elm in fixed_elements}
+    fixed_ids = [i for i, elm in enumerate(element_list) if id(elm) in fixed]
+    order = shuffled_permutation(len(element_list), fixed_ids, rng=rng)
+    return [element_list[i] for i in order]
+
+def seeded_random(*keys) -> Random:
+    """random generator that depends only on the keys (e.g. seed, version
+    and uuid), not on the global random state"""
+    return Random(":".join(str(k) for k in keys))
+
+def seeded_sort_key(*keys) -> str:
+    """pseudo-random sort key that depends only on the keys"""
+    return long_hash(":".join(str(k) for k in keys))
 
 def str_fix_len(txt:str, length:int=10, pad_char:str=' ', cut_left:bool=False):
     d = length - len(txt)
@@ -80,15 +102,16 @@ def strip_lines(txt:str):
 
 
 def write_if_different(file_path: Path, content: str):
-    """rewrites the file if the content is different"""
-    if file_path.is_file():
-        with open(file_path, "r", encoding=FILE_ENCODING) as fl:
-            fl_content = fl.read()
-        if hash(fl_content) == hash(content):
-            return # don't write
-    # rewrite
-    with open(file_path, "w", encoding=FILE_ENCODING) as fl:
-        fl.write(content)
+    """rewrites the file if the content is different
+
+    deprecated: use `file_writer.write_file`
+    """
+    warnings.warn("write_if_different is deprecated, "
+                  "use mexam.file_writer.write_file",
+                  DeprecationWarning, stacklevel=2)
+    from .file_writer import write_file
+    write_file(file_path, content, encoding=FILE_ENCODING)
+
 
 class MultiCounter(object):
 
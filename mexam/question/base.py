@@ -1,14 +1,80 @@
 """base classes"""
 from abc import ABCMeta, abstractmethod
 from collections import OrderedDict
-from typing import Any, Dict, Optional, Union
+from copy import copy
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Tuple, Union
 from uuid import UUID, uuid4
 
+from typing_extensions import Self
+
 from .. import misc
 
 NO_TOPIC = ""
 
 
+class CollectionSet(set):
+    """set of collection tags that counts the changes of all collection
+    sets (see `QuestionDB`)"""
+
+    n_changes = 0
+
+    def _changed(self):
+        CollectionSet.n_changes += 1
+
+    def add(self, tag):
+        super().add(tag)
+        self._changed()
+
+    def discard(self, tag):
+        super().discard(tag)
+        self._changed()
+
+    def remove(self, tag):
+        super().remove(tag)
+        self._changed()
+
+    def pop(self):
+        rtn = super().pop()
+        self._changed()
+        return rtn
+
+    def clear(self):
+        super().clear()
+        self._changed()
+
+    def update(self, *others):
+        super().update(*others)
+        self._changed()
+
+    def difference_update(self, *others):
+        super().difference_update(*others)
+        self._changed()
+
+    def intersection_update(self, *others):
+        super().intersection_update(*others)
+        self._changed()
+
+    def symmetric_difference_update(self, other):
+        super().symmetric_difference_update(other)
+        self._changed()
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def __iand__(self, other):
+        self.intersection_update(other)
+        return self
+
+    def __isub__(self, other):
+        self.difference_update(other)
+        return self
+
+    def __ixor__(self, other):
+        self.symmetric_difference_update(other)
+        return self
+
+
 class TQuestion(metaclass=ABCMeta):
 
     def __init__(self,
@@ -21,6 +87,15 @@ class TQuestion(metaclass=ABCMeta):
                  collection: Optional[str],
                  additional_info: Optional[Dict[str, Any]]):
 
+        self._content_version = 0
+        self._hash_cache: Optional[Tuple[Hashable, str]] = None
+        # short hash stated in the source file (e.g. markdown), if known
+        self.source_hash: Optional[str] = None
+        # compare short hash and source hash when the hash is computed
+        self.check_source_hash = False
+        # properties and content version when last loaded or saved
+        self._saved_state: Optional[Tuple] = None
+
         if title is None:
             self.title = ""
         else:
@@ -42,8 +117,7 @@ class TQuestion(metaclass=ABCMeta):
         if collection is None:
             self.collection = set()
         else:
-            self.collection = set([x.strip() for x in collection.split(",")])
-            self.collection.discard("")
+            self.collection = {x.strip() for x in collection.split(",")} - {""}
 
         if uuid is None:
             self.uuid = uuid4()
@@ -60,6 +134,15 @@ class TQuestion(metaclass=ABCMeta):
     def short_uuid(self) ->str:
         return str(self.uuid)[:6]
 
+    @property
+    def collection(self) -> CollectionSet:
+        return self._collection
+
+    @collection.setter
+    def collection(self, val: Iterable[str]):
+        self._collection = CollectionSet(val)
+        CollectionSet.n_changes += 1
+
     @property
     def additional_info(self) -> Dict[str, Any]:
         return self._additional_info
@@ -103,8 +186,83 @@ class TQuestion(metaclass=ABCMeta):
         return d
 
     @property
-    def short_hash(self):
-        return misc.short_hash(self.to_text())
+    def content_version(self) -> Hashable:
+        """changes whenever the content of the question (`to_text`) changes"""
+        return self._content_version
+
+    def content_changed(self) -> None:
+        """invalidates cached content properties, such as the short hash
+
+        Call this method, if you modify question content (e.g. the text of an
+        answer) directly.
+        """
+        self._content_version += 1
+
+    STATE_PROPERTIES = ("topic", "title", "selected", "taxonomy", "points",
+                        "collection", "additional_info", "content")
+
+    def _state(self) -> Tuple:
+        return (self.topic, self.title, self.selected, self.taxonomy,
+                self.points, frozenset(self.collection),
+                tuple((k, str(v)) for k, v in self.additional_info.items()),
+                self.content_version)
+
+    def mark_saved(self) -> None:
+        """marks the question as unchanged, e.g. after loading or saving"""
+        self._saved_state = self._state()
+
+    @property
+    def dirty(self) -> bool:
+        """True, if properties (e.g. selection or collections) or the
+        content have been changed since the question was loaded or saved"""
+        return self._saved_state is None or self._saved_state != self._state()
+
+    def changed_properties(self) -> List[str]:
+        """names of the properties (see STATE_PROPERTIES) that have been
+        changed since the question was loaded or saved"""
+        if self._saved_state is None:
+            return list(self.STATE_PROPERTIES)
+        return [n for n, a, b in zip(self.STATE_PROPERTIES, self._saved_state,
+                                     self._state()) if a != b]
+
+    @property
+    def saved_topic(self) -> Optional[str]:
+        """topic when the question was last loaded or saved"""
+        if self._saved_state is None:
+            return None
+        return self._saved_state[0]
+
+    @property
+    def short_hash(self) -> str:
+        v = self.content_version
+        if self._hash_cache is None or self._hash_cache[0] != v:
+            self._hash_cache = (v, misc.short_hash(self.to_text()))
+            if self.check_source_hash:
+                self.check_source_hash = False
+                if self.source_hash != self._hash_cache[1]:
+                    print(f"* not fitting hash: {self.source_hash} -> "
+                          f"{self._hash_cache[1]} ({self.title})")
+        return self._hash_cache[1]
+
+    def view(self) -> Self:
+        """returns a lightweight copy of the question
+
+        The view shares the content (text, answers and parts) with this
+        question. Properties, such as title, selection or the order of the
+        answers, can be changed without affecting the original question.
+        """
+        rtn = copy(self)
+        rtn.collection = set(self.collection)
+        rtn._additional_info = dict(self._additional_info)
+        return rtn
+
+    def materialize(self) -> "TQuestion":
+        """returns the fully loaded question
+
+        Questions are always fully loaded, except when loading only the
+        headers of a database (see `markdown.load_database_lazy`).
+        """
+        return self
 
     @property
     def __str__(self):
@@ -134,9 +292,18 @@ class TOneLangQuestion(TQuestion):
                          collection=collection,
                          additional_info=additional_info)
 
-        self.question = misc.strip_lines(question)
+        self.question = question
         self.language = language
 
+    @property
+    def question(self) -> str:
+        return self._question
+
+    @question.setter
+    def question(self, val: str):
+        self._question = misc.strip_lines(val)
+        self.content_changed()
+
     def label(self, short_hash:bool=True, title:bool=True) -> str:
         """language and uuid and optionally short hash and title"""
 
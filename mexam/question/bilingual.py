@@ -1,8 +1,10 @@
 from abc import ABCMeta, abstractmethod
-from typing import Optional, Union
+from random import Random
+from typing import Hashable, Optional, Union
 from uuid import UUID
 
-from .. import misc
+from typing_extensions import Self
+
 from .base import TQuestion, TOneLangQuestion
 from .mc_question import MCQuestion
 from .open_question import OpenQuestion
@@ -45,6 +47,11 @@ class TBilingualQuestion(TQuestion, metaclass=ABCMeta):
     def L2(self) -> TOneLangQuestion:
         pass
 
+    @property
+    def content_version(self) -> Hashable:
+        return (self._content_version, self.L1.content_version,
+                self.L2.content_version)
+
     def to_text(self) -> str:
         return self.L1.to_text() + "\n" + self.L2.to_text()
 
@@ -59,6 +66,12 @@ class MCBilingualQuestion(TBilingualQuestion):
         self._l1 = L1_question
         self._l2 = L2_question
 
+    def view(self) -> Self:
+        rtn = super().view()
+        rtn._l1 = self._l1.view()
+        rtn._l2 = self._l2.view()
+        return rtn
+
     @property
     def L1(self) -> MCQuestion:
         return self._l1
@@ -67,12 +80,14 @@ class MCBilingualQuestion(TBilingualQuestion):
     def L2(self) -> MCQuestion:
         return self._l2
 
-    def shuffle_answers(self):
+    def shuffle_answers(self, rng: Optional[Random] = None):
         """shuffels answers of L1 and L2 in the same way"""
-        joined = list(zip(self.L1.answers, self.L2.answers))
-        fixed = list(filter(lambda x: x[0].fixed_position, joined))
-        joined = misc.shuffle_fixed_positions(joined, fixed)
-        self.L1._answers, self.L2._answers = list(zip(*joined))  # unzip
+        if len(self.L1.answers) != len(self.L2.answers):
+            raise RuntimeError("Bilingual question has different number of "
+                               f"answers: {self.title}")
+        permutation = self.L1.shuffled_answer_permutation(rng=rng)
+        self.L1.permute_answers(permutation)
+        self.L2.permute_answers(permutation)
 
     def add_answer(self, L1_text: str, L2_text: str, is_correct: bool,
                    fixed_position: bool = False):
@@ -90,6 +105,12 @@ class BilingualOpenQuestion(TBilingualQuestion):
         self._l1 = L1_question
         self._l2 = L2_question
 
+    def view(self) -> Self:
+        rtn = super().view()
+        rtn._l1 = self._l1.view()
+        rtn._l2 = self._l2.view()
+        return rtn
+
     @property
     def L1(self) -> OpenQuestion:
         return self._l1
@@ -1,6 +1,7 @@
 """multiple choice exam"""
 
-from typing import Any, Dict, List, Optional, Union
+from random import Random
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
 from uuid import UUID
 
 from .. import misc
@@ -30,41 +31,78 @@ class MCQuestion(TOneLangQuestion):
                          uuid=uuid,
                          collection=collection,
                          additional_info=additional_info)
-        self._answers = []
+        self._answers: List[Answer] = []
+        # order of the answers as indices of _answers, None: original order
+        self._answer_order: Optional[Tuple[int, ...]] = None
 
     def to_text(self) -> str:
         rtn = super().to_text()
-        if len(self.answers) > 0:
+        answers = self.answers
+        if len(answers) > 0:
             rtn += "\n"
-            for a in self._answers:
+            for a in answers:
                 rtn += a.to_text()
         return rtn
 
     @property
-    def answers(self) -> List[Answer]:
-        return self._answers
+    def answers(self) -> Tuple[Answer, ...]:
+        """answers in the current order (read-only, use the setter,
+        `add_answer` or `permute_answers` to change the answers)"""
+        if self._answer_order is None:
+            return tuple(self._answers)
+        return tuple(self._answers[i] for i in self._answer_order)
 
     @answers.setter
-    def answers(self, val: List[Answer]) -> None:
-        self._answers = val
+    def answers(self, val: Sequence[Answer]) -> None:
+        self._answers = list(val)
+        self._answer_order = None
+        self.content_changed()
+
+    @property
+    def answer_order(self) -> Tuple[int, ...]:
+        """current order of the answers as indices of the answers in their
+        original order"""
+        if self._answer_order is None:
+            return tuple(range(len(self._answers)))
+        return self._answer_order
 
     def add_answer(self, answer, is_correct, fixed_position):
-        self._answers.append(Answer(text=answer, is_correct=is_correct,
-                                    fixed_position=fixed_position))
+        # new list, because views might share the answers
+        self._answers = self._answers + [Answer(text=answer,
+                                                is_correct=is_correct,
+                                                fixed_position=fixed_position)]
+        if self._answer_order is not None:
+            self._answer_order += (len(self._answers) - 1,)
+        self.content_changed()
+
+    def permute_answers(self, permutation: Sequence[int]):
+        """reorders the answers. The permutation refers to the current order
+        of the answers."""
+        order = self.answer_order
+        if sorted(permutation) != list(range(len(order))):
+            raise ValueError(f"Incorrect answer permutation: {permutation}")
+        self._answer_order = tuple(order[i] for i in permutation)
+        self.content_changed()
 
     def fixed_position_answers(self):
         return list(filter(lambda x: x.fixed_position, self._answers))
 
-    def shuffle_answers(self):
+    def shuffle_answers(self, rng: Optional[Random] = None):
         # answer fix positions
-        return misc.shuffle_fixed_positions(self._answers,
-                                            self.fixed_position_answers)
+        self.permute_answers(self.shuffled_answer_permutation(rng=rng))
+
+    def shuffled_answer_permutation(self, rng: Optional[Random] = None) -> Tuple[int, ...]:
+        """random permutation of the current answer order that keeps answers
+        with fixed position at their place"""
+        answers = self.answers
+        fixed_ids = [i for i, a in enumerate(answers) if a.fixed_position]
+        return misc.shuffled_permutation(len(answers), fixed_ids, rng=rng)
 
     def is_correct(self) -> List[bool]:
-        return [ans.is_correct for ans in self._answers]
+        return [ans.is_correct for ans in self.answers]
 
     def correct_str(self) -> str:
-        arr = [str(int(ans.is_correct)) for ans in self._answers]
+        arr = [str(int(ans.is_correct)) for ans in self.answers]
         return "".join(arr)
 
     def correct_answer_ids(self, as_numbers_starting_with_zero=True,
@@ -93,7 +131,7 @@ class MCQuestion(TOneLangQuestion):
             rtn = '# Question'
 
         rtn += f"\n\n{self.question}\n\n"
-        for cnt, a in enumerate(self._answers):
+        for cnt, a in enumerate(self.answers):
             letter = chr(ord("A") + cnt)
             if a.is_correct:
                 rtn += f"*{letter}*)"
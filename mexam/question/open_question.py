@@ -2,6 +2,8 @@
 from typing import Any, Dict, Optional, Union
 from uuid import UUID
 
+from typing_extensions import Self
+
 from .base import TOneLangQuestion
 
 
@@ -31,6 +33,13 @@ class OpenQuestion(TOneLangQuestion):  # question with parts
         self.part_points = []
         self.part_taxonomies = []
 
+    def view(self) -> Self:
+        rtn = super().view()
+        rtn._parts = list(self._parts)
+        rtn.part_points = list(self.part_points)
+        rtn.part_taxonomies = list(self.part_taxonomies)
+        return rtn
+
     def to_text(self) -> str:
         rtn = super().to_text()
         if len(self._parts)>0:
@@ -51,4 +60,4 @@ class OpenQuestion(TOneLangQuestion):  # question with parts
         self._parts.append(question)
         self.part_points.append(int(points))
         self.part_taxonomies.append(taxonomy)
-
+        self.content_changed()
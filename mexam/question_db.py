@@ -1,18 +1,31 @@
 """
 """
 
+from bisect import bisect_left
 from itertools import groupby
-from typing import List, Optional, Union
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Union
 from uuid import UUID
 
 from .question import TQuestion
+from .question.base import CollectionSet
 
 
 class QuestionDB(object):
 
     def __init__(self):
         self._questions: List[TQuestion] = []
+        self._uuid_index: Dict[UUID, List[TQuestion]] = {} # in database order
+        self._has_duplicates = False # questions with identical UUIDs
+        self._sorted_uuid_strs: Optional[List[str]] = None # prefix index
+        # tag -> questions (key: id of the question), rebuilt if collections
+        # have been changed directly (see `CollectionSet`)
+        self._collection_index: Dict[str, Dict[int, TQuestion]] = {}
+        self._collection_changes = CollectionSet.n_changes
         self.ignored_content: str = ""
+        # folder with the markdown files of the saved state (see mark_saved)
+        self.saved_folder: Optional[Path] = None
+        self._removed_topics: Set[str] = set()
 
     @property
     def questions(self) -> List[TQuestion]:
@@ -26,15 +39,99 @@ class QuestionDB(object):
             raise RuntimeError("Please add an MCQuestion, OpenQuestion, or"
                                "their bilingual versions")
         self._questions.append(question)
+        try:
+            self._uuid_index[question.uuid].append(question)
+            self._has_duplicates = True
+        except KeyError:
+            self._uuid_index[question.uuid] = [question]
+        self._sorted_uuid_strs = None
+        if self._collection_changes == CollectionSet.n_changes:
+            for tag in question.collection:
+                self._collection_index.setdefault(tag, {})[id(question)] = question
         if sort_by_topics:
             self.sort_by_topics()
 
+    def remove_question(self, uuid:Union[str, UUID]) -> Union[None, TQuestion]:
+        """removes the question with the UUID and returns it
+        returns None if no item found
+        """
+        x = self.get_question(uuid)
+        if x is None:
+            return None
+        self._questions.remove(x)
+        if x.saved_topic is not None:
+            self._removed_topics.add(x.saved_topic)
+        same_uuid = self._uuid_index[x.uuid]
+        same_uuid.remove(x)
+        if len(same_uuid) == 0:
+            del self._uuid_index[x.uuid]
+            self._sorted_uuid_strs = None
+        if self._collection_changes == CollectionSet.n_changes:
+            for tag in x.collection:
+                self._discard_from_collection_index(tag, x)
+        return x
+
+    def add_questions(self, questions: Iterable[Optional[TQuestion]],
+                      sort_by_topics: bool = True) -> None:
+        """adds multiple questions and sorts only once at the end
+
+        Sorting is stable, thus the result is identical to adding the
+        questions one by one with `add_question`.
+        """
+        for x in questions:
+            self.add_question(x, sort_by_topics=False)
+        if sort_by_topics:
+            self.sort_by_topics()
+
+    def _collections(self) -> Dict[str, Dict[int, TQuestion]]:
+        """returns the up-to-date collection index"""
+        if self._collection_changes != CollectionSet.n_changes:
+            self._collection_index = {}
+            for x in self._questions:
+                for tag in x.collection:
+                    self._collection_index.setdefault(tag, {})[id(x)] = x
+            self._collection_changes = CollectionSet.n_changes
+        return self._collection_index
+
     def sort_by_topics(self) -> None:
         """questions by sorted by topic"""
         self._questions = sorted(self._questions,
                                  key=lambda q: (q.topic is None, str(q.topic)))
         # "Tuple trick" above:
         # Nones in list can't be sort, but tuples (True, None) can. None will be at the end, because False<True
+        if self._has_duplicates:
+            # questions with identical UUID in database order
+            for lst in self._uuid_index.values():
+                lst.clear()
+            for x in self._questions:
+                self._uuid_index[x.uuid].append(x)
+
+    def mark_saved(self, folder: Optional[Path] = None) -> None:
+        """marks all questions as unchanged
+
+        folder: folder with one markdown file per topic that contains
+            exactly the current questions, if any.
+        """
+        for x in self._questions:
+            x.mark_saved()
+        self._removed_topics = set()
+        self.saved_folder = folder
+
+    @property
+    def has_removed_questions(self) -> bool:
+        """True, if questions have been removed since the last `mark_saved`"""
+        return len(self._removed_topics) > 0
+
+    def dirty_topics(self) -> Set[str]:
+        """topics with changed, added or removed questions since the last
+        `mark_saved`"""
+        rtn = set(self._removed_topics)
+        for x in self._questions:
+            if x.dirty:
+                rtn.add(x.topic)
+                if x.saved_topic is not None:
+                    rtn.add(x.saved_topic)
+        return rtn
 
     @property
     def n_questions(self):
@@ -49,13 +146,63 @@ class QuestionDB(object):
                 cnt +=1
         return cnt
 
+    def selected_uuids(self, collection: Optional[str] = None) -> List[UUID]:
+        """returns the UUIDs of all selected items or, if collection is
+        defined, of all items of the collection (in database order)"""
+        if collection is None:
+            return [x.uuid for x in self._questions if x.selected]
+        return [x.uuid for x in self._questions if collection in x.collection]
+
     def get_collections(self) -> List[str]:
         """returns a list of all collections"""
-        collections = set()
-        for x in self._questions:
-            if x.collection:
-                collections.update(x.collection)
-        return sorted(list(collections))
+        return sorted(self._collections().keys())
+
+    def collection_members(self, tag:str) -> Set[UUID]:
+        """returns the UUIDs of all items of the collection"""
+        return {x.uuid for x in self._collections().get(tag, {}).values()}
+
+    def query_collections(self,
+                          all_of:Iterable[str] = (),
+                          any_of:Iterable[str] = (),
+                          none_of:Iterable[str] = ()) -> Set[UUID]:
+        """returns the UUIDs of all items that are in all collections `all_of`,
+        in at least one of the collections `any_of` and in none of the
+        collections `none_of`. Unspecified criteria are ignored.
+
+        Example: items in T1 but not in R2023
+            `db.query_collections(all_of=["T1"], none_of=["R2023"])`
+        """
+        index = self._collections()
+        empty: Dict[int, TQuestion] = {}
+        rtn: Optional[Dict[int, TQuestion]] = None
+        for tag in all_of:
+            members = index.get(tag, empty)
+            if rtn is None:
+                rtn = dict(members)
+            else:
+                rtn = {k: x for k, x in rtn.items() if k in members}
+        any_of = list(any_of)
+        if len(any_of) > 0:
+            members = {}
+            for tag in any_of:
+                members.update(index.get(tag, empty))
+            if rtn is None:
+                rtn = members
+            else:
+                rtn = {k: x for k, x in rtn.items() if k in members}
+        if rtn is None:
+            rtn = {id(x): x for x in self._questions}
+        for tag in none_of:
+            members = index.get(tag, empty)
+            rtn = {k: x for k, x in rtn.items() if k not in members}
+        return {x.uuid for x in rtn.values()}
+
+    def _discard_from_collection_index(self, tag:str, question:TQuestion):
+        members = self._collection_index.get(tag)
+        if members is not None:
+            members.pop(id(question), None)
+            if len(members) == 0:
+                del self._collection_index[tag]
 
     def print_summary(self) -> None:
         """prints a summary of the question database"""
@@ -69,9 +216,10 @@ class QuestionDB(object):
 
     def print_collections_selections(self) -> None:
         """prints a summary of the question database with collections and selections"""
-        print(f"collections: {len(self.get_collections())}")
+        index = self._collections()
+        print(f"collections: {len(index)}")
         for coll in self.get_collections():
-            print(f"  {coll}: {len([x for x in self._questions if coll in x.collection])}")
+            print(f"  {coll}: {len(index[coll])}")
         print(f"selected: {self.n_selected}")
 
     def unselect_all(self):
@@ -80,29 +228,34 @@ class QuestionDB(object):
 
     def store_collection(self, tag:str):
         """store selected items using the property 'collection'"""
+        index = self._collections()
         for x in self._questions:
             if x.selected:
                 x.collection.add(tag)
                 x.selected = False
+                index.setdefault(tag, {})[id(x)] = x
+        self._collection_changes = CollectionSet.n_changes
 
     def select_collection(self, tag:str|None = None,keep_selected:bool = False):
         """selects all items that have the 'collection' tag"""
 
-        for x in self._questions:
-            if keep_selected and x.selected:
-                continue
-            if tag is not None:
-                x.selected = tag in x.collection
+        if tag is None:
+            return
+        if not keep_selected:
+            self.unselect_all()
+        for x in self._collections().get(tag, {}).values():
+            x.selected = True
 
 
     def select_uuids(self, uuids:List[str]|List[UUID], keep_selected:bool = False):
-        """selects all items that have the UUID"""
+        """selects all items that have the UUID. Invalid UUIDs are ignored."""
 
-        uuid_strs = [str(u) for u in uuids]
-        for x in self._questions:
-            if keep_selected and x.selected:
+        for u in uuids:
+            try:
+                quests = self.get_questions(u)
+            except ValueError:
                 continue
-            if str(x.uuid) in uuid_strs:
+            for x in quests:
                 x.selected = True
 
     def add_selection_uuid(self, id_str:str) -> bool:
@@ -110,25 +263,49 @@ class QuestionDB(object):
         return False if no item found
         """
 
-        found = False
-        for x in self._questions:
-            if str(x.uuid).startswith(id_str):
-                x.selected = True
-                if found:
-                    raise RuntimeError(f"Multiple UUIDs beginning with '{id_str}'")
-                found = True
+        found = self.find_uuids(id_str, max_matches=2)
+        if len(found) > 1:
+            raise RuntimeError(f"Multiple UUIDs beginning with '{id_str}'")
+        elif len(found) == 0:
+            return False
+        for x in self._uuid_index[found[0]]:
+            x.selected = True
+        return True
+
+    def find_uuids(self, id_str:str, max_matches:Optional[int] = None) -> List[UUID]:
+        """returns the sorted list of all UUIDs starting with id_str
+
+        Uses a sorted array of UUID strings, that is, O(log N + k) for k matches.
+        If max_matches is defined, the search stops after max_matches UUIDs.
+        """
+        if self._sorted_uuid_strs is None:
+            self._sorted_uuid_strs = sorted(str(u) for u in self._uuid_index)
+        strs = self._sorted_uuid_strs
 
-        return found
+        rtn:List[UUID] = []
+        i = bisect_left(strs, id_str)
+        while i < len(strs) and strs[i].startswith(id_str):
+            if max_matches is not None and len(rtn) >= max_matches:
+                break
+            rtn.append(UUID(strs[i]))
+            i += 1
+        return rtn
 
     def remove_collection(self, tag:str):
         """removes the collection tag from all items"""
-        for x in self._questions:
-            if tag in x.collection:
-                x.collection.remove(tag)
+        for x in self._collections().pop(tag, {}).values():
+            x.collection.discard(tag)
+        self._collection_changes = CollectionSet.n_changes
 
     def get_question(self, uuid:Union[str, UUID]) -> Union[None, TQuestion]:
+        """returns the first question with the UUID"""
+        quests = self.get_questions(uuid)
+        if len(quests) == 0:
+            return None
+        return quests[0]
+
+    def get_questions(self, uuid:Union[str, UUID]) -> List[TQuestion]:
+        """returns all questions with the UUID (e.g. copied questions)"""
         if isinstance(uuid, str):
             uuid = UUID(uuid)
-        for x in self._questions:
-            if x.uuid == uuid:
-                return x
\ No newline at end of file
+        return list(self._uuid_index.get(uuid, ()))
@@ -1,9 +1,10 @@
 from os import makedirs, path
-from typing import Dict, List
+from typing import Dict, List, Optional
 
 from ..exam import Exam
 from ..question import MCBilingualQuestion, MCQuestion
-from ..misc import FILE_ENCODING, MultiCounter, bool_str, underline
+from ..file_writer import FileWriter, write_file
+from ..misc import MultiCounter, bool_str, underline
 
 FILE_SUFFIX = ".Rmd"
 
@@ -59,7 +60,9 @@ class _RExamMCItem(object):
             rtn += "exextra[Taxonomy]: {}\n".format(self.exextra_taxonomy)
         return rtn
 
-    def save(self, escape_slashes, directory=None, add_subfolder=False):
+    def save(self, escape_slashes, directory=None, add_subfolder=False,
+             writer: Optional[FileWriter] = None):
+        """writes the Rmd file (optionally by the writer)"""
         if directory is None:
             directory = ""
         directory = path.abspath(directory)
@@ -70,9 +73,12 @@ class _RExamMCItem(object):
         if not path.isdir(directory):
             makedirs(directory)
 
-        with open(path.join(directory, self.exname + FILE_SUFFIX),
-                  "w", encoding=FILE_ENCODING) as fl:
-            fl.write(self.content(escape_slashes=escape_slashes))
+        flname = path.join(directory, self.exname + FILE_SUFFIX)
+        content = self.content(escape_slashes=escape_slashes)
+        if writer is None:
+            write_file(flname, content)
+        else:
+            writer.write(flname, content)
 
 
 def convert(exam:Exam,
@@ -86,23 +92,25 @@ def convert(exam:Exam,
     cnt = MultiCounter()
 
     files = {}
-    for biquest in exam.questions:
-        assert isinstance(biquest, MCBilingualQuestion) # TODO works currently only for MCBilingual questions
-        qtype = "P{}".format(biquest.title)
-        cnt.inc(qtype)
-        for quest in [biquest.L1, biquest.L2]:
-            qname = "{}-{}-{}-{}".format(name, qtype,
-                                         str(cnt.get(qtype)).zfill(2),
-                                         quest.language)
-            if incl_hash:
-                qname += "-{}".format(quest.short_hash)
-
-            rmd = _RExamMCItem(exname=qname, mc_question=quest)
-            rmd.save(escape_slashes=escape_slashes, directory=directory, add_subfolder=add_subfolder)
-
-            if quest.language not in files:
-                files[quest.language] = []
-            files[quest.language].append(rmd.exname + FILE_SUFFIX)
+    with FileWriter() as writer:
+        for biquest in exam.questions:
+            assert isinstance(biquest, MCBilingualQuestion) # TODO works currently only for MCBilingual questions
+            qtype = "P{}".format(biquest.title)
+            cnt.inc(qtype)
+            for quest in [biquest.L1, biquest.L2]:
+                qname = "{}-{}-{}-{}".format(name, qtype,
+                                             str(cnt.get(qtype)).zfill(2),
+                                             quest.language)
+                if incl_hash:
+                    qname += "-{}".format(quest.short_hash)
+
+                rmd = _RExamMCItem(exname=qname, mc_question=quest)
+                rmd.save(escape_slashes=escape_slashes, directory=directory,
+                         add_subfolder=add_subfolder, writer=writer)
+
+                if quest.language not in files:
+                    files[quest.language] = []
+                files[quest.language].append(rmd.exname + FILE_SUFFIX)
 
     return files
 
@@ -1,9 +1,11 @@
 """Text function and Latex Code"""
 import os
-from typing import Optional
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
 
 from .. import __version__, misc
 from ..exam import Exam
+from ..file_writer import FileWriter, write_file
 from ..question import TBilingualQuestion, MCQuestion, OpenQuestion
 from .latex import text2latex
 from .settings import LatexSettings
@@ -96,19 +98,52 @@ class LatexFiles(object):
                                    add_solutions_in_comments=True)
 
         rtn = {quest_file[0]: misc.long_hash(txt)}
-        with open(quest_file[0], 'w', encoding=misc.FILE_ENCODING) as fl:
-            fl.write(txt)
+        write_file(quest_file[0], txt)
 
         if len(quest_file[1]) > 0:
             txt = self._exam_to_latex(exam=exam, language=2,
                                        max_questions_per_page=None,
                                        add_solutions_in_comments=True)
             rtn[quest_file[1]] = misc.long_hash(txt)
-            with open(quest_file[1], 'w', encoding=misc.FILE_ENCODING) as fl:
-                fl.write(txt)
+            write_file(quest_file[1], txt)
 
         return rtn
 
+    def create_version_question_files(self, versions: List[Exam],
+                                      processes: Optional[int] = 1) -> Dict[str, str]:
+        """creates the question files of several exam versions
+
+        The files are named `<quest file>_<version name>.quest`. If
+        `processes` > 1, the latex code is rendered by a pool of worker
+        processes (`None`: number of CPUs).
+
+        returns dict with filenames and content hashes
+        """
+        filenames = []
+        jobs = []
+        for lang, quest_file in enumerate(self._ts.quest_file):
+            if len(quest_file) == 0:
+                continue
+            stem = os.path.splitext(quest_file)[0]
+            for exam in versions:
+                filenames.append(f"{stem}_{exam.name}.quest")
+                jobs.append((exam, lang + 1))
+
+        exams = [x[0] for x in jobs]
+        languages = [x[1] for x in jobs]
+        if processes == 1 or len(jobs) < 2:
+            contents = list(map(self._exam_to_latex, exams, languages))
+        else:
+            with ProcessPoolExecutor(max_workers=processes) as pool:
+                contents = list(pool.map(self._exam_to_latex, exams, languages))
+
+        rtn = {}
+        with FileWriter() as writer:
+            for flname, txt in zip(filenames, contents):
+                rtn[flname] = misc.long_hash(txt)
+                writer.write(flname, txt)
+        return rtn
+
     def _tex_main_file(self, language: int) -> str:
 
         return """% --- Created with Mexam """ + str(__version__) + """
@@ -0,0 +1,80 @@
+import pytest
+
+from mexam.blueprint import Blueprint, assemble_exam
+from mexam.question import OpenQuestion
+from mexam.question_db import QuestionDB
+
+
+def _db(specs):
+    """questions of (topic, taxonomy, points, collection)"""
+    db = QuestionDB()
+    for i, (topic, taxonomy, points, coll) in enumerate(specs):
+        db.add_question(OpenQuestion(question=f"q {i}", selected=False,
+                                     topic=topic, taxonomy=taxonomy,
+                                     points=points, collection=coll),
+                        sort_by_topics=False)
+    return db
+
+
+BANK = [(t, tax, p, "T1" if i % 3 == 0 else None)
+        for i, (t, tax, p) in enumerate(
+            (t, tax, p) for t in "ABCD" for tax in "123" for p in (1, 2))]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_taxonomy_shares(seed):
+    bp = Blueprint(n_questions=10, taxonomy_shares={"1": 0.3, "2,3": 0.5})
+    quests = assemble_exam(_db(BANK), bp, seed=seed)
+    assert bp.violations(quests) == []
+    assert sum(q.taxonomy == "1" for q in quests) >= 3
+    assert sum(q.taxonomy in ("2", "3") for q in quests) >= 5
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_max_per_topic_and_total_points(seed):
+    bp = Blueprint(n_questions=8, total_points=13, max_per_topic=2)
+    quests = assemble_exam(_db(BANK), bp, seed=seed)
+    assert bp.violations(quests) == []
+    assert sum(q.points for q in quests) == 13
+    for t in "ABCD":
+        assert sum(q.topic == t for q in quests) == 2
+
+
+def test_collection():
+    db = _db(BANK)
+    bp = Blueprint(n_questions=6, collection="T1", total_points=9)
+    quests = assemble_exam(db, bp, seed=1)
+    assert bp.violations(quests) == []
+    assert all("T1" in q.collection for q in quests)
+    # database order
+    assert quests == [q for q in db.questions if q in quests]
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_swaps_across_taxonomy_and_topics(seed):
+    # 6 points require a question of taxonomy 2 and a question of topic A
+    db = _db([("B", "2", 3, None), ("C", "2", 2, None), ("B", "1", 2, None),
+              ("C", "1", 2, None), ("B", "1", 1, None), ("A", "1", 1, None)])
+    bp = Blueprint(n_questions=3, total_points=6, max_per_topic=1,
+                   taxonomy_shares={"1": 0.5})
+    assert bp.violations(assemble_exam(db, bp, seed=seed)) == []
+    db = _db([("A", "1", 1, None), ("B", "1", 1, None), ("C", "2", 1, None),
+              ("C", "3", 3, None), ("A", "2", 3, None), ("A", "2", 2, None)])
+    bp = Blueprint(n_questions=2, total_points=5, max_per_topic=1)
+    assert bp.violations(assemble_exam(db, bp, seed=seed)) == []
+
+
+def test_infeasible():
+    db = _db(BANK)
+    bp = Blueprint(n_questions=3, total_points=10)  # at most 2 points each
+    quests = assemble_exam(db, bp, seed=1)
+    assert len(quests) == 3
+    assert bp.violations(quests) == ["6 instead of 10 points"]
+    bp = Blueprint(n_questions=6, max_per_topic=1)  # 4 topics
+    assert "4 instead of 6 questions" in bp.violations(assemble_exam(db, bp))
+    with pytest.raises(RuntimeError):
+        assemble_exam(db, Blueprint(n_questions=30))
+    with pytest.raises(RuntimeError):
+        assemble_exam(db, Blueprint(n_questions=9, collection="T1"))
+    with pytest.raises(ValueError):
+        Blueprint(n_questions=5, taxonomy_shares={"1": 1.5})
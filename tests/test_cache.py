@@ -0,0 +1,109 @@
+import os
+
+import pytest
+
+from mexam.markdown import load, lazy, load_database, load_database_lazy
+from mexam.markdown.cache import CACHE_FOLDER, HEADERS, ParseCache
+
+FILES = {"a.md": "# A\n\n## First XX\n\n[collection]: T1\n\n**EN**\n\nOne?\n\n- *X* yes\n- no\n\n"
+                 "## XX\n\n**EN**\n\nUntitled\n\n",
+         "b.md": "## Second\n\n**EN**\n\nTwo?\n\n- yes\n- *X* no\n\n"
+                 "# B\n\n## Third\n\n**EN**\n\nOpen question\n\n"}
+
+
+@pytest.fixture
+def bank(tmp_path):
+    for name, txt in FILES.items():
+        tmp_path.joinpath(name).write_text(txt, encoding="utf-8")
+    return tmp_path
+
+
+@pytest.fixture
+def n_parsed(monkeypatch):
+    """counts the parsed files"""
+    rtn = []
+
+    class Parser(load._MDParser):
+        def __init__(self, *args, **kwargs):
+            rtn.append(1)
+            super().__init__(*args, **kwargs)
+
+    index_data = lazy._index_data
+
+    def _index_data(path):
+        rtn.append(1)
+        return index_data(path)
+
+    monkeypatch.setattr(load, "_MDParser", Parser)
+    monkeypatch.setattr(lazy, "_index_data", _index_data)
+    return rtn
+
+
+def _state(db):
+    return [(x.topic, x.title, str(x.uuid), x.selected, sorted(x.collection),
+             x.to_text()) for x in db.questions]
+
+
+def _load(path, lazy_load=False):
+    if lazy_load:
+        db = load_database_lazy(path, cache=True, journal=False,
+                                verify_hashes="off")
+    else:
+        db = load_database(path, cache=True, journal=False, verify_hashes="off")
+    return db
+
+
+def _without_uuids(state):
+    # questions without UUID in the file get random UUIDs
+    return [x[:2] + x[3:] for x in state]
+
+
+@pytest.mark.parametrize("lazy_load", [False, True])
+def test_hit_and_miss(bank, n_parsed, lazy_load):
+    ref = _without_uuids(_state(load_database(bank, journal=False,
+                                              verify_hashes="off")))
+    n_parsed.clear()
+    first = _load(bank, lazy_load)
+    assert len(n_parsed) == 2
+    assert _without_uuids(_state(first)) == ref
+    second = _load(bank, lazy_load)
+    assert len(n_parsed) == 2  # cache hits
+    assert _without_uuids(_state(second)) == ref
+    assert bank.joinpath(CACHE_FOLDER, ".gitignore").is_file()
+
+
+@pytest.mark.parametrize("lazy_load", [False, True])
+def test_mtime_only_change(bank, n_parsed, lazy_load):
+    _load(bank, lazy_load)
+    fl = bank / "a.md"
+    st = fl.stat()
+    os.utime(fl, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    _load(bank, lazy_load)
+    assert len(n_parsed) == 2  # content hash is unchanged
+    # the cache entry has the new modification time
+    kind = HEADERS if lazy_load else "parsed"
+    assert ParseCache.for_database(bank, kind=kind).get(fl) is not None
+
+
+@pytest.mark.parametrize("lazy_load", [False, True])
+def test_edit_invalidates(bank, n_parsed, lazy_load):
+    _load(bank, lazy_load)
+    fl = bank / "b.md"
+    fl.write_text(FILES["b.md"].replace("Two?", "Two or three?"), encoding="utf-8")
+    db = _load(bank, lazy_load)
+    assert len(n_parsed) == 3  # only the edited file
+    assert any("Two or three?" in x.to_text() for x in db.questions)
+    # untitled questions and topic carry-over as without cache
+    ref = load_database(bank, journal=False, verify_hashes="off")
+    assert _without_uuids(_state(db)) == _without_uuids(_state(ref))
+
+
+def test_invalid_cache_file(bank, n_parsed):
+    _load(bank)
+    for fl in bank.joinpath(CACHE_FOLDER).glob("*.json"):
+        fl.write_text("{not json", encoding="utf-8")
+    db = _load(bank)
+    assert len(n_parsed) == 4
+    assert db.n_questions == 4
+    _load(bank)
+    assert len(n_parsed) == 4  # cache files have been replaced
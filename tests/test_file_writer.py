@@ -0,0 +1,107 @@
+import os
+import stat
+import threading
+
+import pytest
+
+from mexam import file_writer, misc
+from mexam.file_writer import FileWriter, write_file
+
+
+def _tmp_files(folder):
+    return [fl.name for fl in folder.iterdir() if fl.name.endswith(".tmp")]
+
+
+def test_write_file(tmp_path):
+    fl = tmp_path / "a.md"
+    assert write_file(fl, "first\n")
+    assert fl.read_text(encoding="utf-8") == "first\n"
+    assert write_file(fl, "second\n")
+    assert fl.read_text(encoding="utf-8") == "second\n"
+    assert _tmp_files(tmp_path) == []
+
+
+def test_failed_replace_keeps_file(tmp_path, monkeypatch):
+    fl = tmp_path / "a.md"
+    fl.write_text("original\n", encoding="utf-8")
+
+    def fail(src, dst):
+        raise OSError("replace failed")
+
+    monkeypatch.setattr(file_writer.os, "replace", fail)
+    with pytest.raises(OSError):
+        write_file(fl, "new content\n")
+    assert fl.read_text(encoding="utf-8") == "original\n"
+    assert _tmp_files(tmp_path) == []
+
+
+def test_unchanged_content_is_not_written(tmp_path):
+    fl = tmp_path / "a.md"
+    fl.write_text("content\n", encoding="utf-8")
+    os.utime(fl, ns=(10**9, 10**9))
+    assert not write_file(fl, "content\n")
+    assert fl.stat().st_mtime_ns == 10**9
+    # same size, other content
+    assert write_file(fl, "CONTENT\n")
+    assert fl.read_text(encoding="utf-8") == "CONTENT\n"
+    # changed by someone else after the write of this process
+    fl.write_text("changed\n", encoding="utf-8")
+    assert write_file(fl, "CONTENT\n")
+    assert fl.read_text(encoding="utf-8") == "CONTENT\n"
+    assert write_file(fl, "CONTENT\n", if_different=False)
+
+
+@pytest.mark.skipif(os.name != "posix", reason="file modes")
+def test_mode_is_kept(tmp_path):
+    fl = tmp_path / "a.md"
+    fl.write_text("content\n", encoding="utf-8")
+    os.chmod(fl, 0o600)
+    write_file(fl, "new\n")
+    assert stat.S_IMODE(fl.stat().st_mode) == 0o600
+
+
+def test_writer_keeps_order_of_same_path(tmp_path, monkeypatch):
+    fl = tmp_path / "a.md"
+    original = file_writer.write_file
+    first = threading.Event()
+
+    def slow_write(path, content, encoding, if_different):
+        if content == "0\n":
+            first.set()
+            # later writes of the same path must not overtake this one
+            threading.Event().wait(0.2)
+        return original(path, content, encoding, if_different)
+
+    monkeypatch.setattr(file_writer, "write_file", slow_write)
+    with FileWriter(threads=4) as writer:
+        for i in range(20):
+            writer.write(fl, f"{i}\n")
+            if i == 0:
+                first.wait()
+        writer.write(tmp_path / "b.md", "b\n")
+    assert fl.read_text(encoding="utf-8") == "19\n"
+    assert sorted(p.name for p in writer.written) == ["a.md", "b.md"]
+    assert _tmp_files(tmp_path) == []
+
+
+def test_writer_directly(tmp_path):
+    with FileWriter(threads=1) as writer:
+        writer.write(tmp_path / "a.md", "a\n")
+        writer.write(tmp_path / "a.md", "a\n")
+    assert writer.written == [tmp_path / "a.md"]
+
+
+def test_writer_raises_error(tmp_path):
+    writer = FileWriter(threads=2)
+    writer.write(tmp_path / "missing" / "a.md", "a\n")
+    writer.write(tmp_path / "b.md", "b\n")
+    with pytest.raises(OSError):
+        writer.close()
+    assert (tmp_path / "b.md").read_text(encoding="utf-8") == "b\n"
+
+
+def test_write_if_different_is_deprecated(tmp_path):
+    fl = tmp_path / "a.md"
+    with pytest.warns(DeprecationWarning):
+        misc.write_if_different(fl, "content\n")
+    assert fl.read_text(encoding="utf-8") == "content\n"
@@ -0,0 +1,117 @@
+from io import StringIO
+from math import sqrt
+from uuid import UUID
+
+import pytest
+
+from mexam.grading import (AnswerKey, Grader, ItemResponses, cronbach_alpha,
+                           item_statistics, letters_to_mask, mask_to_letters)
+
+U1 = UUID(int=1)  # single correct answer (A), 3 answers
+U2 = UUID(int=2)  # multiple correct answers (A and C), 4 answers
+
+# version A: original answer order
+KEY_A = AnswerKey("exam_A", [U1, U2], [0b001, 0b101],
+                  [[0, 1, 2], [0, 1, 2, 3]])
+# version B: questions and answers shuffled (order: original index of each
+# presented answer), that is, U2 correct "AB" and U1 correct "C"
+KEY_B = AnswerKey("exam_B", [U2, U1], [0b011, 0b100],
+                  [[2, 0, 3, 1], [1, 2, 0]])
+
+RESPONSES = """student, version, q1, q2
+s1, A, A, AC
+s2, A, B, A C
+s3, B, AB, C
+s4, A, , A
+"""
+
+
+def _grade(partial_credit=False):
+    grader = Grader([KEY_A, KEY_B], points={U1: 1, U2: 2},
+                    partial_credit=partial_credit)
+    return grader, grader.grade(StringIO(RESPONSES))
+
+
+def test_masks():
+    assert letters_to_mask("A") == 0b1
+    assert letters_to_mask("a, c") == 0b101
+    assert letters_to_mask("") == 0
+    assert mask_to_letters(0b1010) == "BD"
+    with pytest.raises(ValueError):
+        letters_to_mask("A1")
+
+
+def test_solutions_in_original_order():
+    grader, _ = _grade()
+    assert grader.solutions == {U1: 0b001, U2: 0b101}
+    assert grader.version("B") == "exam_B"
+    assert grader.max_scores() == {"exam_A": 3, "exam_B": 3}
+
+
+def test_scores_and_responses():
+    _, res = _grade()
+    assert res.items == [U1, U2]
+    assert res.versions == ["exam_A", "exam_A", "exam_B", "exam_A"]
+    assert res.scores == [[1, 2], [0, 2], [1, 2], [0, 0]]
+    assert res.total_scores() == [3, 2, 3, 0]
+    # responses of version B mapped to the original answer order
+    assert res.responses == [[0b001, 0b101], [0b010, 0b101],
+                             [0b001, 0b101], [0, 0b001]]
+
+
+def test_blank_responses():
+    grader = Grader([KEY_A])
+    res = grader.grade(StringIO("student, version\ns1, A, -, .\ns2, A\n"))
+    assert res.scores == [[0, 0], [0, 0]]
+    assert res.responses == [[0, 0], [0, 0]]
+
+
+def test_partial_credit():
+    grader = Grader([KEY_A], partial_credit=True)
+    solution = 0b101  # A and C
+    assert grader.score(0b101, solution, 2) == 2
+    assert grader.score(0b001, solution, 2) == 1  # one of two correct
+    assert grader.score(0b111, solution, 2) == 1  # two correct, one false
+    assert grader.score(0b011, solution, 2) == 0  # one correct, one false
+    assert grader.score(0b010, solution, 2) == 0  # never negative
+    # single correct answer: all or nothing
+    assert grader.score(0b011, 0b001, 1) == 0
+    assert Grader([KEY_A]).score(0b001, solution, 2) == 0
+
+
+def test_item_statistics():
+    grader, res = _grade()
+    stats = item_statistics(res, grader)
+    assert stats[U1]["n_responses"] == 4
+    assert stats[U1]["p_value"] == pytest.approx(0.5)
+    assert stats[U2]["p_value"] == pytest.approx(0.75)
+    # scores [1, 0, 1, 0] and [2, 2, 2, 0], rest [2, 2, 2, 0] and [1, 0, 1, 0]
+    assert stats[U1]["point_biserial"] == pytest.approx(1 / sqrt(3))
+    assert stats[U2]["point_biserial"] == pytest.approx(1 / sqrt(3))
+    assert stats[U1]["choice_rates"] == pytest.approx([0.5, 0.25, 0])
+    assert stats[U2]["choice_rates"] == pytest.approx([1, 0, 0.75, 0])
+
+
+def test_point_biserial_zero_variance():
+    grader = Grader([KEY_A])
+    res = grader.grade(StringIO("student, version\ns1, A, A, AC\n"
+                                "s2, A, A, B\ns3, A, A, C\n"))
+    stats = item_statistics(res, grader)
+    assert stats[U1]["p_value"] == 1
+    assert stats[U1]["point_biserial"] is None  # all students correct
+    assert stats[U2]["point_biserial"] is None  # rest score constant
+
+
+def test_cronbach_alpha():
+    _, res = _grade()
+    # item variances 0.25 and 0.75, variance of the totals 1.5
+    assert cronbach_alpha(res) == pytest.approx(2 * (1 - 1 / 1.5))
+
+
+def test_cronbach_alpha_undefined():
+    grader = Grader([KEY_A])
+    same = grader.grade(StringIO("student, version\ns1, A, A, B\ns2, A, A, B\n"))
+    assert cronbach_alpha(same) is None  # zero variance of the totals
+    single = grader.grade(StringIO("student, version\ns1, A, A, AC\n"))
+    assert cronbach_alpha(single) is None
+    assert cronbach_alpha(ItemResponses([U1, U2])) is None
@@ -0,0 +1,68 @@
+from mexam.markdown import EditJournal, load_database, load_database_lazy
+from mexam.markdown.journal import (REMOVE_COLLECTION, SELECT,
+                                    STORE_COLLECTION, UNSELECT_ALL)
+
+UUIDS = [f"{i + 1}" * 8 + f"-0000-4000-8000-{i:012d}" for i in range(4)]
+
+
+def _question(title, uuid):
+    return (f"## {title}\n\n[uuid]: {uuid}\n\n**EN**\n\n"
+            f"Question {title}?\n\n- *X* yes\n- no\n\n")
+
+
+def _bank(path):
+    """bank with a copied question (duplicate UUID) in another topic"""
+    fl = path / "bank.md"
+    fl.write_text("# Alpha\n\n" + "".join(_question(f"A{i}", u)
+                                          for i, u in enumerate(UUIDS)) +
+                  "# Beta\n\n" + _question("B0", UUIDS[1]), encoding="utf-8")
+    return fl
+
+
+def _state(db):
+    return sorted((x.topic, x.title, x.selected, tuple(sorted(x.collection)))
+                  for x in db.questions)
+
+
+def _edit(db):
+    """edits like the edit command and returns the journal entries"""
+    edits = []
+    for id_str in (UUIDS[1][:4], UUIDS[2]):
+        assert db.add_selection_uuid(id_str)
+        edits.append((SELECT, str(db.find_uuids(id_str)[0])))
+    db.store_collection("first")
+    edits.append((STORE_COLLECTION, "first"))
+    db.unselect_all()
+    edits.append((UNSELECT_ALL, ""))
+    assert db.add_selection_uuid(UUIDS[1])
+    edits.append((SELECT, UUIDS[1]))
+    db.store_collection("second")
+    edits.append((STORE_COLLECTION, "second"))
+    db.remove_collection("first")
+    edits.append((REMOVE_COLLECTION, "first"))
+    assert db.add_selection_uuid(UUIDS[3])
+    edits.append((SELECT, UUIDS[3]))
+    return edits
+
+
+def test_replay_equals_edit(tmp_path):
+    bank = _bank(tmp_path)
+    db = load_database(bank, journal=False, verify_hashes="off")
+    EditJournal.for_database(bank).append(_edit(db))
+    expected = _state(db)
+    assert len(db.collection_members("second")) == 1
+    assert sum("second" in x.collection for x in db.questions) == 2  # copy
+
+    replayed = load_database(bank, verify_hashes="off")
+    assert _state(replayed) == expected
+    lazy = load_database_lazy(bank, verify_hashes="off")
+    assert _state(lazy) == expected
+
+
+def test_replay_unknown_uuid(tmp_path, capsys):
+    bank = _bank(tmp_path)
+    EditJournal.for_database(bank).append(
+        [(SELECT, "00000000-0000-4000-8000-000000000099"), (SELECT, "x")])
+    db = load_database(bank, verify_hashes="off")
+    assert not any(x.selected for x in db.questions)
+    assert capsys.readouterr().out.count("can't find UUID") == 2
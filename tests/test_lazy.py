@@ -0,0 +1,95 @@
+import pytest
+
+from mexam.markdown import load_database, load_database_lazy
+
+VALID = """# Topic
+
+## MC XX
+
+**EN**
+
+MC question?
+
+- *X* yes
+- no
+
+## Bilingual open
+
+**EN**
+
+Open question
+
+**NL**
+
+Open vraag
+
+## Answer after text
+
+**EN**
+
+Question with
+several lines
+- *X* answer
+"""
+
+INVALID = """
+## No language
+
+Text without language
+
+## Bilingual MC and open
+
+**EN**
+
+MC question?
+
+- *X* yes
+- no
+
+**NL**
+
+Open vraag
+
+## Dash without answer
+
+**EN**
+
+Open question
+
+-
+
+**NL**
+
+MC vraag?
+
+- *X* ja
+- nee
+"""
+
+
+def _load(path, lazy):
+    load = load_database_lazy if lazy else load_database
+    return load(path, journal=False, verify_hashes="off")
+
+
+def _state(db):
+    return [(x.topic, x.title, x.selected, x.materialize().to_text())
+            for x in db.questions]
+
+
+def test_lazy_equals_full_load(tmp_path):
+    fl = tmp_path / "bank.md"
+    fl.write_text(VALID + INVALID + VALID.replace("# Topic", "# Other"),
+                  encoding="utf-8")
+    full = _state(_load(fl, lazy=False))
+    assert len(full) == 6
+    assert _state(_load(fl, lazy=True)) == full
+
+
+def test_identical_languages(tmp_path):
+    fl = tmp_path / "bank.md"
+    fl.write_text(VALID + "## Twice EN\n\n**EN**\n\nA\n\n**EN**\n\nB\n",
+                  encoding="utf-8")
+    for lazy in (False, True):
+        with pytest.raises(ValueError):
+            _load(fl, lazy)
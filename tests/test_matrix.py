@@ -0,0 +1,31 @@
+from mexam.exam import Exam
+from mexam.question import MCQuestion, OpenQuestion
+from mexam.question_db import QuestionDB
+
+
+def _exam():
+    db = QuestionDB()
+    o = OpenQuestion(question="open", selected=True, taxonomy=2, topic="A")
+    o.add_part("part 1", points=2)
+    o.add_part("part 2", points=3, taxonomy=1)
+    db.add_question(o)
+    db.add_question(MCQuestion("mc", True, topic="B", taxonomy="K"))
+    db.add_question(MCQuestion("mc", True, topic="B", points=2.5))
+    return Exam(db)
+
+
+def test_as_dict_keeps_original_values():
+    tm = _exam().test_matrix
+    assert tm == {"question": [1, "1a", "1b", 2, 3],
+                  "taxonomy": ["2", None, 1, "K", ""],
+                  "topic": ["A", "A", "A", "B", "B"],
+                  "points": [1, 2, 3, 1, 2.5]}
+    assert [type(x) for x in tm["points"]] == [int, int, int, int, float]
+
+
+def test_topic_taxonomy_table():
+    topics, taxonomies, table = _exam().get_test_matrix().topic_taxonomy_table()
+    assert topics == ["A", "B"]
+    # the question with parts is counted by its parts
+    assert taxonomies == ["", "1", "2", "K"]
+    assert table == [[2, 3, 0, 0], [2.5, 0, 0, 1]]
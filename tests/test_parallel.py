@@ -0,0 +1,58 @@
+import pytest
+
+from mexam.markdown import load_database, load_database_lazy
+from mexam.misc import all_files
+
+# files without topic at the beginning and untitled questions ("XX" only)
+FILES = {"a.md": "# Topic A\n\n## XX\n\n[uuid]: 00000000-0000-4000-8000-000000000001\n\n"
+                 "**EN**\n\nA1?\n\n- *X* yes\n- no\n\n"
+                 "## Named A\n\n[uuid]: 00000000-0000-4000-8000-000000000002\n\n"
+                 "**EN**\n\nA2?\n\n",
+         "b.md": "## XX\n\n[uuid]: 00000000-0000-4000-8000-000000000003\n\n"
+                 "**EN**\n\nB1?\n\n- yes\n- *X* no\n\n"
+                 "# Topic B\n\n## XX\n\n[uuid]: 00000000-0000-4000-8000-000000000004\n\n"
+                 "**EN**\n\nB2?\n\n",
+         "c.md": "## Named C\n\n[uuid]: 00000000-0000-4000-8000-000000000005\n\n"
+                 "**EN**\n\nC1?\n\n**NL**\n\nC1 NL?\n\n"
+                 "## XX\n\n[uuid]: 00000000-0000-4000-8000-000000000006\n\n"
+                 "**EN**\n\nC2?\n\n",
+         "d.md": "Text without question\n\n"
+                 "## XX\n\n[uuid]: 00000000-0000-4000-8000-000000000007\n\n"
+                 "**EN**\n\nD1?\n\n"}
+
+
+@pytest.fixture
+def bank(tmp_path):
+    for name, txt in FILES.items():
+        tmp_path.joinpath(name).write_text(txt, encoding="utf-8")
+    return tmp_path
+
+
+def _state(db):
+    # ignored content without time stamps
+    ignored = [ln for ln in db.ignored_content.splitlines()
+               if not ln.startswith("[TOPIC ")]
+    return ([(x.topic, x.title, str(x.uuid), x.selected, x.to_text())
+             for x in db.questions], ignored)
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_parallel_equals_serial(bank, lazy):
+    load = load_database_lazy if lazy else load_database
+    serial = _state(load(bank, processes=1, journal=False, verify_hashes="off"))
+    parallel = _state(load(bank, processes=2, journal=False, verify_hashes="off"))
+    assert parallel == serial
+    # untitled questions are numbered across the files
+    quests, _ = serial
+    untitled = sorted(t for _, t, *_ in quests if t.startswith("Question "))
+    assert untitled == [f"Question {i}" for i in range(1, 6)]
+
+
+def test_parallel_equals_single_file(bank, tmp_path_factory):
+    # topics carry over to the next file as in the concatenated files
+    db = load_database(bank, processes=2, journal=False, verify_hashes="off")
+    single = tmp_path_factory.mktemp("single").joinpath("all.md")
+    single.write_text("".join(FILES[fl.name] for fl in all_files(bank, ".md")),
+                      encoding="utf-8")
+    ref = load_database(single, journal=False, verify_hashes="off")
+    assert _state(db) == _state(ref)
@@ -0,0 +1,159 @@
+from pathlib import Path
+
+import pytest
+
+from mexam.markdown import (load_database, load_database_lazy, patch_database,
+                            save_database_folder)
+from mexam.question_db import QuestionDB
+
+UUIDS = [f"00000000-0000-4000-8000-{i:012d}" for i in range(6)]
+
+SOURCE = f"""# Größen
+
+## Wärme – Übung ✓
+
+[points]: 2
+[uuid]: {UUIDS[0]}
+
+**EN**
+
+Which is “warm”?
+
+- *X* 30 °C
+- 0 °C
+
+## Second question XX
+
+[uuid]: {UUIDS[1]}
+[collection]: R2023, T0
+
+**EN**
+
+Second question?
+
+- *X* yes
+- no
+
+**NL**
+
+Tweede vraag?
+
+- *X* ja
+- nee
+
+## Länge ½
+
+[uuid]: {UUIDS[2]}
+[source]: book
+
+**EN**
+
+Open question with ünïcödé.
+
+# Other topic
+
+## Fourth
+
+[uuid]: {UUIDS[3]}
+[collection]: R2023
+
+**EN**
+
+Fourth?
+
+- *X* a
+- b
+
+## Fifth 😀
+
+[uuid]: {UUIDS[4]}
+
+**EN**
+
+Fifth?
+
+- a
+- *X* b
+"""
+
+
+def _folder(path: Path, crlf: bool) -> Path:
+    """database folder in the format of a full rewrite"""
+    path.mkdir()
+    src = path / "src.md"
+    src.write_text(SOURCE, encoding="utf-8")
+    folder = path / "db"
+    folder.mkdir()
+    save_database_folder(load_database(src, verify_hashes="off", journal=False),
+                         folder)
+    if crlf:
+        for fl in folder.glob("*.md"):
+            fl.write_bytes(fl.read_bytes().replace(b"\n", b"\r\n"))
+    return folder
+
+
+def _edit_1(db: QuestionDB):
+    # several changes in one file, multibyte titles
+    db.unselect_all()
+    db.select_uuids([UUIDS[0], UUIDS[2]])
+    db.store_collection("T1")
+    db.get_question(UUIDS[1]).selected = True
+
+
+def _edit_2(db: QuestionDB):
+    # changes after offsets have been updated by the first patch
+    db.remove_collection("R2023")
+    db.get_question(UUIDS[4]).selected = True
+    db.get_question(UUIDS[4]).collection.add("T2")
+    db.get_question(UUIDS[0]).selected = True
+
+
+def _rewrite(folder: Path, edits, crlf: bool) -> dict:
+    """contents after editing and rewriting the complete database"""
+    db = load_database(folder, verify_hashes="off", journal=False)
+    for edit in edits:
+        edit(db)
+    save_database_folder(db, folder, incremental=False)
+    rtn = {}
+    for fl in sorted(folder.glob("*.md")):
+        content = fl.read_bytes()
+        if crlf:
+            content = content.replace(b"\n", b"\r\n")
+        rtn[fl.name] = content
+    return rtn
+
+
+def _contents(folder: Path) -> dict:
+    return {fl.name: fl.read_bytes() for fl in sorted(folder.glob("*.md"))}
+
+
+@pytest.mark.parametrize("crlf", [False, True])
+def test_patch_equals_rewrite(tmp_path, crlf):
+    folder = _folder(tmp_path / "a", crlf)
+    expected_1 = _rewrite(_folder(tmp_path / "b", crlf), [_edit_1], crlf)
+    expected_2 = _rewrite(_folder(tmp_path / "c", crlf), [_edit_1, _edit_2], crlf)
+
+    db = load_database_lazy(folder, journal=False)
+    _edit_1(db)
+    changed = patch_database(db)
+    assert changed is not None and len(changed) == 1
+    assert _contents(folder) == expected_1
+    assert not any(x.dirty for x in db.questions)
+
+    _edit_2(db)
+    assert len(patch_database(db)) == 2
+    assert _contents(folder) == expected_2
+
+    # the updated offsets point to the patched files
+    fresh = load_database_lazy(folder, journal=False)
+    for x in db.questions:
+        y = fresh.get_question(x.uuid)
+        assert (x.span, x.header_line, x.info_lines) == \
+            (y.span, y.header_line, y.info_lines)
+        assert x.materialize().to_text() == y.materialize().to_text()
+
+
+def test_patch_refuses_other_changes(tmp_path):
+    db = load_database_lazy(_folder(tmp_path / "a", False), journal=False)
+    db.get_question(UUIDS[0]).points = 3
+    assert patch_database(db) is None
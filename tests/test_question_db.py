@@ -0,0 +1,106 @@
+import pytest
+
+from mexam.question import MCQuestion
+from mexam.question_db import QuestionDB
+
+UUIDS = ["aaaa0000-0000-4000-8000-000000000001",
+         "aaaa0000-0000-4000-8000-000000000002",
+         "abcd0000-0000-4000-8000-000000000003",
+         "b0000000-0000-4000-8000-000000000004"]
+
+
+def _db():
+    db = QuestionDB()
+    db.add_questions([MCQuestion(question=f"q {i}", selected=False,
+                                 topic="T", uuid=u) for i, u in enumerate(UUIDS)])
+    return db
+
+
+def test_find_uuids_prefix():
+    db = _db()
+    assert [str(u) for u in db.find_uuids("abcd")] == [UUIDS[2]]
+    assert [str(u) for u in db.find_uuids("aaaa")] == UUIDS[:2]
+    assert [str(u) for u in db.find_uuids("a")] == UUIDS[:3]
+    assert len(db.find_uuids("a", max_matches=2)) == 2
+    assert db.find_uuids("c") == []
+    assert db.find_uuids("aaab") == []
+    assert len(db.find_uuids("")) == len(UUIDS)
+
+
+def test_find_uuids_after_add_and_remove():
+    db = _db()
+    db.remove_question(UUIDS[2])
+    assert db.find_uuids("abcd") == []
+    db.add_question(MCQuestion(question="new", selected=False,
+                               uuid="abcd0000-0000-4000-8000-000000000009"))
+    assert [str(u) for u in db.find_uuids("abcd")] == \
+        ["abcd0000-0000-4000-8000-000000000009"]
+
+
+def test_add_selection_uuid():
+    db = _db()
+    assert db.add_selection_uuid("abc")
+    assert [str(u) for u in db.selected_uuids()] == [UUIDS[2]]
+    assert not db.add_selection_uuid("c")
+    with pytest.raises(RuntimeError):
+        db.add_selection_uuid("aaaa")
+    assert db.n_selected == 1
+
+
+def _collection_db():
+    # collections of the questions UUIDS[0..3]
+    colls = ["T1, R2023", "T1", "R2023", None]
+    db = QuestionDB()
+    db.add_questions([MCQuestion(question=f"q {i}", selected=False, topic="T",
+                                 uuid=u, collection=c)
+                      for i, (u, c) in enumerate(zip(UUIDS, colls))])
+    return db
+
+
+def _strs(uuids):
+    return sorted(str(u) for u in uuids)
+
+
+def test_query_collections():
+    db = _collection_db()
+    assert db.get_collections() == ["R2023", "T1"]
+    assert _strs(db.query_collections(all_of=["T1"])) == UUIDS[:2]
+    assert _strs(db.query_collections(all_of=["T1", "R2023"])) == UUIDS[:1]
+    assert _strs(db.query_collections(any_of=["T1", "R2023"])) == UUIDS[:3]
+    assert _strs(db.query_collections(all_of=["T1"], none_of=["R2023"])) == [UUIDS[1]]
+    assert _strs(db.query_collections(none_of=["T1", "R2023"])) == [UUIDS[3]]
+    assert _strs(db.query_collections()) == UUIDS
+    assert db.query_collections(all_of=["T1", "unknown"]) == set()
+    assert _strs(db.query_collections(any_of=["unknown", "R2023"])) == [UUIDS[0], UUIDS[2]]
+
+
+def test_store_and_remove_collection():
+    db = _collection_db()
+    db.add_selection_uuid("b0")
+    db.store_collection("T2")
+    assert _strs(db.collection_members("T2")) == [UUIDS[3]]
+    assert db.n_selected == 0
+    db.remove_collection("T1")
+    assert db.get_collections() == ["R2023", "T2"]
+    assert db.collection_members("T1") == set()
+    assert all("T1" not in x.collection for x in db.questions)
+
+
+def test_collections_changed_directly():
+    db = _collection_db()
+    assert db.get_collections() == ["R2023", "T1"]  # index is built
+    x = db.get_question(UUIDS[3])
+    x.collection.add("T9")
+    assert db.get_collections() == ["R2023", "T1", "T9"]
+    db.select_collection("T9")
+    assert _strs(db.selected_uuids()) == [UUIDS[3]]
+    db.get_question(UUIDS[1]).collection |= {"T9"}
+    assert _strs(db.query_collections(all_of=["T9"], none_of=["R2023"])) == \
+        [UUIDS[1], UUIDS[3]]
+    db.get_question(UUIDS[0]).collection = {"T9"}
+    assert _strs(db.collection_members("T1")) == [UUIDS[1]]
+    db.remove_collection("T9")
+    assert db.collection_members("T9") == set()
+    assert x.collection == set()
+    x.collection.discard("R2023")
+    assert db.get_collections() == ["R2023", "T1"]
@@ -0,0 +1,84 @@
+import os
+
+from mexam.markdown import load_database, save_database_folder
+from mexam.markdown.load import topic_file_name
+
+TOPICS = ["Alpha", "Beta", "Gamma"]
+
+
+def _question(topic, i):
+    return (f"## {topic} {i}\n\n[uuid]: 00000000-0000-4000-8000-"
+            f"{TOPICS.index(topic) * 10 + i:012d}\n\n**EN**\n\n"
+            f"Question {topic} {i}?\n\n- *X* yes\n- no\n\n")
+
+
+def _saved_bank(path):
+    """database folder in the layout of save_database_folder"""
+    fl = path / "bank.md"
+    fl.write_text("".join(f"# {t}\n\n" + _question(t, 1) + _question(t, 2)
+                          for t in TOPICS), encoding="utf-8")
+    db = load_database(fl, journal=False, verify_hashes="off")
+    folder = path / "db"
+    save_database_folder(db, folder)
+    return folder
+
+
+def _load(folder):
+    return load_database(folder, journal=False, verify_hashes="off")
+
+
+def _mtimes(folder):
+    return {fl.name: fl.stat().st_mtime_ns for fl in folder.iterdir()}
+
+
+def _age(folder):
+    """sets old modification times to detect rewritten files"""
+    for fl in folder.iterdir():
+        os.utime(fl, ns=(10**9, 10**9))
+
+
+def test_only_dirty_topic_is_written(tmp_path):
+    folder = _saved_bank(tmp_path)
+    db = _load(folder)
+    assert db.saved_folder == folder.absolute()
+    assert db.dirty_topics() == set()
+    db.get_question("00000000-0000-4000-8000-000000000011").points = 3
+    assert db.dirty_topics() == {"Beta"}
+
+    _age(folder)
+    saved = save_database_folder(db, folder)
+    assert [x.name for x in saved] == [topic_file_name("Beta")]
+    assert [n for n, t in _mtimes(folder).items() if t != 10**9] == \
+        [topic_file_name("Beta")]
+    assert db.dirty_topics() == set()
+    assert _load(folder).get_question(
+        "00000000-0000-4000-8000-000000000011").points == 3
+
+
+def test_changed_topic(tmp_path):
+    folder = _saved_bank(tmp_path)
+    db = _load(folder)
+    db.get_question("00000000-0000-4000-8000-000000000001").topic = "Beta"
+    db.remove_question("00000000-0000-4000-8000-000000000002")
+    assert db.dirty_topics() == {"Alpha", "Beta"}
+    saved = save_database_folder(db, folder)
+    assert sorted(x.name for x in saved) == [topic_file_name("Beta")]
+    assert not folder.joinpath(topic_file_name("Alpha")).exists()
+    assert [x.topic for x in _load(folder).questions] == ["Beta"] * 3 + ["Gamma"] * 2
+
+
+def test_other_layout_is_rewritten(tmp_path):
+    # several topics in one file
+    folder = _saved_bank(tmp_path)
+    alpha, beta = (folder.joinpath(topic_file_name(t)) for t in TOPICS[:2])
+    both = folder / "alpha_and_beta.md"
+    both.write_text(alpha.read_text(encoding="utf-8") +
+                    beta.read_text(encoding="utf-8"), encoding="utf-8")
+    alpha.unlink()
+    beta.unlink()
+    db = _load(folder)
+    assert db.saved_folder is None
+    saved = save_database_folder(db, folder)
+    assert sorted(x.name for x in saved) == sorted(map(topic_file_name, TOPICS))
+    assert not both.exists()
+    assert _load(folder).n_questions == 6
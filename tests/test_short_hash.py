@@ -0,0 +1,80 @@
+from mexam.misc import short_hash
+from mexam.question import (Answer, BilingualOpenQuestion, MCBilingualQuestion,
+                            MCQuestion, OpenQuestion)
+
+
+def _mc(text="What?", language="EN"):
+    rtn = MCQuestion(question=text, selected=False, language=language)
+    rtn.add_answer("yes", is_correct=True, fixed_position=False)
+    rtn.add_answer("no", is_correct=False, fixed_position=False)
+    return rtn
+
+
+def _check(quest):
+    """cached hash is the hash of the current text"""
+    assert quest.short_hash == short_hash(quest.to_text())
+
+
+def test_question_text():
+    x = _mc()
+    old = x.short_hash
+    x.question = "Why?"
+    assert x.short_hash != old
+    _check(x)
+    x.question = "What?"
+    assert x.short_hash == old
+
+
+def test_answers():
+    x = _mc()
+    hashes = {x.short_hash}
+    x.add_answer("maybe", is_correct=False, fixed_position=True)
+    hashes.add(x.short_hash)
+    _check(x)
+    x.permute_answers([2, 0, 1])
+    hashes.add(x.short_hash)
+    _check(x)
+    x.answers = [Answer("only", is_correct=True)]
+    hashes.add(x.short_hash)
+    _check(x)
+    # direct change of an answer
+    x.answers[0].text = "other"
+    x.content_changed()
+    hashes.add(x.short_hash)
+    _check(x)
+    assert len(hashes) == 5
+
+
+def test_views_have_own_hash():
+    x = _mc()
+    v = x.view()
+    v.permute_answers([1, 0])
+    _check(v)
+    _check(x)
+    assert v.short_hash != x.short_hash
+
+
+def test_bilingual_sub_questions():
+    x = MCBilingualQuestion(_mc(), _mc("Wat?", language="NL"))
+    old = x.short_hash
+    x.L2.question = "Waarom?"
+    assert x.short_hash != old
+    _check(x)
+    old = x.short_hash
+    x.add_answer("maybe", "misschien", is_correct=False)
+    assert x.short_hash != old
+    _check(x)
+    x.shuffle_answers()
+    _check(x)
+    _check(x.L1)
+
+
+def test_open_question_parts():
+    a = OpenQuestion(question="Explain", selected=False, language="EN")
+    b = OpenQuestion(question="Leg uit", selected=False, language="NL")
+    x = BilingualOpenQuestion(a, b)
+    old = x.short_hash
+    x.L1.add_part("first part", points=1)
+    assert x.short_hash != old
+    _check(x)
+    _check(x.L1)
@@ -0,0 +1,85 @@
+import random
+
+import pytest
+
+from mexam.exam import Exam
+from mexam.misc import shuffled_permutation
+from mexam.question import MCQuestion
+from mexam.question_db import QuestionDB
+
+N_ANSWERS = 6
+
+
+def _db(n=12, selected=None):
+    db = QuestionDB()
+    for i in range(n):
+        x = MCQuestion(question=f"q {i}", topic="T", title=f"Q{i}",
+                       selected=selected is None or i in selected,
+                       uuid=f"00000000-0000-4000-8000-{i:012d}")
+        for a in range(N_ANSWERS):
+            x.add_answer(f"answer {i}-{a}", is_correct=a == 0,
+                         fixed_position=False)
+        db.add_question(x)
+    return db
+
+
+def _shuffled(db, seed):
+    exam = Exam(db, counter_in_title=False)
+    exam.shuffle_questions(sort_by_topics=False, seed=seed)
+    exam.shuffle_answers(seed=seed)
+    return [x.uuid for x in exam.questions], \
+        {x.uuid: x.answer_order for x in exam.questions}
+
+
+def test_independent_of_other_questions():
+    order, answers = _shuffled(_db(), seed=7)
+    subset = {1, 4, 5, 8, 11}
+    order_sub, answers_sub = _shuffled(_db(selected=subset), seed=7)
+    assert order_sub == [u for u in order if u in answers_sub]
+    assert len(order_sub) == len(subset)
+    for u, x in answers_sub.items():
+        assert x == answers[u]
+
+
+def test_reproducible():
+    random.seed(1)
+    a = _shuffled(_db(), seed="exam:A")
+    random.seed(2)  # global random state doesn't matter
+    b = _shuffled(_db(), seed="exam:A")
+    assert a == b
+    c = _shuffled(_db(), seed="exam:B")
+    assert c[0] != a[0]
+    assert c[1] != a[1]
+
+
+def test_shuffled_permutation_fixed_positions():
+    rng = random.Random(3)
+    seen = set()
+    for _ in range(200):
+        p = shuffled_permutation(6, fixed_ids=[0, 3], rng=rng)
+        assert sorted(p) == list(range(6))
+        assert p[0] == 0 and p[3] == 3
+        seen.add(p)
+    assert len(seen) == 24  # all permutations of the 4 variable ids
+    assert shuffled_permutation(0) == ()
+    assert shuffled_permutation(3, fixed_ids=[0, 1, 2]) == (0, 1, 2)
+
+
+def test_shuffle_answers_with_fixed_position():
+    x = MCQuestion(question="q", selected=False)
+    for a in range(N_ANSWERS):
+        x.add_answer(f"answer {a}", is_correct=a == 0,
+                     fixed_position=a == N_ANSWERS - 1)
+    original = x.answers
+    for seed in range(20):
+        v = x.view()
+        v.shuffle_answers(rng=random.Random(seed))
+        assert v.answers[-1] is original[-1]
+        assert v.answers == tuple(original[i] for i in v.answer_order)
+        assert x.answers == original  # the view is shuffled only
+    # permutations refer to the current order
+    x.permute_answers([1, 0, 2, 3, 4, 5])
+    x.permute_answers([1, 0, 2, 3, 4, 5])
+    assert x.answers == original
+    with pytest.raises(ValueError):
+        x.permute_answers([0, 0, 1, 2, 3, 4])
@@ -0,0 +1,57 @@
+from mexam.markdown import EditJournal, SQLiteIndex, load_database
+from mexam.markdown.journal import (REMOVE_COLLECTION, SELECT,
+                                    STORE_COLLECTION, UNSELECT_ALL)
+
+UUIDS = [f"{i + 1}" * 8 + f"-0000-4000-8000-{i:012d}" for i in range(4)]
+
+
+def _question(title, uuid):
+    return (f"## {title}\n\n[uuid]: {uuid}\n\n**EN**\n\n"
+            f"Question {title}?\n\n- *X* yes\n- no\n\n")
+
+
+def _bank(path):
+    """bank with a copied question (duplicate UUID) in another topic"""
+    fl = path / "bank.md"
+    fl.write_text("# Alpha\n\n" + "".join(_question(f"A{i}", u)
+                                          for i, u in enumerate(UUIDS)) +
+                  "# Beta\n\n" + _question("B0", UUIDS[1]), encoding="utf-8")
+    return fl
+
+
+def _db_state(db):
+    collections = set()
+    for x in db.questions:
+        collections.update(x.collection)
+    return (sorted(str(x.uuid) for x in db.questions if x.selected),
+            {tag: sorted(str(x.uuid) for x in db.questions
+                         if tag in x.collection) for tag in collections})
+
+
+def _index_state(index):
+    return (sorted(str(u) for u in index.query(selected=True)),
+            {tag: sorted(str(u) for u in index.query(collection=tag))
+             for tag in index.get_collections()})
+
+
+def test_index_equals_database_after_edits(tmp_path):
+    bank = _bank(tmp_path)
+    journal = EditJournal.for_database(bank)
+    edits = [[(SELECT, UUIDS[1]), (SELECT, UUIDS[2])],
+             [(STORE_COLLECTION, "first"), (SELECT, UUIDS[1])],
+             [(STORE_COLLECTION, "second"), (REMOVE_COLLECTION, "first"),
+              (SELECT, UUIDS[3]), (SELECT, UUIDS[1])],
+             [(UNSELECT_ALL, ""), (SELECT, UUIDS[1])]]
+    with SQLiteIndex(bank) as index:
+        for entries in edits:
+            journal.append(entries)
+            index.sync()  # applies only the new entries
+            db = load_database(bank, verify_hashes="off")
+            assert _index_state(index) == _db_state(db)
+            assert index.n_selected == db.n_selected
+        assert index.n_selected == 2  # incl. the copy
+
+    # all entries applied to a new index
+    with SQLiteIndex(bank, index_file=tmp_path / "new.sqlite") as index:
+        index.sync()
+        assert _index_state(index) == _db_state(db)
@@ -0,0 +1,63 @@
+from mexam.exam import Exam, make_exam_versions
+from mexam.markdown import load_database
+from mexam.markdown.convert import database_to_markdown
+
+N_QUESTIONS = 4
+N_ANSWERS = 5
+
+
+def _bank(path):
+    txt = "# Topic\n\n"
+    for i in range(N_QUESTIONS):
+        txt += f"## Question {i} XX\n\n**EN**\n\nWhat is {i}?\n\n"
+        for a in range(N_ANSWERS):
+            tag = "*X* " if a in (0, i % N_ANSWERS) else ""
+            txt += f"- {tag}answer {i}-{a}\n"
+        txt += "\n"
+    fl = path / "bank.md"
+    fl.write_text(txt, encoding="utf-8")
+    return fl
+
+
+def _versions(path):
+    db = load_database(_bank(path), verify_hashes="off", journal=False)
+    exam = Exam(db)
+    return exam, make_exam_versions(exam, n_versions=2, seed=42)
+
+
+def test_answers_are_not_fixed(tmp_path):
+    db = load_database(_bank(tmp_path), verify_hashes="off", journal=False)
+    for x in db.questions:
+        assert not any(a.fixed_position for a in x.answers)
+
+
+def test_versions_differ_in_answer_order(tmp_path):
+    exam, (a, b) = _versions(tmp_path)
+    orders_a = {x.uuid: x.answer_order for x in a.questions}
+    orders_b = {x.uuid: x.answer_order for x in b.questions}
+    assert orders_a != orders_b
+    assert any(o != tuple(range(N_ANSWERS)) for o in orders_a.values())
+    # the exam itself is unchanged
+    for x in exam.questions:
+        assert x.answer_order == tuple(range(N_ANSWERS))
+
+
+def test_version_keys_are_correct(tmp_path):
+    exam, versions = _versions(tmp_path)
+    correct = {x.uuid: {a.text for a in x.answers if a.is_correct}
+               for x in exam.questions}
+    for v in versions:
+        markdown = database_to_markdown(v)
+        key = v.get_solution_summary(with_hash=False, with_uuid=True).splitlines()
+        assert len(key) == N_QUESTIONS + 1  # header line
+        blocks = markdown.split("\n## ")[1:]
+        for x, line, block in zip(v.questions, key[1:], blocks):
+            _, uuid, *letters = [s.strip() for s in line.split(",")]
+            assert uuid == str(x.uuid)
+            texts = [x.answers[ord(l) - ord("A")].text for l in letters]
+            assert set(texts) == correct[x.uuid]
+            # rendered answers are in the order of the key
+            rendered = [ln for ln in block.splitlines() if ln.startswith("- ")]
+            assert rendered == [a.to_text().rstrip() for a in x.answers]
+            assert [ln.startswith("- *X* ") for ln in rendered] == \
+                [chr(ord("A") + i) in letters for i in range(N_ANSWERS)]